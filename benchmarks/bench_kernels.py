@@ -0,0 +1,212 @@
+"""
+Benchmark the kernels in ``skutil.metrics.kernel`` against their closest
+scikit-learn equivalents, sweeping the number of samples and features, the
+dtype and dense vs. sparse (CSR) input. Each (kernel, implementation, size,
+dtype, format) case records the best and mean wall time over ``--repeat``
+runs and, where ``tracemalloc`` is available (python 3), the peak memory
+allocated during a single run. The results are written as JSON so runs
+from different releases can be compared.
+
+The sklearn kernels are timing references, not numerical equivalents:
+skutil's parameterizations differ, and some (i.e., 'spline') have no
+sklearn analogue at all.
+
+Usage::
+
+    $ python benchmarks/bench_kernels.py --output kernels.json
+    $ python benchmarks/bench_kernels.py --quick --kernels rbf linear
+    $ python benchmarks/bench_kernels.py --output new.json --compare kernels.json
+"""
+from __future__ import print_function, division
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+import scipy
+import scipy.sparse as sp
+import sklearn
+from sklearn.metrics import pairwise as skpw
+
+import skutil
+from skutil.metrics import kernel as skk
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+# the closest sklearn kernel to each skutil kernel (or None)
+SKLEARN_EQUIVALENTS = {
+    'exponential': skpw.rbf_kernel,
+    'gaussian': skpw.rbf_kernel,
+    'inverse_multiquadric': lambda X, Y=None: skpw.euclidean_distances(X, Y, squared=True),
+    'laplace': skpw.laplacian_kernel,
+    'linear': skpw.linear_kernel,
+    'multiquadric': lambda X, Y=None: skpw.euclidean_distances(X, Y, squared=True),
+    'polynomial': skpw.polynomial_kernel,
+    'power': lambda X, Y=None: skpw.euclidean_distances(X, Y, squared=True),
+    'rbf': skpw.rbf_kernel,
+    'spline': None,
+    'tanh': skpw.sigmoid_kernel
+}
+
+# the spline kernel has no BLAS path, so it is only run on the smaller sizes
+SLOW_KERNELS = {'spline': 2000}
+
+
+def _make_data(n_samples, n_features, dtype, sparse, density, random_state):
+    rs = np.random.RandomState(random_state)
+    if sparse:
+        return sp.random(n_samples, n_features, density=density, format='csr',
+                         dtype=dtype, random_state=rs)
+    return rs.rand(n_samples, n_features).astype(dtype)
+
+
+def _time(func, X, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.time()
+        func(X)
+        times.append(time.time() - start)
+    return min(times), float(np.mean(times))
+
+
+def _peak_memory(func, X):
+    if tracemalloc is None:
+        return None
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(X)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(name, impl, func, X, repeat):
+    """Time and memory-profile a single kernel on ``X`` (with Y=None).
+    Errors (i.e., an sklearn kernel that doesn't accept sparse input)
+    are recorded rather than raised.
+    """
+    record = {'kernel': name, 'impl': impl}
+    try:
+        func(X)  # warm up
+        record['time_best'], record['time_mean'] = _time(func, X, repeat)
+        record['peak_bytes'] = _peak_memory(func, X)
+    except Exception as e:
+        record['error'] = '%s: %s' % (type(e).__name__, str(e))
+    return record
+
+
+def run(kernels, n_samples_grid, n_features_grid, dtypes, formats, density=0.01,
+        repeat=3, random_state=42, verbose=True):
+    """Run the benchmark sweep and return a list of result records"""
+    results = []
+    for n_samples in n_samples_grid:
+        for n_features in n_features_grid:
+            for dtype in dtypes:
+                for fmt in formats:
+                    X = _make_data(n_samples, n_features, dtype, fmt == 'sparse', density, random_state)
+
+                    for name in kernels:
+                        if n_samples > SLOW_KERNELS.get(name, np.inf):
+                            continue
+
+                        cases = [('skutil', skk.PAIRWISE_KERNEL_FUNCTIONS[name])]
+                        if SKLEARN_EQUIVALENTS[name] is not None:
+                            cases.append(('sklearn', SKLEARN_EQUIVALENTS[name]))
+
+                        for impl, func in cases:
+                            record = run_case(name, impl, func, X, repeat)
+                            record.update({'n_samples': n_samples, 'n_features': n_features,
+                                           'dtype': np.dtype(dtype).name, 'format': fmt})
+                            results.append(record)
+
+                            if verbose:
+                                print('%-22s %-8s n=%-6i p=%-5i %-8s %-7s %s'
+                                      % (name, impl, n_samples, n_features, record['dtype'], fmt,
+                                         record.get('error', '%.4fs' % record.get('time_best', 0))))
+    return results
+
+
+def _case_key(record):
+    return tuple(record[k] for k in ('kernel', 'impl', 'n_samples', 'n_features', 'dtype', 'format'))
+
+
+def compare(baseline, results, threshold=1.2):
+    """Print the cases whose best time regressed by more than
+    ``threshold`` (as a ratio) relative to a ``baseline`` report,
+    and return the list of (case, ratio) regressions.
+    """
+    old = dict((_case_key(r), r['time_best']) for r in baseline['results'] if 'time_best' in r)
+    regressions = []
+    for record in results:
+        key = _case_key(record)
+        if key in old and 'time_best' in record and old[key] > 0:
+            ratio = record['time_best'] / old[key]
+            if ratio > threshold:
+                regressions.append((key, ratio))
+                print('REGRESSION %s: %.2fx slower' % (' '.join(str(k) for k in key), ratio))
+    return regressions
+
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'sklearn': sklearn.__version__,
+        'skutil': skutil.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--kernels', nargs='+', default=sorted(skk.PAIRWISE_KERNEL_FUNCTIONS.keys()),
+                        choices=sorted(skk.PAIRWISE_KERNEL_FUNCTIONS.keys()))
+    parser.add_argument('--n-samples', nargs='+', type=int, default=[500, 2000, 5000])
+    parser.add_argument('--n-features', nargs='+', type=int, default=[10, 100, 1000])
+    parser.add_argument('--dtypes', nargs='+', default=['float32', 'float64'])
+    parser.add_argument('--formats', nargs='+', default=['dense', 'sparse'], choices=['dense', 'sparse'])
+    parser.add_argument('--density', type=float, default=0.01,
+                        help='the density of the sparse input')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true',
+                        help='run a single small size (for smoke-testing the suite)')
+    parser.add_argument('--output', default=None,
+                        help='the path of the JSON results file (default: print to stdout)')
+    parser.add_argument('--compare', default=None,
+                        help='the path of a previous JSON results file against which to check for regressions')
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.n_samples, args.n_features, args.repeat = [200], [20], 1
+
+    results = run(args.kernels, args.n_samples, args.n_features, [np.dtype(d) for d in args.dtypes],
+                  args.formats, density=args.density, repeat=args.repeat, verbose=args.output is not None)
+
+    report = {'environment': _environment(), 'results': results}
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,9 +2,12 @@
 skutil.decomposition provides sklearn decompositions
 (`PCA`, `TruncatedSVD`) within the skutil API, i.e., 
 allowing such transformers to operate on a select subset
-of columns rather than the entire matrix.
+of columns rather than the entire matrix. It also provides
+low-rank kernel approximations (`SelectiveNystroem`,
+`SelectiveRandomFourierFeatures`) for the skutil kernels.
 """
 
 from .decompose import *
+from .kernel_approximation import *
 
 __all__ = [s for s in dir() if not s.startswith("_")]  # Remove hiddens
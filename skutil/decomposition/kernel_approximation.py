@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, division, absolute_import
+from abc import ABCMeta, abstractmethod
+import numpy as np
+import pandas as pd
+import warnings
+from scipy.linalg import svd
+from sklearn.base import TransformerMixin
+from sklearn.utils import check_random_state
+from sklearn.utils.validation import check_is_fitted
+from sklearn.externals import six
+from skutil.base import *
+from skutil.metrics.kernel import _get_kernel_function
+from ..utils import *
+from ..utils.fixes import _cols_if_none
+
+__all__ = [
+    'SelectiveNystroem',
+    'SelectiveRandomFourierFeatures'
+]
+
+
+def _validate_n_components(n_components):
+    if not is_integer(n_components) or n_components < 1:
+        raise ValueError('n_components must be a positive int, but got %s' % str(n_components))
+    return n_components
+
+
+class _BaseSelectiveKernelApproximation(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMixin)):
+    """Base class for selective kernel approximation transformers. Each
+    of these transformers builds an explicit, low-rank feature map, ``Z``,
+    such that ``Z(X).dot(Z(Y).T)`` approximates the kernel matrix between
+    ``X`` and ``Y``, without ever computing the full ``(n_samples, n_samples)``
+    kernel matrix. Each should adhere to the :class:`skutil.base.SelectiveMixin`
+    standard of accepting a ``cols`` parameter in the ``__init__`` method, and
+    only applying the transformation to the defined columns, if any.
+
+    Parameters
+    ----------
+
+    cols : array_like, shape=(n_features,), optional (default=None)
+        The names of the columns on which to apply the transformation.
+        If no column names are provided, the transformer will be ``fit``
+        on the entire frame. Note that the transformation will also only
+        apply to the specified columns, and any other non-specified
+        columns will still be present after transformation.
+
+    n_components : int, optional (default=100)
+        The number of features in the low-rank feature map.
+
+    random_state : int, RandomState or None, optional (default=None)
+        The seed or ``RandomState`` used for the random sampling.
+
+    as_df : bool, optional (default=True)
+        Whether to return a Pandas ``DataFrame`` in the ``transform``
+        method. If False, will return a Numpy ``ndarray`` instead.
+        Since most skutil transformers depend on explicitly-named
+        ``DataFrame`` features, the ``as_df`` parameter is True by default.
+    """
+
+    def __init__(self, cols=None, n_components=100, random_state=None, as_df=True):
+        super(_BaseSelectiveKernelApproximation, self).__init__(cols=cols, as_df=as_df)
+        self.n_components = n_components
+        self.random_state = random_state
+
+    @abstractmethod
+    def _fit(self, X):
+        """Fit the feature map on the ``cols`` of ``X`` (an ndarray)"""
+
+    @abstractmethod
+    def _feature_map(self, X):
+        """Map the ``cols`` of ``X`` (an ndarray) into the low-rank feature space"""
+
+    def fit(self, X, y=None):
+        """Fit the transformer.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The Pandas frame to fit. The frame will only
+            be fit on the prescribed ``cols`` (see ``__init__``) or
+            all of them if ``cols`` is None. Furthermore, ``X`` will
+            not be altered in the process of the fit.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``fit``.
+
+        Returns
+        -------
+
+        self
+        """
+        # check on state of X and cols
+        X, self.cols = validate_is_pd(X, self.cols)
+        cols = _cols_if_none(X, self.cols)
+
+        # fails thru if names don't exist:
+        self._fit(X[cols].as_matrix())
+        return self
+
+    def transform(self, X):
+        """Transform a test matrix given the already-fit transformer.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The Pandas frame to transform. The operation will
+            be applied to a copy of the input data, and the result
+            will be returned.
+
+
+        Returns
+        -------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The operation is applied to a copy of ``X``,
+            and the result set is returned.
+        """
+        check_is_fitted(self, 'n_components_')
+        # check on state of X and cols
+        X, _ = validate_is_pd(X, self.cols)
+        cols = _cols_if_none(X, self.cols)
+
+        other_nms = [nm for nm in X.columns if nm not in cols]
+        transform = self._feature_map(X[cols].as_matrix())
+        left = pd.DataFrame.from_records(data=transform,
+                                         columns=[
+                                            ('%s%i' % (self._prefix, i + 1))
+                                            for i in range(transform.shape[1])
+                                         ])
+
+        # concat if needed
+        x = pd.concat([left, X[other_nms]], axis=1) if other_nms else left
+
+        return x if self.as_df else x.as_matrix()
+
+
+class SelectiveNystroem(_BaseSelectiveKernelApproximation):
+    """Approximate the feature map of any skutil kernel (or any other
+    kernel callable) using a subset of the training rows as a basis [1].
+    Only applied to a select group of columns. The transformation runs in
+    O(n_samples * n_components) kernel evaluations, rather than the
+    O(n_samples ** 2) evaluations required for the exact kernel matrix.
+
+    Parameters
+    ----------
+
+    cols : array_like, shape=(n_features,), optional (default=None)
+        The names of the columns on which to apply the transformation.
+        If no column names are provided, the transformer will be ``fit``
+        on the entire frame. Note that the transformation will also only
+        apply to the specified columns, and any other non-specified
+        columns will still be present after transformation.
+
+    kernel : str or callable, optional (default='rbf')
+        The kernel to approximate. Either one of the keys in
+        ``skutil.metrics.PAIRWISE_KERNEL_FUNCTIONS`` (i.e., 'gaussian') or a
+        callable with the same signature as the skutil kernels.
+
+    kernel_params : dict, optional (default=None)
+        Keyword args (i.e., ``{'sigma': 0.5}``) for the kernel.
+
+    n_components : int, optional (default=100)
+        The number of training rows to sample for the basis, which
+        is also the number of features in the transformed frame. If
+        greater than the number of training rows, all rows are used.
+
+    random_state : int, RandomState or None, optional (default=None)
+        The seed or ``RandomState`` used to sample the basis.
+
+    as_df : bool, optional (default=True)
+        Whether to return a Pandas ``DataFrame`` in the ``transform``
+        method. If False, will return a Numpy ``ndarray`` instead.
+        Since most skutil transformers depend on explicitly-named
+        ``DataFrame`` features, the ``as_df`` parameter is True by default.
+
+
+    Examples
+    --------
+
+        >>> from skutil.decomposition import SelectiveNystroem
+        >>> from skutil.utils import load_iris_df
+        >>>
+        >>> X = load_iris_df(include_tgt=False)
+        >>> nys = SelectiveNystroem(kernel='rbf', n_components=10, random_state=42)
+        >>> X_transform = nys.fit_transform(X)
+        >>> assert X_transform.shape[1] == 10
+
+
+    Attributes
+    ----------
+
+    components_ : np.ndarray, shape=(n_components, n_features)
+        The training rows sampled for the basis.
+
+    component_indices_ : np.ndarray, shape=(n_components,)
+        The indices of the sampled rows in the training frame.
+
+    normalization_ : np.ndarray, shape=(n_components, n_components)
+        The inverse square root of the kernel matrix of the basis.
+
+    n_components_ : int
+        The number of features in the transformed frame.
+
+
+    References
+    ----------
+
+    .. [1] Williams, C.K.I. and Seeger, M. "Using the Nystroem method
+           to speed up kernel machines", Advances in Neural Information
+           Processing Systems 2001
+    """
+
+    _prefix = 'Nystroem'
+
+    def __init__(self, cols=None, kernel='rbf', kernel_params=None, n_components=100,
+                 random_state=None, as_df=True):
+        super(SelectiveNystroem, self).__init__(cols=cols, n_components=n_components,
+                                                random_state=random_state, as_df=as_df)
+        self.kernel = kernel
+        self.kernel_params = kernel_params
+
+    def _kernel(self, X, Y):
+        kernel = _get_kernel_function(self.kernel)
+        return kernel(X, Y, **(self.kernel_params or {}))
+
+    def _fit(self, X):
+        n_samples = X.shape[0]
+        n_components = _validate_n_components(self.n_components)
+        if n_components > n_samples:
+            warnings.warn('n_components (%i) is greater than n_samples (%i); '
+                          'n_components will be set to n_samples' % (n_components, n_samples), UserWarning)
+            n_components = n_samples
+
+        # sample the basis from the training rows
+        random_state = check_random_state(self.random_state)
+        inds = random_state.permutation(n_samples)[:n_components]
+        basis = X[inds]
+
+        # the feature map is K(X, basis) * K(basis, basis)^(-1/2)
+        U, S, V = svd(self._kernel(basis, basis))
+        S = np.maximum(S, 1e-12)
+
+        self.normalization_ = np.dot(U / np.sqrt(S), V)
+        self.components_ = basis
+        self.component_indices_ = inds
+        self.n_components_ = n_components
+
+    def _feature_map(self, X):
+        return np.dot(self._kernel(X, self.components_), self.normalization_.T)
+
+
+class SelectiveRandomFourierFeatures(_BaseSelectiveKernelApproximation):
+    """Approximate the feature map of a shift-invariant kernel by
+    Monte Carlo sampling of its Fourier transform [1], only applied to a
+    select group of columns. Each of the ``n_components`` features is
+    ``sqrt(2 / n_components) * cos(w^T x + b)``, where the frequencies, ``w``,
+    are drawn from the kernel's spectral density and the offsets, ``b``, are
+    uniform in ``[0, 2pi]``. The transformation runs in
+    O(n_samples * n_components * n_features) time.
+
+    The supported kernels (as documented in ``skutil.metrics``) are:
+
+        * 'exponential': :math:`k(x, y) = exp( -||x-y|| / 2\\sigma^2 )`
+        * 'gaussian': :math:`k(x, y) = exp( -||x-y||^2 / 2\\sigma^2 )`
+        * 'laplace': :math:`k(x, y) = exp( -||x-y|| / \\sigma )`
+        * 'rbf': :math:`k(x, y) = exp(- \\sigma * ||x-y||^2)`
+
+    Note that the features approximate the formulas above, which is not
+    always what the kernel of the same name in ``skutil.metrics`` computes.
+    Only 'rbf' matches ``skutil.metrics.rbf_kernel`` (and therefore
+    ``SelectiveNystroem``); for 'exponential', 'gaussian' and 'laplace', this
+    class and ``SelectiveNystroem`` can approximate different kernels for the
+    same ``kernel`` and ``sigma``.
+
+    Parameters
+    ----------
+
+    cols : array_like, shape=(n_features,), optional (default=None)
+        The names of the columns on which to apply the transformation.
+        If no column names are provided, the transformer will be ``fit``
+        on the entire frame. Note that the transformation will also only
+        apply to the specified columns, and any other non-specified
+        columns will still be present after transformation.
+
+    kernel : str, optional (default='gaussian')
+        The kernel to approximate. One of ('exponential', 'gaussian',
+        'laplace', 'rbf').
+
+    sigma : float, optional (default=1.0)
+        The kernel's tuning parameter.
+
+    n_components : int, optional (default=100)
+        The number of random features in the transformed frame.
+
+    random_state : int, RandomState or None, optional (default=None)
+        The seed or ``RandomState`` used to sample the frequencies.
+
+    as_df : bool, optional (default=True)
+        Whether to return a Pandas ``DataFrame`` in the ``transform``
+        method. If False, will return a Numpy ``ndarray`` instead.
+        Since most skutil transformers depend on explicitly-named
+        ``DataFrame`` features, the ``as_df`` parameter is True by default.
+
+
+    Examples
+    --------
+
+        >>> from skutil.decomposition import SelectiveRandomFourierFeatures
+        >>> from skutil.utils import load_iris_df
+        >>>
+        >>> X = load_iris_df(include_tgt=False)
+        >>> rff = SelectiveRandomFourierFeatures(n_components=10, random_state=42)
+        >>> X_transform = rff.fit_transform(X)
+        >>> assert X_transform.shape[1] == 10
+
+
+    Attributes
+    ----------
+
+    random_weights_ : np.ndarray, shape=(n_features, n_components)
+        The sampled frequencies.
+
+    random_offset_ : np.ndarray, shape=(n_components,)
+        The sampled offsets.
+
+    n_components_ : int
+        The number of features in the transformed frame.
+
+
+    References
+    ----------
+
+    .. [1] Rahimi, A. and Recht, B. "Random features for large-scale
+           kernel machines", Advances in Neural Information Processing
+           Systems 2007
+    """
+
+    _prefix = 'RFF'
+
+    def __init__(self, cols=None, kernel='gaussian', sigma=1.0, n_components=100,
+                 random_state=None, as_df=True):
+        super(SelectiveRandomFourierFeatures, self).__init__(cols=cols, n_components=n_components,
+                                                             random_state=random_state, as_df=as_df)
+        self.kernel = kernel
+        self.sigma = sigma
+
+    def _fit(self, X):
+        n_features = X.shape[1]
+        n_components = _validate_n_components(self.n_components)
+        random_state = check_random_state(self.random_state)
+        sigma = float(self.sigma)
+        size = (n_features, n_components)
+
+        # the gaussian kernels' spectral densities are gaussian, and
+        # the (L2) laplacian kernels' are multivariate cauchy
+        if self.kernel == 'gaussian':
+            weights = random_state.normal(scale=1.0 / sigma, size=size)
+        elif self.kernel == 'rbf':
+            weights = random_state.normal(scale=np.sqrt(2.0 * sigma), size=size)
+        elif self.kernel in ('laplace', 'exponential'):
+            gamma = 1.0 / sigma if self.kernel == 'laplace' else 1.0 / (2.0 * sigma ** 2)
+            weights = random_state.normal(size=size) * (gamma / np.abs(random_state.normal(size=n_components)))
+        else:
+            raise ValueError('kernel must be one of (exponential, gaussian, laplace, rbf), '
+                             'but got %s' % str(self.kernel))
+
+        self.random_weights_ = weights
+        self.random_offset_ = random_state.uniform(0, 2 * np.pi, size=n_components)
+        self.n_components_ = n_components
+
+    def _feature_map(self, X):
+        projection = np.dot(X, self.random_weights_)
+        projection += self.random_offset_
+        np.cos(projection, out=projection)
+        projection *= np.sqrt(2.0 / self.n_components_)
+        return projection
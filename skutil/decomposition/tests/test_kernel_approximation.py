@@ -0,0 +1,76 @@
+import numpy as np
+from numpy.testing import (assert_array_equal, assert_array_almost_equal)
+from skutil.decomposition import *
+from skutil.metrics import rbf_kernel
+from skutil.utils import assert_fails
+from skutil.utils import load_iris_df
+
+# Def data for testing
+X = load_iris_df(False)
+
+
+def test_selective_nystroem():
+    original = X
+    cols = [original.columns[0], original.columns[1]]  # Only perform on first two columns...
+    compare_cols = np.array(
+        original[['petal length (cm)', 'petal width (cm)']].as_matrix())  # should be the same as the trans cols
+
+    transformer = SelectiveNystroem(cols=cols, n_components=10, random_state=42).fit(original)
+    transformed = transformer.transform(original)
+
+    untouched_cols = np.array(transformed[['petal length (cm)', 'petal width (cm)']].as_matrix())
+    assert_array_almost_equal(compare_cols, untouched_cols)
+    assert 'Nystroem1' in transformed.columns
+    assert transformed.shape[1] == 12
+    assert transformer.components_.shape == (10, 2)
+
+    # test the selective mixin
+    assert isinstance(transformer.cols, list)
+
+    # when the basis is the entire frame, the approximation is exact
+    data = original.as_matrix()[:25]
+    for kernel in ('rbf', rbf_kernel):
+        Z = SelectiveNystroem(kernel=kernel, kernel_params={'sigma': 0.5}, n_components=25,
+                              as_df=False).fit_transform(data)
+        assert_array_almost_equal(np.dot(Z, Z.T), rbf_kernel(data, sigma=0.5), 4)
+
+    # n_components is capped at n_samples
+    assert SelectiveNystroem(n_components=500).fit(original).n_components_ == original.shape[0]
+
+    # bad kernel, bad n_components
+    assert_fails(SelectiveNystroem(kernel='bad').fit, ValueError, original)
+    assert_fails(SelectiveNystroem(n_components=0).fit, ValueError, original)
+
+
+def test_selective_random_fourier_features():
+    original = X
+    cols = [original.columns[0]]  # Only perform on first...
+
+    transformer = SelectiveRandomFourierFeatures(cols=cols, n_components=5, random_state=42).fit(original)
+    transformed = transformer.transform(original)
+    assert 'RFF5' in transformed.columns
+    assert transformed.shape[1] == 8
+    assert transformer.random_weights_.shape == (1, 5)
+
+    # the approximation converges to the kernel
+    data = original.as_matrix()[:25]
+    sq = np.square(data[:, np.newaxis, :] - data[np.newaxis, :, :]).sum(axis=2)
+    expected = {
+        'rbf': rbf_kernel(data, sigma=0.5),
+        'gaussian': np.exp(-sq / (2 * 0.5 ** 2)),
+        'laplace': np.exp(-np.sqrt(sq) / 0.5),
+        'exponential': np.exp(-np.sqrt(sq) / (2 * 0.5 ** 2))
+    }
+
+    for kernel, exact in expected.items():
+        Z = SelectiveRandomFourierFeatures(kernel=kernel, sigma=0.5, n_components=20000,
+                                           random_state=42, as_df=False).fit_transform(data)
+        assert np.abs(np.dot(Z, Z.T) - exact).max() < 0.05, kernel
+
+    # same seed, same features
+    a = SelectiveRandomFourierFeatures(random_state=1, as_df=False).fit_transform(original)
+    b = SelectiveRandomFourierFeatures(random_state=1, as_df=False).fit_transform(original)
+    assert_array_equal(a, b)
+
+    # bad kernel
+    assert_fails(SelectiveRandomFourierFeatures(kernel='spline').fit, ValueError, original)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Rank correlations for the feature selectors. Each column is ranked only
+once, Spearman's rho is the Pearson correlation of the cached ranks, and
+Kendall's tau-b is computed in O(n log n) per pair of columns (Knight's
+merge-sort algorithm), rather than the O(n^2) of the pairwise definition.
+"""
+
+from __future__ import print_function, division, absolute_import
+import numpy as np
+import pandas as pd
+from sklearn.externals.joblib import Parallel, delayed
+from sklearn.utils import gen_even_slices
+from ..utils.util import _get_n_jobs
+
+__all__ = [
+    'rank_correlation'
+]
+
+
+def _dense_ranks(x):
+    """Rank each column of ``x`` with consecutive integers
+    starting at 0, where ties share the same rank.
+    """
+    ranks = np.empty(x.shape, dtype=np.int64)
+    for j in range(x.shape[1]):
+        ranks[:, j] = np.unique(x[:, j], return_inverse=True)[1]
+    return ranks
+
+
+def _tied_pairs(changes):
+    """Count the pairs of tied elements in a sorted
+    array, given a mask of where its value changes.
+    """
+    counts = np.diff(np.flatnonzero(np.concatenate(([True], changes, [True]))))
+    return (counts * (counts - 1) // 2).sum()
+
+
+def _count_inversions(y):
+    """Count the pairs ``i < j`` for which ``y[i] > y[j]`` with a bottom-up
+    merge sort: at each level, the elements of each right-hand run are located
+    in the (sorted) left-hand run in one ``searchsorted``, and the two runs are
+    merged with a stable sort (which merges sorted runs in linear time).
+
+    Parameters
+    ----------
+
+    y : np.ndarray, shape=(n_samples,)
+        The dense integer ranks (in ``[0, n_samples)``) to count
+        the inversions of.
+
+
+    Returns
+    -------
+
+    inversions : int
+        The number of inversions in ``y``
+    """
+    n = y.shape[0]
+    pad = n  # larger than any rank, so padding sorts last and is never inverted
+    inversions, width = 0, 1
+
+    while width < n:
+        n_blocks = -(-n // (2 * width))
+        buf = np.empty(n_blocks * 2 * width, dtype=np.int64)
+        buf[:n], buf[n:] = y, pad
+        buf = buf.reshape(n_blocks, 2 * width)
+
+        # offset each block so the left-hand runs are sorted end to end
+        blocks = np.arange(n_blocks, dtype=np.int64)
+        offsets = blocks[:, np.newaxis] * (pad + 1)
+        left = (buf[:, :width] + offsets).ravel()
+        right = (buf[:, width:] + offsets).ravel()
+
+        # the number of elements of the left-hand run greater than each right-hand element
+        n_leq = np.searchsorted(left, right, side='right') - np.repeat(blocks * width, width)
+        inversions += (width - n_leq).sum()
+
+        y = np.sort(buf, axis=1, kind='mergesort').ravel()[:n]
+        width *= 2
+
+    return int(inversions)
+
+
+def _kendall_tau(rx, ry):
+    """Compute Kendall's tau-b between two columns of dense
+    ranks in O(n log n), with Knight's algorithm.
+    """
+    n = rx.shape[0]
+    order = np.lexsort((ry, rx))
+    sx, sy = rx[order], ry[order]
+
+    x_changes = sx[1:] != sx[:-1]
+    n_pairs = n * (n - 1) // 2
+    x_ties = _tied_pairs(x_changes)
+    joint_ties = _tied_pairs(x_changes | (sy[1:] != sy[:-1]))
+    y_ties = _tied_pairs(np.diff(np.sort(ry)) != 0)
+
+    # sorted by x (and by y within ties in x), every inversion in y is a discordant pair
+    discordant = _count_inversions(sy)
+
+    numerator = n_pairs - x_ties - y_ties + joint_ties - 2 * discordant
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return numerator / np.sqrt(float(n_pairs - x_ties) * float(n_pairs - y_ties))
+
+
+def _fill_kendall(res, ranks, pairs):
+    # each thread writes to its own pairs (and their mirror)
+    for i, j in pairs:
+        res[i, j] = res[j, i] = _kendall_tau(ranks[:, i], ranks[:, j])
+
+
+def rank_correlation(X, method='spearman', n_jobs=1):
+    """Compute the rank correlation matrix of the columns of ``X``.
+    Each column is ranked once: Spearman's rho is then the Pearson
+    correlation of the ranks (a single matrix product), and Kendall's
+    tau-b is computed for each pair of columns in O(n log n), with the
+    pairs shared among ``n_jobs`` threads.
+
+    Parameters
+    ----------
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        The frame whose (finite) columns to correlate.
+
+    method : str, optional (default='spearman')
+        The rank correlation, one of ['kendall','spearman'].
+
+    n_jobs : int, optional (default=1)
+        The number of threads used to compute the Kendall correlations.
+        If -1 all CPUs are used. For n_jobs below -1, (n_cpus + 1 + n_jobs)
+        are used. Thus for n_jobs = -2, all CPUs but one are used.
+
+
+    Returns
+    -------
+
+    c : Pandas ``DataFrame``, shape=(n_features, n_features)
+        The correlation matrix, with NaNs for constant columns
+        (as in ``DataFrame.corr``).
+    """
+    cols = X.columns
+    x = X.as_matrix()
+    n_features = x.shape[1]
+
+    if method == 'spearman':
+        # pandas ranks ties with their average rank
+        ranks = X.rank().as_matrix().astype(np.double)
+        ranks -= ranks.mean(axis=0)
+        cov = ranks.T.dot(ranks)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.sqrt(np.diag(cov))
+            res = cov / np.outer(scale, scale)
+        res[scale == 0, :] = np.nan
+        res[:, scale == 0] = np.nan
+
+    elif method == 'kendall':
+        ranks = _dense_ranks(x)
+        res = np.eye(n_features)
+        pairs = [(i, j) for i in range(n_features) for j in range(i + 1, n_features)]
+
+        n_jobs = min(_get_n_jobs(n_jobs), max(len(pairs), 1))
+        if n_jobs == 1:
+            _fill_kendall(res, ranks, pairs)
+        else:
+            Parallel(n_jobs=n_jobs, backend='threading')(
+                delayed(_fill_kendall)(res, ranks, pairs[batch])
+                for batch in gen_even_slices(len(pairs), n_jobs))
+
+        # constant columns are not correlated, even with themselves
+        constant = ranks.max(axis=0) == 0 if x.shape[0] else np.ones(n_features, dtype=bool)
+        res[constant, :] = np.nan
+        res[:, constant] = np.nan
+
+    else:
+        raise ValueError('method must be one of (kendall, spearman), but got %s' % method)
+
+    return pd.DataFrame(res, index=cols, columns=cols)
@@ -2,17 +2,58 @@
 
 from __future__ import print_function, division, absolute_import
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from sklearn.utils import check_random_state
+from sklearn.utils.random import sample_without_replacement
 from sklearn.utils.validation import check_is_fitted
 from sklearn.externals import six
 from sklearn.base import TransformerMixin
 from skutil.base import BaseSkutil
-from ..utils import validate_is_pd
+from ..utils import validate_is_pd, is_integer, is_numeric
 import warnings
 
 __all__ = [
     '_BaseFeatureSelector'
 ]
 
+# the two-sided 95% normal quantile, for the margins of sampled statistics
+_SAMPLE_Z = 1.959963984540054
+
+
+def _retain_columns(X, cols):
+    """Build a frame of the ``cols`` of ``X`` without copying ``X``.
+    Rather than taking the columns out of ``X``'s (consolidated) blocks,
+    which copies every retained column (and, in ``drop``, first the whole
+    frame), the new frame is built from the retained columns' arrays with
+    ``copy=False``. Pandas consolidates those arrays into one block per
+    dtype, which copies the retained columns once, but never the dropped
+    ones. If every column is retained, ``X`` itself is returned.
+
+    Parameters
+    ----------
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        The frame from which to retain columns.
+
+    cols : array_like, shape=(n_retained,)
+        The names of the columns to retain.
+
+
+    Returns
+    -------
+
+    retained : Pandas ``DataFrame``, shape=(n_samples, n_retained)
+        The retained columns (``X`` itself, if every column is retained).
+    """
+    cols = list(cols)
+    if cols == X.columns.tolist():
+        return X
+
+    return pd.DataFrame(OrderedDict((c, X[c].values) for c in cols),
+                        index=X.index, columns=cols, copy=False)
+
 
 class _BaseFeatureSelector(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMixin)):
     """The base class for all skutil feature selectors, the _BaseFeatureSelector
@@ -24,8 +65,9 @@ class _BaseFeatureSelector(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMi
 
         * The ``fit`` method should not change the state of the training frame.
 
-        * The transform method should return a copy of the test frame,
-          dropping the columns identified as "bad" in the ``fit`` method.
+        * The transform method should return a copy of the test frame
+          (unless ``copy`` is False), dropping the columns identified as
+          "bad" in the ``fit`` method.
 
     Parameters
     ----------
@@ -43,6 +85,15 @@ class _BaseFeatureSelector(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMi
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    copy : bool, optional (default=True)
+        Whether ``transform`` should copy ``X``. If False, the input frame
+        is not copied, and the returned frame is built from the arrays of
+        the retained columns with ``copy=False``, so the memory of ``transform``
+        is proportional to the retained columns at most. Note that pandas (as
+        of 0.19) consolidates the arrays into one block per dtype, which still
+        copies the retained columns (but never the whole frame). If every
+        column is retained, ``X`` itself is returned.
+
 
     Attributes
     ----------
@@ -54,8 +105,9 @@ class _BaseFeatureSelector(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMi
     """
 
     @abstractmethod
-    def __init__(self, cols=None, as_df=True):
+    def __init__(self, cols=None, as_df=True, copy=True):
         super(_BaseFeatureSelector, self).__init__(cols=cols, as_df=as_df)
+        self.copy = copy
 
     def transform(self, X):
         """Transform a test matrix given the already-fit transformer.
@@ -78,10 +130,19 @@ class _BaseFeatureSelector(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMi
         check_is_fitted(self, 'drop_')
 
         # check on state of X and cols
-        X, _ = validate_is_pd(X, self.cols)
+        copy = getattr(self, 'copy', True)
+        X, _ = validate_is_pd(X, self.cols, copy=copy)
 
         if not self.drop_:  # empty or None
             return X if self.as_df else X.as_matrix()
+        elif not copy:
+            drops = set(self.drop_)
+            if not drops.issubset(X.columns):
+                warnings.warn('one or more features to drop not contained '
+                              'in input data feature names', UserWarning)
+
+            dropped = _retain_columns(X, [c for c in X.columns if c not in drops])
+            return dropped if self.as_df else dropped.as_matrix()
         else:
             # what if we don't want to throw this key error for a non-existent
             # column that we hope to drop anyways? We need to at least inform the
@@ -93,3 +154,62 @@ class _BaseFeatureSelector(six.with_metaclass(ABCMeta, BaseSkutil, TransformerMi
 
             dropped = X.drop(drops, axis=1)
             return dropped if self.as_df else dropped.as_matrix()
+
+    def _sample_rows(self, X):
+        """Draw the reproducible, uniform row sample (without replacement)
+        prescribed by the ``sample_size`` or ``sample_frac`` of a selector,
+        seeded by its ``random_state``. If neither is set, or the sample
+        would cover every row, ``X`` itself is returned.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The frame to sample.
+
+
+        Returns
+        -------
+
+        sample : Pandas ``DataFrame``, shape=(n_sampled, n_features)
+            The sampled rows of ``X``, in their original order.
+
+        fpc : float
+            The finite population correction of the sample, by
+            which the margins of its statistics are scaled (0 if
+            the sample is all of ``X``).
+        """
+        sample_size = getattr(self, 'sample_size', None)
+        sample_frac = getattr(self, 'sample_frac', None)
+        n_samples = X.shape[0]
+
+        if sample_size is not None and sample_frac is not None:
+            raise ValueError('only one of sample_size and sample_frac may be set')
+        if sample_size is not None:
+            if not (is_integer(sample_size) and sample_size > 1):
+                raise ValueError('sample_size must be an int greater than 1, but got %s' % str(sample_size))
+            n_sampled = sample_size
+        elif sample_frac is not None:
+            if not (is_numeric(sample_frac) and 0. < sample_frac <= 1.):
+                raise ValueError('sample_frac must be a float in (0, 1], but got %s' % str(sample_frac))
+            n_sampled = max(int(round(sample_frac * n_samples)), 2)
+        else:
+            return X, 0.
+
+        if n_sampled >= n_samples:
+            return X, 0.
+
+        rows = sample_without_replacement(n_samples, n_sampled, random_state=check_random_state(self.random_state))
+        fpc = np.sqrt((n_samples - n_sampled) / (n_samples - 1.))
+        return X.iloc[np.sort(rows)], fpc
+
+    @staticmethod
+    def _borderline(names, statistics, margins, threshold):
+        """Map the ``names`` whose (sampled) ``statistics`` are within their
+        ``margins`` of the ``threshold`` to their statistic and margin.
+        """
+        statistics, margins = np.asarray(statistics, dtype=np.double), np.asarray(margins, dtype=np.double)
+        with np.errstate(invalid='ignore'):
+            mask = np.abs(statistics - threshold) <= margins
+        return dict((nm, (stat, margin)) for nm, stat, margin, near
+                    in zip(names, statistics, margins, mask) if near)
@@ -1,7 +1,9 @@
 from __future__ import division, print_function
 import numpy as np
+from scipy.linalg import qr, solve_triangular
 from sklearn.externals import six
-from skutil.odr import QRDecomposition
+from skutil.odr import QRDecomposition, tsqr_decomposition
+from skutil.odr.dqrutl import _MAX_LINPACK_ELEMENTS
 from .base import _BaseFeatureSelector
 from .select import _validate_cols
 from ..utils import flatten_all, validate_is_pd
@@ -38,6 +40,22 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    copy : bool, optional (default=True)
+        Whether ``transform`` should copy ``X``. If False, only the
+        retained columns are copied, and if none are dropped, ``X``
+        itself is returned.
+
+    n_jobs : int, optional (default=1)
+        The number of threads to use in the ``fit``. If not 1, the matrix
+        is factored with a tall-skinny QR (see ``skutil.odr.tsqr_decomposition``),
+        in which blocks of rows are factored in parallel. If -1 all CPUs are used.
+        For n_jobs below -1, (n_cpus + 1 + n_jobs) are used.
+
+    block_size : int, optional (default=None)
+        The number of rows in each block of the tall-skinny QR. If set
+        (or if ``n_jobs`` is not 1), the tall-skinny QR is used. Note that it
+        is always used if the matrix has more than 2^31 - 1 elements.
+
 
     Examples
     --------
@@ -49,6 +67,15 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
         >>> X_transform = filterer.fit_transform(X)
         >>> assert X_transform.shape[1] == 4 # no combos in iris...
 
+    For frames that are too tall to fit in memory, the filterer can be
+    fit incrementally over chunks of rows with ``partial_fit``, which
+    only requires O(n_features ** 2) memory:
+
+        >>> import pandas as pd
+        >>> filterer = LinearCombinationFilterer()
+        >>> for chunk in pd.read_csv('data.csv', chunksize=100000):  # doctest: +SKIP
+        ...     filterer.partial_fit(chunk)
+
 
     Attributes
     ----------
@@ -57,10 +84,20 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
         Assigned after calling ``fit``. These are the features that
         are designated as "bad" and will be dropped in the ``transform``
         method.
+
+    r_factor_ : np.ndarray, shape=(n_features, n_features)
+        Assigned after calling ``partial_fit``. The R factor of the QR
+        decomposition of all of the rows seen so far, which is updated
+        with each chunk.
+
+    n_samples_seen_ : int
+        Assigned after calling ``partial_fit``. The number of rows seen so far.
     """
 
-    def __init__(self, cols=None, as_df=True):
-        super(LinearCombinationFilterer, self).__init__(cols=cols, as_df=as_df)
+    def __init__(self, cols=None, as_df=True, n_jobs=1, block_size=None, copy=True):
+        super(LinearCombinationFilterer, self).__init__(cols=cols, as_df=as_df, copy=copy)
+        self.n_jobs = n_jobs
+        self.block_size = block_size
 
     def fit(self, X, y=None):
         """Fit the transformer.
@@ -113,42 +150,109 @@ class LinearCombinationFilterer(_BaseFeatureSelector):
         X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True)  # must all be finite for fortran
         _validate_cols(self.cols)
 
-        # init drops list
-        drops = []
+        # a full fit discards any incremental state
+        for attr in ('r_factor_', 'n_samples_seen_'):
+            if hasattr(self, attr):
+                delattr(self, attr)
 
         # Generate sub matrix for qr decomposition
         cols = _cols_if_none(X, self.cols)  # get a copy of the cols
         x = X[cols].as_matrix()
-        cols = np.array(cols)  # so we can do boolean indexing
 
-        # do subroutines
-        lc_list = _enum_lc(QRDecomposition(x))
+        # Assign attributes, return
+        self.drop_ = _find_drops(x, cols, self.n_jobs, self.block_size)
+        dropped = X.drop(self.drop_, axis=1)
 
-        if lc_list is not None:
-            while lc_list is not None:
-                # we want the first index in each of the keys in the dict
-                bad = np.array([p for p in set([v[0] for _, v in six.iteritems(lc_list)])])
+        return dropped if self.as_df else dropped.as_matrix()
 
-                # get the corresponding bad names
-                bad_nms = cols[bad]
-                drops.extend(bad_nms)
+    def partial_fit(self, X, y=None):
+        """Incrementally fit the transformer on a chunk of rows. Rather
+        than factoring the full matrix, the R factor of its QR decomposition
+        is updated with each chunk (by factoring the R factor stacked on top
+        of the new rows). Since ``X = QR``, R has the same linear dependencies
+        (and column norms) as ``X``, and the combos are found from R alone.
+        Memory is therefore O(n_features ** 2), regardless of the number of rows.
+        Until ``n_features`` rows have been seen, R has fewer rows than columns,
+        and ``drop_`` holds the linear combos of the rows seen so far (at most
+        ``n_samples_seen_`` columns are retained).
 
-                # update our X, and then our cols
-                x = np.delete(x, bad, axis=1)
-                cols = np.delete(cols, bad)
+        Parameters
+        ----------
 
-                # keep removing linear dependencies until it resolves
-                lc_list = _enum_lc(QRDecomposition(x))
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The chunk of rows to fit. The frame will only
+            be fit on the prescribed ``cols`` (see ``__init__``) or
+            all of them if ``cols`` is None. Each chunk must have the
+            same columns. Furthermore, ``X`` will not be altered in
+            the process of the fit.
 
-                # will break when lc_list returns None
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``partial_fit``.
 
-        # Assign attributes, return
-        self.drop_ = [p for p in set(drops)]  # a list from the a set of the drops
-        dropped = X.drop(self.drop_, axis=1)
+        Returns
+        -------
 
-        return dropped if self.as_df else dropped.as_matrix()
+        self
+        """
+        # check on state of X and cols
+        X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True)  # must all be finite for fortran
+        _validate_cols(self.cols)
+
+        cols = _cols_if_none(X, self.cols)
+        x = X[cols].as_matrix()
+
+        if hasattr(self, 'r_factor_'):
+            if x.shape[1] != self.r_factor_.shape[1]:
+                raise ValueError('expected %i features, but got %i' % (self.r_factor_.shape[1], x.shape[1]))
+            x = np.vstack((self.r_factor_, x))
+            n_samples_seen = self.n_samples_seen_
+        else:
+            n_samples_seen = 0
+
+        # only the first min(n_samples, n_features) rows of R are non-zero
+        self.r_factor_ = qr(x, mode='r', overwrite_a=True)[0][:min(x.shape)].copy()
+        self.n_samples_seen_ = n_samples_seen + X.shape[0]
+
+        # R is at most (n_features, n_features), so this is cheap
+        self.drop_ = _find_drops(self.r_factor_, cols)
+        return self
         
 
+def _find_drops(x, cols, n_jobs=1, block_size=None):
+    """Find the names of the linearly dependent columns of ``x``.
+
+    Parameters
+    ----------
+
+    x : np.ndarray, shape=(n_samples, n_features)
+        The matrix (or the R factor of its QR decomposition)
+
+    cols : array_like, shape=(n_features,)
+        The names of the columns of ``x``
+
+    n_jobs : int, optional (default=1)
+        The number of threads for the tall-skinny QR
+
+    block_size : int, optional (default=None)
+        The number of rows in each block of the tall-skinny QR
+    """
+    if n_jobs != 1 or block_size is not None or x.size > _MAX_LINPACK_ELEMENTS:
+        decomp = tsqr_decomposition(x, block_size=block_size, n_jobs=n_jobs)
+    else:
+        decomp = QRDecomposition(x)
+
+    # the pivoted decomposition moves every dependent column to the end,
+    # so all of the linear combos are found from a single factorization
+    lc_list = _enum_lc(decomp)
+    if lc_list is None:
+        return []
+
+    # the first index in each combo is the dependent column
+    cols = np.array(cols)  # so we can do boolean indexing
+    return [p for p in set(cols[[v[0] for _, v in six.iteritems(lc_list)]])]
+
+
 def _enum_lc(decomp):
     """Perform a single iteration of linear combo scoping.
 
@@ -169,10 +273,11 @@ def _enum_lc(decomp):
     if not (rank == n_features):
         pivot = decomp.pivot         # the pivot vector
         X = R[:rank, :rank]          # extract the independent cols
-        Y = R[:rank, rank:]  # +1?   # extract the dependent columns
+        Y = R[:rank, rank:]          # extract the dependent columns
 
-        new_qr = QRDecomposition(X)  # factor the independent columns
-        b = new_qr.get_coef(Y)       # get regression coefficients of dependent cols
+        # X is upper triangular, so the regression coefficients of
+        # the dependent cols are found by back substitution
+        b = solve_triangular(X, Y)
 
         # if b is None, then there were no dependent columns
         if b is not None:
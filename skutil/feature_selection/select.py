@@ -4,10 +4,14 @@ from __future__ import print_function, division, absolute_import
 from collections import namedtuple
 import numpy as np
 import pandas as pd
+from sklearn.externals.joblib import Parallel, delayed
+from sklearn.utils import check_random_state, gen_even_slices
 from sklearn.utils.validation import check_is_fitted
-from .base import _BaseFeatureSelector
+from .base import _BaseFeatureSelector, _retain_columns, _SAMPLE_Z
+from ._rank import rank_correlation
 from ..utils import validate_is_pd, is_numeric
 from ..utils.fixes import _cols_if_none
+from ..utils.util import _get_n_jobs, _resolve_profile
 
 __all__ = [
     'FeatureDropper',
@@ -37,6 +41,11 @@ def _validate_cols(cols):
         raise ValueError('too few features')
 
 
+def _sparsity(X):
+    """The proportion of NaNs in each column of ``X``"""
+    return X.apply(lambda x: x.isnull().sum() / x.shape[0]).values  # numpy array
+
+
 class SparseFeatureDropper(_BaseFeatureSelector):
     """Retains features that are less sparse (NaN) than
     the provided threshold. Useful in situations where matrices
@@ -62,6 +71,35 @@ class SparseFeatureDropper(_BaseFeatureSelector):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    copy : bool, optional (default=True)
+        Whether ``transform`` should copy ``X``. If False, only the
+        retained columns are copied, and if none are dropped, ``X``
+        itself is returned.
+
+    profile : None, 'auto' or ``ColumnProfile``, optional (default=None)
+        If provided, the null counts are read from the ``ColumnProfile``
+        of ``X`` rather than computed in ``fit``, so several transformers
+        fit on the same frame only scan it once. If 'auto', the profile
+        is looked up (or computed) with ``skutil.utils.profile_frame``.
+        Since the profile already describes every row, no sample is drawn.
+
+    sample_size : int, optional (default=None)
+        If provided, the selector is fit on a uniform random sample of
+        this many rows (without replacement) rather than on all of ``X``.
+        Only one of ``sample_size`` and ``sample_frac`` may be set.
+
+    sample_frac : float, optional (default=None)
+        If provided, the selector is fit on a uniform random sample
+        of this fraction of the rows of ``X``.
+
+    random_state : int or RandomState, optional (default=None)
+        The seed or random state used to draw the row sample.
+
+    recheck : bool, optional (default=False)
+        Whether to recompute the sparsities of the features whose sampled
+        values are within their (95%) margin of the ``threshold`` on all
+        of ``X``, before the drops are decided.
+
 
     Examples
     --------
@@ -93,11 +131,23 @@ class SparseFeatureDropper(_BaseFeatureSelector):
         Assigned after calling ``fit``. These are the features that
         are designated as "bad" and will be dropped in the ``transform``
         method.
+
+    sample_margins_ : dict
+        Assigned after calling ``fit``. If fit on a sample, maps each feature
+        whose sampled sparsity is within its 95% confidence margin of the
+        ``threshold`` to a tuple of the sampled sparsity and the margin.
+        Empty if fit on all of the rows.
     """
 
-    def __init__(self, cols=None, threshold=0.5, as_df=True):
-        super(SparseFeatureDropper, self).__init__(cols=cols, as_df=as_df)
+    def __init__(self, cols=None, threshold=0.5, as_df=True, profile=None,
+                 sample_size=None, sample_frac=None, random_state=None, recheck=False, copy=True):
+        super(SparseFeatureDropper, self).__init__(cols=cols, as_df=as_df, copy=copy)
         self.threshold = threshold
+        self.profile = profile
+        self.sample_size = sample_size
+        self.sample_frac = sample_frac
+        self.random_state = random_state
+        self.recheck = recheck
 
     def fit(self, X, y=None):
         """Fit the transformer.
@@ -120,7 +170,7 @@ class SparseFeatureDropper(_BaseFeatureSelector):
 
         self
         """
-        X, self.cols = validate_is_pd(X, self.cols)
+        X, self.cols = validate_is_pd(X, self.cols, copy=False)  # fit does not alter X
         thresh = self.threshold
 
         # validate the threshold
@@ -132,9 +182,26 @@ class SparseFeatureDropper(_BaseFeatureSelector):
         cols = _cols_if_none(X, self.cols)
 
         # assess sparsity
-        self.sparsity_ = X[cols].apply(lambda x: x.isnull().sum() / x.shape[0]).values  # numpy array
+        profile = _resolve_profile(self.profile, X, cols)
+        self.sample_margins_ = {}
+        if profile is not None:
+            self.sparsity_ = profile.sparsity[cols].values
+        else:
+            sample, fpc = self._sample_rows(X)
+            self.sparsity_ = _sparsity(sample[cols])
+
+            if sample is not X:
+                # the margin of a proportion
+                n = sample.shape[0]
+                margins = _SAMPLE_Z * fpc * np.sqrt(self.sparsity_ * (1. - self.sparsity_) / n)
+                self.sample_margins_ = self._borderline(cols, self.sparsity_, margins, thresh)
+
+                if self.recheck and self.sample_margins_:
+                    idcs = [i for i, c in enumerate(cols) if c in self.sample_margins_]
+                    self.sparsity_[idcs] = _sparsity(X[[cols[i] for i in idcs]])
+
         mask = self.sparsity_ > thresh  # numpy boolean array
-        self.drop_ = X.columns[mask].tolist()
+        self.drop_ = np.asarray(cols)[mask].tolist()
         return self
 
 
@@ -159,6 +226,11 @@ class FeatureDropper(_BaseFeatureSelector):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    copy : bool, optional (default=True)
+        Whether ``transform`` should copy ``X``. If False, only the
+        retained columns are copied, and if none are dropped, ``X``
+        itself is returned.
+
 
     Examples
     --------
@@ -181,8 +253,8 @@ class FeatureDropper(_BaseFeatureSelector):
         method.
     """
 
-    def __init__(self, cols=None, as_df=True):
-        super(FeatureDropper, self).__init__(cols=cols, as_df=as_df)
+    def __init__(self, cols=None, as_df=True, copy=True):
+        super(FeatureDropper, self).__init__(cols=cols, as_df=as_df, copy=copy)
 
     def fit(self, X, y=None):
         # check on state of X and cols
@@ -211,6 +283,11 @@ class FeatureRetainer(_BaseFeatureSelector):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    copy : bool, optional (default=True)
+        Whether ``transform`` should copy ``X``. If False, only the
+        retained columns are copied, and if none are dropped, ``X``
+        itself is returned.
+
 
     Examples
     --------
@@ -233,8 +310,8 @@ class FeatureRetainer(_BaseFeatureSelector):
         method.
     """
 
-    def __init__(self, cols=None, as_df=True):
-        super(FeatureRetainer, self).__init__(cols=cols, as_df=as_df)
+    def __init__(self, cols=None, as_df=True, copy=True):
+        super(FeatureRetainer, self).__init__(cols=cols, as_df=as_df, copy=copy)
 
     def fit(self, X, y=None):
         """Fit the transformer.
@@ -286,10 +363,14 @@ class FeatureRetainer(_BaseFeatureSelector):
         """
         check_is_fitted(self, 'drop_')
         # check on state of X and cols
-        X, _ = validate_is_pd(X, self.cols)  # copy X
+        copy = getattr(self, 'copy', True)
+        X, _ = validate_is_pd(X, self.cols, copy=copy)  # copy X, unless not copy
         cols = X.columns if self.cols is None else self.cols
 
-        retained = X[cols]  # if not cols, returns all
+        if copy:
+            retained = X[cols]  # if not cols, returns all
+        else:
+            retained = _retain_columns(X, cols)
         return retained if self.as_df else retained.as_matrix()
 
 
@@ -356,65 +437,69 @@ def filter_collinearity(c, threshold):
     macor = []  # mean abs corrs
     corrz = []  # the correlations
 
-    # Iterate over each feature
-    finished = False
-    while not finished:
-
-        # Whenever there's a break, this loop will start over
-        for i, nm in enumerate(c.columns):
-            this_col = c[nm].drop(nm).sort_values(
-                na_position='first')  # gets the column, drops the index of itself, and sorts
-            this_col_nms = this_col.index.tolist()
-            this_col = np.array(this_col)
-
-            # check if last value is over thresh
-            max_cor = this_col[-1]
-            if pd.isnull(max_cor) or max_cor < threshold or this_col.shape[0] == 1:
-                if i == c.columns.shape[0] - 1:
-                    finished = True
-
-                # control passes to next column name or end if finished
-                continue
-
-            # otherwise, we know the corr is over the threshold
-            # gets the current col, and drops the same row, sorts asc and gets other col
-            other_col_nm = this_col_nms[-1]
-            that_col = c[other_col_nm].drop(other_col_nm)
-
-            # get the mean absolute correlations of each
-            mn_1, mn_2 = np.nanmean(this_col), np.nanmean(that_col)
-
-            # we might get nans?
-            # if pd.isnull(mn_1) and pd.isnull(mn_2):
-            # this condition is literally impossible, as it would
-            # require every corr to be NaN, and it wouldn't have
-            # even gotten here without hitting the continue block.
-            if pd.isnull(mn_1):
-                drop_nm = other_col_nm
-            elif pd.isnull(mn_2):
-                drop_nm = nm
-            else:
-                drop_nm = nm if mn_1 > mn_2 else other_col_nm
-
-            # drop the bad col, row
-            c.drop(drop_nm, axis=1, inplace=True)
-            c.drop(drop_nm, axis=0, inplace=True)
-
-            # add the bad col to drops
-            drops.append(drop_nm)
-            macor.append(np.maximum(mn_1, mn_2))
-            corrz.append(_MCFTuple(
-                feature_x=drop_nm,
-                feature_y=nm if not nm == drop_nm else other_col_nm,
-                abs_corr=max_cor,
-                mac=macor[-1]
-            ))
-
-            # if we get here, we have to break so the loop will 
-            # start over from the first (non-popped) column
-            break
-
-            # if not finished, restarts loop, otherwise will exit loop
+    # work on the transpose, so each row is a column of the correlation matrix
+    names = c.columns.tolist()
+    corr = np.array(c, dtype=np.double).T
+    n_features = corr.shape[0]
+    active = np.ones(n_features, dtype=bool)
+
+    # the candidates for the max of each column: NaNs and the feature itself can never be the max
+    candidates = np.where(np.isnan(corr), -np.inf, corr)
+    np.fill_diagonal(candidates, -np.inf)
+
+    # Features are checked in order, and the first one whose max correlation
+    # is over the threshold causes a drop, after which the (original) scan restarted
+    # from the first feature. Since dropping a feature can only reduce the max
+    # correlations of the others, every feature before the current one is still
+    # under the threshold, so the scan resumes at the current feature instead,
+    # and the whole filtration is O(n_features ** 2).
+    i, n_active = 0, n_features
+    while i < n_features and n_active > 2:  # with two features, neither is ever dropped
+        if not active[i]:
+            i += 1
+            continue
+
+        # on ties, the latest feature is the max (as in a stable sort)
+        this_col = candidates[i]
+        j = n_features - 1 - np.argmax(this_col[::-1])
+        max_cor = this_col[j]
+        if max_cor == -np.inf or max_cor < threshold:
+            i += 1
+            continue
+
+        # otherwise, we know the corr is over the threshold
+        nm, other_col_nm = names[i], names[j]
+
+        # get the mean absolute correlations of each (excluding itself)
+        active[i] = False
+        mn_1 = np.nanmean(corr[i, active])
+        active[i], active[j] = True, False
+        mn_2 = np.nanmean(corr[j, active])
+        active[j] = True
+
+        # we might get nans?
+        if pd.isnull(mn_1):
+            drop_idx = j
+        elif pd.isnull(mn_2):
+            drop_idx = i
+        else:
+            drop_idx = i if mn_1 > mn_2 else j
+
+        # drop the bad col, row
+        drop_nm = names[drop_idx]
+        active[drop_idx] = False
+        candidates[:, drop_idx] = -np.inf
+        n_active -= 1
+
+        # add the bad col to drops
+        drops.append(drop_nm)
+        macor.append(np.maximum(mn_1, mn_2))
+        corrz.append(_MCFTuple(
+            feature_x=drop_nm,
+            feature_y=nm if not nm == drop_nm else other_col_nm,
+            abs_corr=corr[i, j],
+            mac=macor[-1]
+        ))
 
     # return
     out_tup = (drops, macor, corrz)
@@ -449,6 +534,41 @@ class MulticollinearityFilterer(_BaseFeatureSelector):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    copy : bool, optional (default=True)
+        Whether ``transform`` should copy ``X``. If False, only the
+        retained columns are copied, and if none are dropped, ``X``
+        itself is returned.
+
+    reservoir_size : int, optional (default=10000)
+        Only used in ``partial_fit`` for the rank methods ('kendall' and
+        'spearman'), which cannot be accumulated. The correlations are
+        computed from a uniform random sample of (at most) this many of
+        the rows seen so far.
+
+    random_state : int or RandomState, optional (default=None)
+        The seed or random state used to draw the ``reservoir_size``
+        sample in ``partial_fit``, or the row sample in ``fit``.
+
+    n_jobs : int, optional (default=1)
+        The number of threads used to compute the 'kendall' correlations,
+        which are computed for each pair of features. If -1 all CPUs are used.
+        For n_jobs below -1, (n_cpus + 1 + n_jobs) are used. Thus for
+        n_jobs = -2, all CPUs but one are used.
+
+    sample_size : int, optional (default=None)
+        If provided, ``fit`` computes the correlations on a uniform random
+        sample of this many rows (without replacement) rather than on all
+        of ``X``. Only one of ``sample_size`` and ``sample_frac`` may be set.
+
+    sample_frac : float, optional (default=None)
+        If provided, ``fit`` computes the correlations on a uniform random
+        sample of this fraction of the rows of ``X``.
+
+    recheck : bool, optional (default=False)
+        Whether to recompute the correlations of the pairs of features whose
+        sampled correlations are within their (95%) margin of the ``threshold``
+        on all of ``X``, before filtering.
+
 
     Examples
     --------
@@ -483,12 +603,42 @@ class MulticollinearityFilterer(_BaseFeatureSelector):
 
     correlations_ : list of ``_MCFTuple`` instances
         Contains detailed info on multicollinear columns
+
+    n_samples_seen_ : int
+        Assigned after calling ``partial_fit``. The number of rows seen so far.
+
+    mean_ : np.ndarray, shape=(n_features,)
+        Assigned after calling ``partial_fit`` with the 'pearson' method.
+        The running mean of each feature.
+
+    comoment_ : np.ndarray, shape=(n_features, n_features)
+        Assigned after calling ``partial_fit`` with the 'pearson' method.
+        The running sum of the cross-products of the centered features.
+
+    reservoir_ : np.ndarray, shape=(n_reservoir, n_features)
+        Assigned after calling ``partial_fit`` with a rank method. The uniform
+        random sample of at most ``reservoir_size`` of the rows seen so far.
+
+    sample_margins_ : dict
+        Assigned after calling ``fit``. If fit on a sample, maps each pair
+        of features (a tuple of their names) whose sampled absolute correlation
+        is within its 95% confidence margin (from Fisher's z-transform) of the
+        ``threshold`` to a tuple of the sampled correlation and the margin.
+        Empty if fit on all of the rows.
     """
 
-    def __init__(self, cols=None, threshold=0.85, method='pearson', as_df=True):
-        super(MulticollinearityFilterer, self).__init__(cols=cols, as_df=as_df)
+    def __init__(self, cols=None, threshold=0.85, method='pearson', as_df=True,
+                 reservoir_size=10000, random_state=None, n_jobs=1, sample_size=None,
+                 sample_frac=None, recheck=False, copy=True):
+        super(MulticollinearityFilterer, self).__init__(cols=cols, as_df=as_df, copy=copy)
         self.threshold = threshold
         self.method = method
+        self.reservoir_size = reservoir_size
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.sample_size = sample_size
+        self.sample_frac = sample_frac
+        self.recheck = recheck
 
     def fit(self, X, y=None):
         """Fit the multicollinearity filterer.
@@ -516,46 +666,321 @@ class MulticollinearityFilterer(_BaseFeatureSelector):
         cols = _cols_if_none(X, self.cols)
         _validate_cols(cols)
 
+        # a full fit discards any incremental state
+        for attr in ('n_samples_seen_', 'mean_', 'comoment_', 'reservoir_', '_random_state'):
+            if hasattr(self, attr):
+                delattr(self, attr)
+
         # Generate correlation matrix
-        c = X[cols].corr(method=self.method).apply(lambda x: np.abs(x))
+        sample, fpc = self._sample_rows(X)
+        c = self._correlation_matrix(sample[cols])
+        self.sample_margins_ = {}
+
+        if sample is not X:
+            self.sample_margins_ = self._correlation_margins(c, sample.shape[0], fpc)
+
+            if self.recheck and self.sample_margins_:
+                # only the features in a borderline pair are correlated on all of the rows
+                involved = [nm for nm in cols if any(nm in pair for pair in self.sample_margins_)]
+                full = self._correlation_matrix(X[involved])
+                for a, b in self.sample_margins_:
+                    c.loc[a, b] = c.loc[b, a] = full.loc[a, b]
 
         # get drops list
         self.drop_, self.mean_abs_correlations_, self.correlations_ = filter_collinearity(c, self.threshold)
 
         return self
 
+    def _correlation_margins(self, c, n, fpc):
+        """Find the pairs of features whose sampled absolute correlations
+        are within their 95% margin of the threshold. The standard error of
+        Fisher's z-transform of each correlation is 1 / sqrt(n - 3) for
+        pearson, sqrt(1.06 / (n - 3)) for spearman (Fieller et al.) and
+        sqrt(0.437 / (n - 4)) for kendall, and is mapped back to the
+        correlation scale by the derivative of the inverse transform.
+        """
+        se = {'spearman': np.sqrt(1.06 / max(n - 3, 1)),
+              'kendall': np.sqrt(0.437 / max(n - 4, 1))}.get(self.method, 1. / np.sqrt(max(n - 3, 1)))
+
+        corr = c.values
+        margins = _SAMPLE_Z * fpc * se * (1. - corr ** 2)
+        upper = np.triu_indices(corr.shape[0], 1)
+        pairs = [(c.index[i], c.columns[j]) for i, j in zip(*upper)]
+        return self._borderline(pairs, corr[upper], margins[upper], self.threshold)
+
+    def partial_fit(self, X, y=None):
+        """Incrementally fit the multicollinearity filterer on a chunk
+        of rows, so the correlation matrix can be computed in one pass
+        over data that does not fit in memory. For the 'pearson' method,
+        the means and the co-moment matrix are accumulated exactly, by
+        merging each chunk's (centered) statistics with the running ones
+        (Chan et al.), which is numerically stable. The rank methods cannot
+        be accumulated, and are instead computed over a uniform random
+        sample of at most ``reservoir_size`` rows (reservoir sampling).
+        Either way, memory is bounded regardless of the number of rows.
+
+        As in ``fit``, every chunk must be finite: the statistics are
+        accumulated over whole rows, so missing values cannot be handled
+        pairwise (as ``DataFrame.corr`` would), and would otherwise
+        propagate into every correlation of their feature.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The chunk of rows to fit. The frame will only
+            be fit on the prescribed ``cols`` (see ``__init__``) or
+            all of them if ``cols`` is None. Each chunk must have the
+            same columns. Furthermore, ``X`` will not be altered in
+            the process of the fit.
+
+        y : None
+            Passthrough for ``sklearn.pipeline.Pipeline``. Even
+            if explicitly set, will not change behavior of ``partial_fit``.
+
+        Returns
+        -------
+
+        self
+        """
+        # check on state of X and cols
+        X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True)
+        cols = _cols_if_none(X, self.cols)
+        _validate_cols(cols)
+
+        x = X[cols].as_matrix().astype(np.double)
+        n_features = x.shape[1]
+        n_samples_seen = getattr(self, 'n_samples_seen_', 0)
+
+        if n_samples_seen:
+            n_expected = self.comoment_.shape[0] if self.method == 'pearson' else self.reservoir_.shape[1]
+            if n_features != n_expected:
+                raise ValueError('expected %i features, but got %i' % (n_expected, n_features))
+
+        if self.method == 'pearson':
+            if not n_samples_seen:
+                self.mean_ = np.zeros(n_features)
+                self.comoment_ = np.zeros((n_features, n_features))
+
+            self.mean_, self.comoment_ = _merge_comoments(self.mean_, self.comoment_, n_samples_seen, x)
+            self.n_samples_seen_ = n_samples_seen + x.shape[0]
+
+            # the co-moment is (n - 1) times the covariance, which cancels out
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scale = np.sqrt(np.diag(self.comoment_))
+                corr = self.comoment_ / np.outer(scale, scale)
+
+            # constant features have no correlation (as in pandas)
+            corr[scale == 0, :] = np.nan
+            corr[:, scale == 0] = np.nan
+            c = pd.DataFrame(np.abs(corr), index=cols, columns=cols)
+
+        else:
+            if not n_samples_seen:
+                self._random_state = check_random_state(self.random_state)
+                self.reservoir_ = np.empty((0, n_features))
+
+            self.reservoir_ = _update_reservoir(self.reservoir_, n_samples_seen, x,
+                                                self.reservoir_size, self._random_state)
+            self.n_samples_seen_ = n_samples_seen + x.shape[0]
+
+            c = self._correlation_matrix(pd.DataFrame(self.reservoir_, columns=cols))
+
+        # get drops list
+        self.drop_, self.mean_abs_correlations_, self.correlations_ = filter_collinearity(c, self.threshold)
+
+        return self
+
+    def _correlation_matrix(self, X):
+        """Compute the absolute correlation matrix of ``X``. The rank
+        methods rank each column only once (see ``rank_correlation``).
+        """
+        if self.method in ('kendall', 'spearman'):
+            c = rank_correlation(X, method=self.method, n_jobs=self.n_jobs)
+        else:
+            c = X.corr(method=self.method)
+        return c.apply(lambda x: np.abs(x))
+
+
+def _merge_comoments(mean, comoment, n_samples_seen, x):
+    """Merge the mean and co-moment matrix of the rows seen so far
+    with those of a new chunk of rows, using the pairwise update
+    of Chan, Golub & LeVeque, which only ever sums centered products.
+
+    Parameters
+    ----------
+
+    mean : np.ndarray, shape=(n_features,)
+        The mean of the rows seen so far
+
+    comoment : np.ndarray, shape=(n_features, n_features)
+        The sum of the cross-products of the centered rows seen so far
+
+    n_samples_seen : int
+        The number of rows seen so far
+
+    x : np.ndarray, shape=(n_samples, n_features)
+        The new chunk of rows
+
+
+    Returns
+    -------
+
+    mean : np.ndarray, shape=(n_features,)
+        The mean of all of the rows
+
+    comoment : np.ndarray, shape=(n_features, n_features)
+        The co-moment matrix of all of the rows
+    """
+    n_new = x.shape[0]
+    if not n_new:
+        return mean, comoment
+
+    chunk_mean = x.mean(axis=0)
+    centered = x - chunk_mean
+    n_total = n_samples_seen + n_new
+
+    delta = chunk_mean - mean
+    comoment = comoment + centered.T.dot(centered) + np.outer(delta, delta) * (n_samples_seen * n_new / n_total)
+    mean = mean + delta * (n_new / n_total)
+    return mean, comoment
+
+
+def _update_reservoir(reservoir, n_samples_seen, x, reservoir_size, random_state):
+    """Update a uniform random sample of the rows seen so far
+    with a new chunk of rows (Vitter's Algorithm R, vectorized).
+
+    Parameters
+    ----------
+
+    reservoir : np.ndarray, shape=(n_reservoir, n_features)
+        The sample of the rows seen so far
+
+    n_samples_seen : int
+        The number of rows seen so far
+
+    x : np.ndarray, shape=(n_samples, n_features)
+        The new chunk of rows
+
+    reservoir_size : int
+        The maximum number of rows to keep
+
+    random_state : RandomState
+        The random state used to draw the replacements
+
+
+    Returns
+    -------
+
+    reservoir : np.ndarray, shape=(n_reservoir, n_features)
+        The sample of all of the rows
+    """
+    if reservoir_size < 2:
+        raise ValueError('reservoir_size must be at least 2')
+
+    # fill the reservoir until it is full
+    n_fill = max(0, min(reservoir_size - reservoir.shape[0], x.shape[0]))
+    reservoir = np.vstack((reservoir, x[:n_fill]))
+
+    # each later row t (0-based) replaces a random slot with probability size / (t + 1)
+    rest = x[n_fill:]
+    if rest.shape[0]:
+        t = n_samples_seen + n_fill + np.arange(rest.shape[0])
+        slots = np.floor(random_state.rand(rest.shape[0]) * (t + 1)).astype(np.int64)
+        keep = slots < reservoir_size
+
+        # when several rows hit the same slot, the last one wins (as if sequential)
+        slots, rows = slots[keep][::-1], np.where(keep)[0][::-1]
+        slots, first = np.unique(slots, return_index=True)
+        reservoir[slots] = rest[rows[first]]
+
+    return reservoir
 
-def _near_zero_variance_ratio(series, ratio):
+
+def _top_two_codes(series):
+    """Factorize a series (ignoring NaNs, as ``value_counts`` does)
+    and count its codes, returning the two largest counts.
+    """
+    codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=1)
+    if counts.shape[0] < 2:
+        return counts.max(), 0  # 0 or 1 distinct values
+
+    # partition puts the two largest counts last, in O(n_unique)
+    top = np.partition(counts, counts.shape[0] - 2)[-2:]
+    return top[1], top[0]
+
+
+def _fill_top_two(res, X, batch):
+    # each thread writes to its own rows of the result
+    for i in range(batch.start, batch.stop):
+        res[i] = _top_two_codes(X.iloc[:, i])
+
+
+def _near_zero_variance_ratios(X, ratio, n_jobs=1):
     """Perform NZV filtering based on a ratio of the
     most common value to the second-most-common value.
+    Rather than sorting the ``value_counts`` of each column,
+    each column is factorized once and its codes are counted
+    with a ``bincount``, from which only the two largest counts
+    are selected. This is shared by the ``NearZeroVarianceFilterer``
+    and the ``H2ONearZeroVarianceFilterer``.
 
     Parameters
     ----------
-    
-    series : pandas ``Series``, shape=(n_samples,)
-        The series on which to compute ``value_counts``.
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        The frame on which to compute the frequencies.
+
+    ratio : float
+        The ratio at or above which a feature is dropped.
+
+    n_jobs : int, optional (default=1)
+        The number of threads over which the columns are split.
+        If -1 all CPUs are used. For n_jobs below -1, (n_cpus + 1 + n_jobs)
+        are used. Thus for n_jobs = -2, all CPUs but one are used.
 
     Returns
     -------
 
-    ratio_ : float
-        The ratio of the most-prevalent value
-        to the second-most-prevalent value.
+    matrix : np.ndarray, shape=(n_features, 2)
+        For each feature, the ratio of the most-prevalent value
+        to the second-most-prevalent value (NaN if there's only
+        one value), and whether to drop the feature (1 if drop,
+        0 if keep).
+    """
+    return _top_two_ratios(_top_two_counts(X, n_jobs), ratio)
 
-    drop_ : int
-        Whether to keep the feature or drop it.
-        1 if drop, 0 if keep.
+
+def _top_two_counts(X, n_jobs=1):
+    """Count the two most common values of each column of ``X``,
+    splitting the columns among ``n_jobs`` threads.
     """
-    counts = series.value_counts().sort_values(ascending=False)
+    n_features = X.shape[1]
+    top = np.zeros((n_features, 2), dtype=np.int64)
 
-    # if there's only one value...
-    if counts.shape[0] < 2:
-        return np.nan, 1
+    n_jobs = min(_get_n_jobs(n_jobs), max(n_features, 1))
+    if n_jobs == 1:
+        _fill_top_two(top, X, slice(0, n_features))
+    else:
+        Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(_fill_top_two)(top, X, batch)
+            for batch in gen_even_slices(n_features, n_jobs))
 
-    ratio_ = counts.iloc[0] / counts.iloc[1]
-    drop_ = int(ratio_ >= ratio)
+    return top
 
-    return ratio_, drop_
+
+def _top_two_ratios(top, ratio):
+    """Compute the NZV ratios and drops (see ``_near_zero_variance_ratios``)
+    from the counts of the two most common values of each feature.
+    """
+    # if there's only one value, the ratio is undefined and the feature is dropped
+    single = top[:, 1] == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = np.where(single, np.nan, top[:, 0] / top[:, 1].astype(np.double))
+        drops = (single | (ratios >= ratio)).astype(np.double)
+
+    return np.column_stack((ratios, drops))
 
 
 class NearZeroVarianceFilterer(_BaseFeatureSelector):
@@ -590,6 +1015,11 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
         Since most skutil transformers depend on explicitly-named
         ``DataFrame`` features, the ``as_df`` parameter is True by default.
 
+    copy : bool, optional (default=True)
+        Whether ``transform`` should copy ``X``. If False, only the
+        retained columns are copied, and if none are dropped, ``X``
+        itself is returned.
+
     strategy : str, optional (default='variance')
         The strategy by which feature selection should be performed,
         one of ('variance', 'ratio'). If ``strategy`` is 'variance',
@@ -600,6 +1030,36 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
         ``threshold`` to the second-most frequent value. **Note** that if 
         ``strategy`` is 'ratio', ``threshold`` must be greater than 1.
 
+    n_jobs : int, optional (default=1)
+        The number of threads over which the columns are split when
+        ``strategy`` is 'ratio'. If -1 all CPUs are used. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    profile : None, 'auto' or ``ColumnProfile``, optional (default=None)
+        If provided, the variances and value frequencies are read from the ``ColumnProfile``
+        of ``X`` rather than computed in ``fit``, so several transformers
+        fit on the same frame only scan it once. If 'auto', the profile
+        is looked up (or computed) with ``skutil.utils.profile_frame``.
+        Since the profile already describes every row, no sample is drawn.
+
+    sample_size : int, optional (default=None)
+        If provided, the selector is fit on a uniform random sample of
+        this many rows (without replacement) rather than on all of ``X``.
+        Only one of ``sample_size`` and ``sample_frac`` may be set.
+
+    sample_frac : float, optional (default=None)
+        If provided, the selector is fit on a uniform random sample
+        of this fraction of the rows of ``X``.
+
+    random_state : int or RandomState, optional (default=None)
+        The seed or random state used to draw the row sample.
+
+    recheck : bool, optional (default=False)
+        Whether to recount the variances or frequencies of the features
+        whose sampled variances or ratios are within their (95%) margin
+        of the ``threshold`` on all of ``X``, before the drops are decided.
+
 
     Examples
     --------
@@ -635,6 +1095,15 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
         The dropped columns mapped to their corresponding 
         variances or ratios, depending on the ``strategy``
 
+    sample_margins_ : dict
+        Assigned after calling ``fit``. If fit on a sample, maps each feature
+        whose sampled variance or ratio is within its 95% confidence margin of
+        the ``threshold`` to a tuple of the sampled statistic and the margin.
+        A feature with a single sampled value (a NaN ratio) is included with
+        an infinite margin if, by the "rule of three," fewer than
+        ``threshold`` sampled rows per other value cannot be ruled out.
+        Empty if fit on all of the rows.
+
 
     References
     ----------
@@ -643,10 +1112,18 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
            Modeling" (2013). New York, NY: Springer.
     """
 
-    def __init__(self, cols=None, threshold=1e-6, as_df=True, strategy='variance'):
-        super(NearZeroVarianceFilterer, self).__init__(cols=cols, as_df=as_df)
+    def __init__(self, cols=None, threshold=1e-6, as_df=True, strategy='variance', n_jobs=1,
+                 profile=None, sample_size=None, sample_frac=None, random_state=None, recheck=False,
+                 copy=True):
+        super(NearZeroVarianceFilterer, self).__init__(cols=cols, as_df=as_df, copy=copy)
         self.threshold = threshold
         self.strategy = strategy
+        self.n_jobs = n_jobs
+        self.profile = profile
+        self.sample_size = sample_size
+        self.sample_frac = sample_frac
+        self.random_state = random_state
+        self.recheck = recheck
 
     def fit(self, X, y=None):
         """Fit the transformer.
@@ -670,7 +1147,7 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
         self
         """
         # check on state of X and cols
-        X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True)
+        X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True, copy=False)  # fit does not alter X
         cols = _cols_if_none(X, self.cols)
 
         # validate strategy
@@ -679,9 +1156,22 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
             raise ValueError('strategy must be one of {0}, but got {1}'.format(
                 str(valid_strategies), self.strategy))
 
+        profile = _resolve_profile(self.profile, X, cols)
+        sample, fpc = (X, 0.) if profile is not None else self._sample_rows(X)
+        self.sample_margins_ = {}
+
         if self.strategy == 'variance':
             # if cols is None, applies over everything
-            variances = X[cols].var()
+            variances = sample[cols].var() if profile is None else profile.variance[cols]
+
+            if sample is not X:
+                margins = _SAMPLE_Z * fpc * _variance_standard_errors(sample[variances.index], variances)
+                self.sample_margins_ = self._borderline(variances.index, variances.values, margins, self.threshold)
+
+                if self.recheck and self.sample_margins_:
+                    borderline = [nm for nm in variances.index if nm in self.sample_margins_]
+                    variances[borderline] = X[borderline].var()
+
             mask = (variances < self.threshold).values
             self.var_ = variances[mask].tolist()
             self.drop_ = variances.index[mask].tolist()
@@ -692,9 +1182,51 @@ class NearZeroVarianceFilterer(_BaseFeatureSelector):
                 raise ValueError('when strategy=="ratio", threshold must be greater than 1.0')
 
             # get a np.array mask
-            matrix = np.array([_near_zero_variance_ratio(X[col], ratio) for col in cols])
+            if profile is not None:
+                top = np.column_stack((profile.top_count[cols].values, profile.second_count[cols].values))
+            else:
+                top = _top_two_counts(sample[cols], self.n_jobs)
+
+            if sample is not X:
+                self.sample_margins_ = self._ratio_margins(cols, top, sample.shape[0], fpc)
+
+                if self.recheck and self.sample_margins_:
+                    idcs = [i for i, nm in enumerate(cols) if nm in self.sample_margins_]
+                    top[idcs] = _top_two_counts(X[[cols[i] for i in idcs]], self.n_jobs)
+
+            matrix = _top_two_ratios(top, ratio)
             drop_mask = matrix[:, 1].astype(np.bool)
             self.drop_ = np.asarray(cols)[drop_mask].tolist()
             self.var_ = dict(zip(self.drop_, matrix[drop_mask, 0].tolist()))  # just retain the variances
 
         return self
+
+    def _ratio_margins(self, cols, top, n, fpc):
+        """Find the features whose sampled ratios of the two most common
+        values are within their 95% margin of the threshold. By the delta
+        method, the standard error of the log of a ratio of two multinomial
+        counts is sqrt(1 / c1 + 1 / c2). If only one value was sampled,
+        the other values occur in fewer than 3 / n of the rows with 95%
+        confidence (the "rule of three"), so the feature is only borderline
+        if a ratio of n / 3 would not be dropped.
+        """
+        ratio = self.threshold
+        single = top[:, 1] == 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = top[:, 0] / top[:, 1].astype(np.double)
+            margins = _SAMPLE_Z * fpc * ratios * np.sqrt(1. / top[:, 0] + 1. / top[:, 1])
+
+        margins = self._borderline(cols, np.where(single, np.nan, ratios), margins, ratio)
+        if n / 3. < ratio:
+            margins.update((nm, (np.nan, np.inf)) for nm, s in zip(cols, single) if s)
+        return margins
+
+
+def _variance_standard_errors(X, variances):
+    """The (distribution-free) standard errors of the sample variances
+    of the columns of ``X``: sqrt((m4 - s^4 * (n - 3) / (n - 1)) / n),
+    where m4 is the fourth central moment.
+    """
+    n = X.shape[0]
+    m4 = ((X - X.mean()) ** 4).mean()
+    return np.sqrt(np.maximum(m4 - variances ** 2 * (n - 3.) / (n - 1.), 0.) / n).values
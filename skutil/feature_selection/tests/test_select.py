@@ -3,10 +3,14 @@ import numpy as np
 import pandas as pd
 import warnings
 from skutil.odr import QRDecomposition
-from skutil.feature_selection import combos
+from skutil.feature_selection import combos, select
+from skutil.feature_selection._rank import rank_correlation, _count_inversions
 from numpy.testing import (assert_array_equal, assert_almost_equal, assert_array_almost_equal)
 from sklearn.datasets import load_iris
+from sklearn.utils import check_random_state
+from sklearn.utils.random import sample_without_replacement
 from skutil.feature_selection import *
+from skutil.utils import ColumnProfile
 from skutil.utils.tests.utils import assert_fails
 
 # Def data for testing
@@ -177,6 +181,44 @@ def test_feature_dropper():
     assert transformer.cols is None
 
 
+def test_no_copy_transform():
+    cols = ['sepal length (cm)', 'petal width (cm)']
+    expected = X.copy()
+
+    # the same frames are returned, without copying or altering X
+    for transformer in (FeatureDropper(cols=cols), FeatureRetainer(cols=cols),
+                        MulticollinearityFilterer(), NearZeroVarianceFilterer()):
+        transformer.fit(X)
+        no_copy = transformer.set_params(copy=False).transform(X)
+        assert no_copy.equals(transformer.set_params(copy=True).transform(X))
+        assert X.equals(expected)
+
+    # when nothing is dropped, X itself is returned
+    assert NearZeroVarianceFilterer(copy=False).fit(X).transform(X) is X
+    assert FeatureRetainer(copy=False).fit(X).transform(X) is X
+
+    # X is neither copied nor dropped from (which copies it) by a no-copy transform
+    calls = []
+    copy, drop = pd.DataFrame.copy, pd.DataFrame.drop
+
+    def spy(method):
+        def wrapped(self, *args, **kwargs):
+            if self is X:
+                calls.append(method.__name__)
+            return method(self, *args, **kwargs)
+        return wrapped
+
+    transformer = FeatureDropper(cols=cols, copy=False).fit(X)
+    pd.DataFrame.copy, pd.DataFrame.drop = spy(copy), spy(drop)
+    try:
+        transformer.transform(X)
+        assert not calls, calls
+        transformer.set_params(copy=True).transform(X)
+        assert calls  # the spy does see the copying transform
+    finally:
+        pd.DataFrame.copy, pd.DataFrame.drop = copy, drop
+
+
 def test_feature_selector():
     transformer = FeatureRetainer().fit(X)
     assert transformer.transform(X).shape[1] == 4
@@ -230,6 +272,147 @@ def test_multi_collinearity():
     assert_fails(filter_collinearity, ValueError, pd.DataFrame.from_records(np.ones((3, 2))), 0.6)
 
 
+def test_multi_collinearity_partial_fit():
+    # pearson is accumulated exactly over the chunks
+    mcf = MulticollinearityFilterer()
+    for i in range(0, 150, 40):
+        mcf.partial_fit(X.iloc[i:i + 40])
+
+    full = MulticollinearityFilterer().fit(X)
+    assert mcf.n_samples_seen_ == 150
+    assert mcf.drop_ == full.drop_
+    assert_array_almost_equal(mcf.mean_abs_correlations_, full.mean_abs_correlations_)
+    assert_array_almost_equal(mcf.mean_, X.mean().values)
+    assert_array_almost_equal(mcf.comoment_ / 149., X.cov().values)
+
+    # the chunks must have the same columns, and fit resets the state
+    assert_fails(mcf.partial_fit, ValueError, X.iloc[:, :2])
+    assert not hasattr(mcf.fit(X), 'comoment_')
+
+    # a reservoir larger than the data holds all of it, so the rank methods are exact
+    for method in ('spearman', 'kendall'):
+        mcf = MulticollinearityFilterer(method=method, reservoir_size=200, random_state=42)
+        for i in range(0, 150, 40):
+            mcf.partial_fit(X.iloc[i:i + 40])
+
+        assert mcf.reservoir_.shape == (150, 4)
+        assert mcf.drop_ == MulticollinearityFilterer(method=method).fit(X).drop_
+
+    # otherwise, the reservoir is bounded
+    mcf = MulticollinearityFilterer(method='spearman', reservoir_size=50, random_state=42)
+    for i in range(0, 150, 40):
+        mcf.partial_fit(X.iloc[i:i + 40])
+    assert mcf.reservoir_.shape == (50, 4)
+    assert mcf.n_samples_seen_ == 150
+
+
+def test_rank_correlation():
+    # inversions match the brute force count
+    rs = np.random.RandomState(42)
+    for n in (1, 2, 7, 64, 101):
+        v = rs.randint(0, n, n)
+        expected = sum(v[i] > v[j] for i in range(n) for j in range(i + 1, n))
+        assert _count_inversions(v) == expected
+
+    # with ties, the rank correlations match pandas
+    W = pd.DataFrame(np.round(rs.rand(60, 4) * 5), columns=['a', 'b', 'c', 'd'])
+    W['e'] = W['a'] * 2 - W['b']
+    for method in ('kendall', 'spearman'):
+        expected = W.corr(method=method).values
+        for n_jobs in (1, 2):
+            assert_array_almost_equal(rank_correlation(W, method, n_jobs).values, expected)
+
+        # constant columns are not correlated
+        W['f'] = 1.
+        assert np.isnan(rank_correlation(W, method).values[-1]).all()
+        del W['f']
+
+    assert_fails(rank_correlation, ValueError, W, 'pearson')
+
+
+def test_sampled_fit():
+    rs = np.random.RandomState(42)
+    n = 2000
+    a = rs.randn(n)
+    W = pd.DataFrame.from_dict({'a': a, 'b': a + rs.randn(n) * 0.1, 'c': rs.randn(n),
+                                'd': a * 0.85 + rs.randn(n) * 0.53})
+
+    # the rows the selectors sample with random_state=0
+    rows = np.sort(sample_without_replacement(n, 400, random_state=check_random_state(0)))
+
+    # clear-cut correlations give the same drops as the full fit
+    mcf = MulticollinearityFilterer(cols=['a', 'b', 'c'], sample_size=400, random_state=0).fit(W)
+    assert mcf.drop_ == MulticollinearityFilterer(cols=['a', 'b', 'c']).fit(W).drop_
+    assert mcf.sample_margins_ == {}
+    assert MulticollinearityFilterer().fit(W).sample_margins_ == {}
+
+    # but a threshold at a sampled correlation is borderline
+    threshold = abs(W.iloc[rows].corr().loc['a', 'd'])
+    mcf = MulticollinearityFilterer(cols=['a', 'c', 'd'], threshold=threshold, sample_size=400,
+                                    random_state=0, recheck=True).fit(W)
+    stat, margin = mcf.sample_margins_[('a', 'd')]
+    assert abs(stat - threshold) <= margin
+
+    # a borderline sparsity is rechecked on all of the rows
+    V = pd.DataFrame.from_dict({'x': np.where(rs.rand(n) < 0.5, np.nan, 1.), 'y': np.ones(n)})
+    threshold = V['x'].iloc[rows].isnull().mean()
+    filt = SparseFeatureDropper(threshold=threshold, sample_size=400, random_state=0, recheck=True).fit(V)
+    assert list(filt.sample_margins_) == ['x']
+    assert_almost_equal(filt.sparsity_[0], V['x'].isnull().mean())
+
+    # near-zero variance, with both strategies
+    U = pd.DataFrame.from_dict({'p': (rs.rand(n) < 0.02).astype(float), 'q': rs.randint(0, 3, n).astype(float)})
+    nzv = NearZeroVarianceFilterer(strategy='ratio', threshold=5., sample_frac=0.2, random_state=0).fit(U)
+    assert nzv.drop_ == ['p']
+    nzv = NearZeroVarianceFilterer(threshold=0.1, sample_size=400, random_state=0).fit(U)
+    assert nzv.drop_ == ['p']
+    assert nzv.sample_margins_ == {}
+
+    # only one of sample_size and sample_frac, and a valid fraction
+    assert_fails(SparseFeatureDropper(sample_size=10, sample_frac=0.5).fit, ValueError, V)
+    assert_fails(SparseFeatureDropper(sample_frac=1.5).fit, ValueError, V)
+
+
+def test_filter_collinearity_matches_restart_scan():
+    # the original filtration, which restarts from the first column after every drop
+    def restart_scan(c, threshold):
+        c = c.copy()
+        drops, macor = [], []
+        finished = False
+        while not finished:
+            for i, nm in enumerate(c.columns):
+                this_col = c[nm].drop(nm).sort_values(na_position='first', kind='mergesort')
+                max_cor = this_col.iloc[-1]
+                if pd.isnull(max_cor) or max_cor < threshold or this_col.shape[0] == 1:
+                    if i == c.columns.shape[0] - 1:
+                        finished = True
+                    continue
+
+                other_col_nm = this_col.index[-1]
+                mn_1, mn_2 = np.nanmean(this_col), np.nanmean(c[other_col_nm].drop(other_col_nm))
+                drop_nm = nm if mn_1 > mn_2 else other_col_nm
+                c.drop(drop_nm, axis=1, inplace=True)
+                c.drop(drop_nm, axis=0, inplace=True)
+                drops.append(drop_nm)
+                macor.append(max(mn_1, mn_2))
+                break
+        return drops, macor
+
+    rs = np.random.RandomState(42)
+    Z = rs.rand(50, 25)
+    Z[:, 10:] += Z[:, :15] * rs.rand(15) * 3  # induce some collinearity
+    c = pd.DataFrame.from_records(Z, columns=['f%i' % i for i in range(25)]).corr().abs()
+
+    for threshold in (0.5, 0.7, 0.9):
+        expected_drops, expected_macor = restart_scan(c, threshold)
+        drops, macor, corrz = filter_collinearity(c, threshold)
+
+        assert drops == expected_drops
+        assert_array_almost_equal(macor, expected_macor)
+        assert [t.feature_x for t in corrz] == drops
+        assert all(t.abs_corr >= threshold for t in corrz)
+
+
 def test_nzv_filterer():
     transformer = NearZeroVarianceFilterer().fit(X)
     assert not transformer.drop_
@@ -271,6 +454,27 @@ def test_nzv_filterer():
     assert len(transformer.var_) == 1
     assert transformer.var_['a'] == 3.0
 
+    # the variances and frequencies can be read from a profile of the frame
+    for strategy, threshold in (('ratio', 3.0), ('variance', 0.2)):
+        expected = NearZeroVarianceFilterer(strategy=strategy, threshold=threshold).fit(df)
+        transformer = NearZeroVarianceFilterer(strategy=strategy, threshold=threshold, profile='auto').fit(df)
+        assert transformer.drop_ == expected.drop_
+
+    # the top-two counts match value_counts, in parallel and with NaNs or a single value
+    rs = np.random.RandomState(42)
+    W = pd.DataFrame(rs.randint(0, 4, (100, 6)) ** 2, columns=list('abcdef')).astype(float)
+    W.iloc[::3, 1] = np.nan
+    W['g'] = 7.
+    for n_jobs in (1, 3):
+        matrix = select._near_zero_variance_ratios(W, 1.5, n_jobs)
+        for i, col in enumerate(W.columns):
+            counts = W[col].value_counts().values
+            if counts.shape[0] < 2:
+                assert np.isnan(matrix[i, 0]) and matrix[i, 1] == 1
+            else:
+                assert_almost_equal(matrix[i, 0], counts[0] / float(counts[1]))
+                assert matrix[i, 1] == int(counts[0] / float(counts[1]) >= 1.5)
+
 
 def test_feature_dropper_warning():
     x = np.array([
@@ -304,6 +508,45 @@ def test_linear_combos():
     # test too few features
     assert_fails(LinearCombinationFilterer(cols=['A']).fit, ValueError, Z)
 
+    # several (chained) combos are all found at once
+    rs = np.random.RandomState(42)
+    W = pd.DataFrame.from_records(data=rs.rand(50, 4), columns=['A', 'B', 'C', 'D'])
+    W['E'] = W.A + W.B
+    W['F'] = W.E - W.C
+    W['G'] = 3 * W.D
+    lcf = LinearCombinationFilterer().fit(W)
+    assert sorted(lcf.drop_) == ['E', 'F', 'G']
+    assert_array_equal(lcf.transform(W).columns.values, ['A', 'B', 'C', 'D'])
+
+    # the same combos are found incrementally, over chunks of rows
+    lcf = LinearCombinationFilterer()
+    for i in range(0, 50, 3):
+        lcf.partial_fit(W.iloc[i:i + 3])
+    assert sorted(lcf.drop_) == ['E', 'F', 'G']
+    assert lcf.n_samples_seen_ == 50
+    assert lcf.r_factor_.shape == (7, 7)
+    assert_array_equal(lcf.transform(W).columns.values, ['A', 'B', 'C', 'D'])
+
+    # while there are fewer rows than features, R is wide, and its
+    # dependencies (of the rows seen so far) are still all found
+    V = W[['A', 'B', 'C', 'D', 'E', 'F', 'G']].copy()
+    V.insert(1, 'A2', V.A)
+    lcf = LinearCombinationFilterer().partial_fit(V.iloc[:3])
+    assert lcf.r_factor_.shape == (3, 8)
+    assert len(lcf.drop_) == 5 and 'A2' in lcf.drop_
+    for i in range(3, 50, 3):
+        lcf.partial_fit(V.iloc[i:i + 3])
+    assert sorted(lcf.drop_) == ['A2', 'E', 'F', 'G']
+
+    # the chunks must have the same columns, and fit resets the state
+    assert_fails(lcf.partial_fit, ValueError, W[['A', 'B']])
+    assert not hasattr(lcf.fit(W), 'r_factor_')
+
+    # the tall-skinny QR finds the same combos, serially and in parallel
+    for n_jobs, block_size in ((1, 7), (2, None), (2, 4)):
+        lcf = LinearCombinationFilterer(n_jobs=n_jobs, block_size=block_size).fit(W)
+        assert sorted(lcf.drop_) == ['E', 'F', 'G']
+
 
 def test_sparsity():
     x = np.array([
@@ -327,6 +570,14 @@ def test_sparsity():
 
     # test with a bad value
     assert_fails(SparseFeatureDropper(threshold=1.0).fit, ValueError, df)
+
+    # the sparsity can be read from a profile of the frame
+    filt = SparseFeatureDropper(threshold=0.3, profile=ColumnProfile(df)).fit(df)
+    assert sorted(filt.drop_) == ['b', 'c']
+    assert_fails(SparseFeatureDropper(profile=ColumnProfile(df.iloc[:2])).fit, ValueError, df)
+
+    # the profile must have the frame's dtypes
+    assert_fails(SparseFeatureDropper(profile=ColumnProfile(df)).fit, ValueError, df.astype(object))
     assert_fails(SparseFeatureDropper(threshold=-0.1).fit, ValueError, df)
     assert_fails(SparseFeatureDropper(threshold='a').fit, ValueError, df)
 
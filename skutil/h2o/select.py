@@ -3,11 +3,10 @@ import warnings
 import numpy as np
 from sklearn.utils.validation import check_is_fitted
 from ..feature_selection import filter_collinearity
-from ..feature_selection.select import _near_zero_variance_ratio
+from ..feature_selection.select import _near_zero_variance_ratios
 from ..utils import is_numeric
 from ..utils.fixes import is_iterable
 from .base import (BaseH2OTransformer, check_frame, _retain_features, _frame_from_x_y)
-from .frame import as_series
 
 __all__ = [
     'BaseH2OFeatureSelector',
@@ -533,8 +532,8 @@ class H2ONearZeroVarianceFilterer(BaseH2OFeatureSelector):
             if not ratio > 1.0:
                 raise ValueError('when strategy=="ratio", threshold must be greater than 1.0')
 
-            # get a np.array mask
-            matrix = np.array([_near_zero_variance_ratio(as_series(frame[col]), ratio) for col in frame.columns])
+            # download the frame once, rather than column by column
+            matrix = _near_zero_variance_ratios(frame.as_data_frame(use_pandas=True), ratio)
             drop_mask = matrix[:, 1].astype(np.bool)
             self.drop_ = np.asarray(frame.columns)[drop_mask].tolist()
             self.var_ = dict(zip(self.drop_, matrix[drop_mask, 0].tolist()))
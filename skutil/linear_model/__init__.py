@@ -1,6 +1,12 @@
 """
-skutil.linear_model will provide the basis for
-Poisson and Tweedy regressions and gradient computations.
+skutil.linear_model provides linear models solved with the
+QR decomposition of `skutil.odr`: a rank-deficiency-safe least
+squares regression (`QRLinearRegression`), and Poisson and Tweedie
+regressions fit by iteratively reweighted least squares
+(`PoissonRegression`, `TweedieRegression`).
 """
 
+from .regression import *
+from .glm import *
+
 __all__ = [s for s in dir() if not s.startswith("_")]  # Remove hiddens
@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, division, absolute_import
+from abc import ABCMeta, abstractmethod
+import time
+import warnings
+import numpy as np
+from scipy.special import xlogy
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.utils import check_array
+from sklearn.utils.validation import check_is_fitted
+from sklearn.externals import six
+from skutil.base import SelectiveMixin
+from skutil.odr import QRDecomposition
+from .regression import _design_matrix, _split_coef
+from ..utils import validate_is_pd, is_integer, is_numeric
+from ..utils.fixes import _cols_if_none
+
+__all__ = [
+    'PoissonRegression',
+    'TweedieRegression'
+]
+
+
+def _check_vector(v, n_samples, name, default):
+    """Validate a per-row vector (i.e., weights or offsets)"""
+    if v is None:
+        return np.tile(default, n_samples)
+
+    v = check_array(v, dtype=np.double, ensure_2d=False)
+    if v.shape != (n_samples,):
+        raise ValueError('%s must have shape (%i,), but got %r' % (name, n_samples, v.shape))
+    return v
+
+
+def _tweedie_deviance(y, mu, sample_weight, power):
+    """Compute the (weighted) Tweedie deviance"""
+    if power == 0:
+        dev = (y - mu) ** 2
+    elif power == 1:
+        dev = 2 * (xlogy(y, y / mu) - (y - mu))
+    elif power == 2:
+        dev = 2 * (np.log(mu / y) + y / mu - 1)
+    else:
+        dev = 2 * (np.power(y, 2 - power) / ((1 - power) * (2 - power)) -
+                   y * np.power(mu, 1 - power) / (1 - power) +
+                   np.power(mu, 2 - power) / (2 - power))
+    return np.dot(sample_weight, dev)
+
+
+class _BaseQRGLM(six.with_metaclass(ABCMeta, BaseEstimator, RegressorMixin, SelectiveMixin)):
+    """Base class for GLMs with a log link, fit by iteratively
+    reweighted least squares (IRLS), where each weighted least squares
+    problem is solved with the pivoted QR decomposition of ``skutil.odr``.
+    Only the factorization is chunked: the features are held in memory as
+    a single float64 matrix (at most one copy of ``X``), along with the
+    working weights, response and linear predictor, each of length n_samples.
+
+    Parameters
+    ----------
+
+    cols : array_like, shape=(n_features,), optional (default=None)
+        The names of the columns to use as features. If no column
+        names are provided, all of the columns are used.
+
+    fit_intercept : bool, optional (default=True)
+        Whether to fit an intercept.
+
+    max_iter : int, optional (default=25)
+        The maximum number of IRLS iterations, and of step
+        halvings within each iteration.
+
+    tol : float, optional (default=1e-8)
+        The convergence tolerance. As in R's ``glm``, the fit has converged
+        when ``|dev - dev_old| / (|dev| + 0.1) < tol``.
+
+    qr_tol : float, optional (default=1e-7)
+        The tolerance for detecting linearly dependent columns
+        (see ``skutil.odr.qr_decomposition``).
+
+    chunk_size : int, optional (default=None)
+        If not None, each iteration factors the rows in chunks of this
+        many rows (see ``skutil.odr.QRDecomposition.update``), which requires
+        O(chunk_size * n_features) memory for the factorization, rather
+        than O(n_samples * n_features). The features must still fit in
+        memory, as must a few vectors of length n_samples.
+
+    verbose : int, optional (default=0)
+        The level of verbosity. If greater than 0, the deviance
+        and time of each iteration are printed.
+    """
+
+    def __init__(self, cols=None, fit_intercept=True, max_iter=25, tol=1e-8,
+                 qr_tol=1e-7, chunk_size=None, verbose=0):
+        self.cols = cols
+        self.fit_intercept = fit_intercept
+        self.max_iter = max_iter
+        self.tol = tol
+        self.qr_tol = qr_tol
+        self.chunk_size = chunk_size
+        self.verbose = verbose
+
+    @abstractmethod
+    def _get_power(self):
+        """Get the power of the variance function, ``V(mu) = mu ** power``"""
+
+    def _check_y(self, y, power):
+        y = check_array(y, dtype=np.double, ensure_2d=False)
+        if y.ndim != 1:
+            raise ValueError('y must be 1d')
+        if power >= 2 and (y <= 0).any():
+            raise ValueError('y must be positive for power >= 2')
+        if power > 0 and (y < 0).any():
+            raise ValueError('y must be non-negative for power > 0')
+        return y
+
+    def _solve(self, x, z, w, chunks):
+        """Solve the weighted least squares problem for the working response,
+        ``z``, one chunk of rows at a time, keeping only the R factor.
+        """
+        decomp = None
+        for rows in chunks:
+            A, zz = _design_matrix(x[rows], z[rows], w[rows], self.fit_intercept)
+            if decomp is None:
+                decomp = QRDecomposition(A, pivot=1, tol=self.qr_tol, Y=zz)
+                decomp.update(A[:0], zz[:0])  # keep only R, rather than the Q factor of the rows
+            else:
+                decomp.update(A, zz)
+
+        return _split_coef(decomp, self.feature_names_, self.fit_intercept)
+
+    def _evaluate(self, x, intercept, coef, offset, y, sample_weight, power):
+        """Compute the linear predictor, mean and deviance of the coefficients.
+        The mean may overflow, in which case the deviance is not finite.
+        """
+        eta = np.dot(x, coef) + (intercept + offset)
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            mu = np.exp(eta)
+            return eta, mu, _tweedie_deviance(y, mu, sample_weight, power)
+
+    def fit(self, X, y, sample_weight=None, offset=None):
+        """Fit the GLM.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The Pandas frame to fit. The model will only be fit
+            on the prescribed ``cols`` (see ``__init__``) or all
+            of them if ``cols`` is None.
+
+        y : array_like, shape=(n_samples,)
+            The target.
+
+        sample_weight : array_like, shape=(n_samples,), optional (default=None)
+            Non-negative (prior) weights for each row.
+
+        offset : array_like, shape=(n_samples,), optional (default=None)
+            A term with a fixed coefficient of 1 in the linear predictor,
+            i.e., the log of the exposure of each row.
+
+        Returns
+        -------
+
+        self
+        """
+        power = self._get_power()
+        if not is_numeric(power) or 0 < power < 1:
+            raise ValueError('power must be 0 or >= 1, but got %s' % str(power))
+        if not is_integer(self.max_iter) or self.max_iter < 1:
+            raise ValueError('max_iter must be a positive int, but got %s' % str(self.max_iter))
+        chunk_size = self.chunk_size
+        if chunk_size is not None and (not is_integer(chunk_size) or chunk_size < 1):
+            raise ValueError('chunk_size must be a positive int, but got %s' % str(chunk_size))
+
+        X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True, copy=False)
+        cols = _cols_if_none(X, self.cols)
+        self.feature_names_ = list(cols)
+
+        # a single float64 matrix of the features, which
+        # is at most one copy of (the features of) X
+        x = check_array(X.as_matrix(columns=list(cols)), dtype=np.double)
+        n_samples = x.shape[0]
+        y = self._check_y(y, power)
+        if y.shape[0] != n_samples:
+            raise ValueError('X and y must have the same number of rows')
+
+        s = _check_vector(sample_weight, n_samples, 'sample_weight', 1.)
+        if (s < 0).any():
+            raise ValueError('sample_weight must be non-negative')
+        offset = _check_vector(offset, n_samples, 'offset', 0.)
+
+        chunk_size = chunk_size or n_samples
+        chunks = [slice(i, min(i + chunk_size, n_samples)) for i in range(0, n_samples, chunk_size)]
+
+        # start halfway between y and its mean, which keeps mu positive
+        mu = (y + np.average(y, weights=s)) / 2.
+        eta = np.log(mu)
+        dev = _tweedie_deviance(y, mu, s, power)
+
+        self.iteration_times_, self.deviance_path_, converged = [], [], False
+        n_iter, previous = 0, None
+        for n_iter in range(1, self.max_iter + 1):
+            start = time.time()
+
+            # the working weights and response for the log link
+            w = s * np.power(mu, 2 - power)
+            z = eta - offset + (y - mu) / mu
+            intercept, coef, rank, aliased = self._solve(x, z, w, chunks)
+
+            dev_old = dev
+            eta, mu, dev = self._evaluate(x, intercept, coef, offset, y, s, power)
+
+            # step halving, as in R's glm.fit: while the deviance is not finite (or, after the
+            # first iteration, has increased), move halfway back to the previous coefficients
+            n_halvings, first = 0, previous is None
+            while not (np.isfinite(dev) and (first or (dev - dev_old) / (np.abs(dev) + 0.1) < self.tol)):
+                if n_halvings == self.max_iter:
+                    raise ValueError('the deviance did not decrease after %i step halvings in iteration %i; '
+                                     'the model may be diverging (consider scaling the features)'
+                                     % (n_halvings, n_iter))
+                if previous is None:
+                    # the starting mu is not a linear predictor, so halve toward its least squares fit
+                    previous = self._solve(x, np.log((y + np.average(y, weights=s)) / 2.) - offset, w, chunks)[:2]
+
+                intercept, coef = (intercept + previous[0]) / 2., (coef + previous[1]) / 2.
+                eta, mu, dev = self._evaluate(x, intercept, coef, offset, y, s, power)
+                n_halvings += 1
+
+            previous = intercept, coef
+            self.iteration_times_.append(time.time() - start)
+            self.deviance_path_.append(dev)
+            if self.verbose:
+                print('iteration %i: deviance=%.6f, %i step halvings (%.3f sec)'
+                      % (n_iter, dev, n_halvings, self.iteration_times_[-1]))
+
+            if np.abs(dev - dev_old) / (np.abs(dev) + 0.1) < self.tol:
+                converged = True
+                break
+
+        if not converged:
+            warnings.warn('IRLS did not converge in %i iterations' % self.max_iter, UserWarning)
+
+        self.n_iter_, self.converged_ = n_iter, converged
+        self.intercept_, self.coef_, self.rank_, self.aliased_ = intercept, coef, rank, aliased
+        self.deviance_ = dev
+        return self
+
+    def predict(self, X, offset=None):
+        """Predict the mean of the target.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The Pandas frame to predict.
+
+        offset : array_like, shape=(n_samples,), optional (default=None)
+            The offset of each row (i.e., the log of its exposure).
+
+        Returns
+        -------
+
+        mu : np.ndarray, shape=(n_samples,)
+            The predicted means
+        """
+        check_is_fitted(self, 'coef_')
+        X, _ = validate_is_pd(X, self.cols)
+        cols = _cols_if_none(X, self.cols)
+        x = X[cols].as_matrix()
+        return np.exp(np.dot(x, self.coef_) + self.intercept_ +
+                      _check_vector(offset, x.shape[0], 'offset', 0.))
+
+
+class TweedieRegression(_BaseQRGLM):
+    """Tweedie regression with a log link, fit by iteratively reweighted
+    least squares (IRLS). Each iteration solves a weighted least squares
+    problem with the pivoted QR decomposition of ``skutil.odr``, factoring
+    the rows in chunks (see ``chunk_size``) if needed, so linearly dependent
+    columns are aliased (as in R's ``glm``) rather than breaking the fit.
+    The variance function is ``V(mu) = mu ** power``, where common powers are:
+
+        * 0: normal
+        * 1: Poisson
+        * (1, 2): compound Poisson-gamma, i.e., for pure premium
+        * 2: gamma
+        * 3: inverse Gaussian
+
+    Parameters
+    ----------
+
+    cols : array_like, shape=(n_features,), optional (default=None)
+        The names of the columns to use as features. If no column
+        names are provided, all of the columns are used.
+
+    power : float, optional (default=1.5)
+        The power of the variance function. Must be 0 or >= 1.
+
+    fit_intercept : bool, optional (default=True)
+        Whether to fit an intercept.
+
+    max_iter : int, optional (default=25)
+        The maximum number of IRLS iterations, and of step
+        halvings within each iteration.
+
+    tol : float, optional (default=1e-8)
+        The convergence tolerance. As in R's ``glm``, the fit has converged
+        when ``|dev - dev_old| / (|dev| + 0.1) < tol``.
+
+    qr_tol : float, optional (default=1e-7)
+        The tolerance for detecting linearly dependent columns
+        (see ``skutil.odr.qr_decomposition``).
+
+    chunk_size : int, optional (default=None)
+        If not None, each iteration factors the rows in chunks of this
+        many rows (see ``skutil.odr.QRDecomposition.update``), which requires
+        O(chunk_size * n_features) memory for the factorization, rather
+        than O(n_samples * n_features). The features must still fit in
+        memory, as must a few vectors of length n_samples.
+
+    verbose : int, optional (default=0)
+        The level of verbosity. If greater than 0, the deviance
+        and time of each iteration are printed.
+
+
+    Examples
+    --------
+
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> from skutil.linear_model import TweedieRegression
+        >>>
+        >>> rs = np.random.RandomState(42)
+        >>> X = pd.DataFrame.from_records(rs.rand(1000, 2), columns=['a', 'b'])
+        >>> y = rs.gamma(2., np.exp(1 + X.a.values) / 2.)
+        >>> reg = TweedieRegression(power=2).fit(X, y)
+        >>> assert reg.converged_
+
+
+    Attributes
+    ----------
+
+    coef_ : np.ndarray, shape=(n_features,)
+        The coefficients of the linear predictor. Aliased columns have a coefficient of 0.
+
+    intercept_ : float
+        The intercept (0 if ``fit_intercept`` is False).
+
+    rank_ : int
+        The rank of the design matrix (including the intercept).
+
+    aliased_ : list
+        The names of the aliased (linearly dependent) columns.
+
+    deviance_ : float
+        The deviance of the fit model.
+
+    deviance_path_ : list
+        The deviance after each iteration.
+
+    iteration_times_ : list
+        The time (in seconds) taken by each iteration.
+
+    n_iter_ : int
+        The number of iterations.
+
+    converged_ : bool
+        Whether the fit converged.
+    """
+
+    def __init__(self, cols=None, power=1.5, fit_intercept=True, max_iter=25, tol=1e-8,
+                 qr_tol=1e-7, chunk_size=None, verbose=0):
+        super(TweedieRegression, self).__init__(cols=cols, fit_intercept=fit_intercept, max_iter=max_iter,
+                                                tol=tol, qr_tol=qr_tol, chunk_size=chunk_size, verbose=verbose)
+        self.power = power
+
+    def _get_power(self):
+        return self.power
+
+
+class PoissonRegression(_BaseQRGLM):
+    """Poisson regression with a log link, fit by iteratively reweighted
+    least squares (IRLS). This is ``TweedieRegression`` with ``power=1``.
+    Counts over varying exposures (i.e., claim frequency) are modeled with
+    the log of the exposure as the ``offset``.
+
+    Parameters
+    ----------
+
+    cols : array_like, shape=(n_features,), optional (default=None)
+        The names of the columns to use as features. If no column
+        names are provided, all of the columns are used.
+
+    fit_intercept : bool, optional (default=True)
+        Whether to fit an intercept.
+
+    max_iter : int, optional (default=25)
+        The maximum number of IRLS iterations, and of step
+        halvings within each iteration.
+
+    tol : float, optional (default=1e-8)
+        The convergence tolerance. As in R's ``glm``, the fit has converged
+        when ``|dev - dev_old| / (|dev| + 0.1) < tol``.
+
+    qr_tol : float, optional (default=1e-7)
+        The tolerance for detecting linearly dependent columns
+        (see ``skutil.odr.qr_decomposition``).
+
+    chunk_size : int, optional (default=None)
+        If not None, each iteration factors the rows in chunks of this
+        many rows (see ``skutil.odr.QRDecomposition.update``), which requires
+        O(chunk_size * n_features) memory for the factorization, rather
+        than O(n_samples * n_features). The features must still fit in
+        memory, as must a few vectors of length n_samples.
+
+    verbose : int, optional (default=0)
+        The level of verbosity. If greater than 0, the deviance
+        and time of each iteration are printed.
+
+
+    Examples
+    --------
+
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> from skutil.linear_model import PoissonRegression
+        >>>
+        >>> rs = np.random.RandomState(42)
+        >>> X = pd.DataFrame.from_records(rs.rand(1000, 2), columns=['a', 'b'])
+        >>> exposure = rs.uniform(0.5, 2., 1000)
+        >>> y = rs.poisson(exposure * np.exp(1 + X.a.values))
+        >>> reg = PoissonRegression().fit(X, y, offset=np.log(exposure))
+        >>> assert reg.converged_
+
+
+    Attributes
+    ----------
+
+    coef_ : np.ndarray, shape=(n_features,)
+        The coefficients of the linear predictor. Aliased columns have a coefficient of 0.
+
+    intercept_ : float
+        The intercept (0 if ``fit_intercept`` is False).
+
+    rank_ : int
+        The rank of the design matrix (including the intercept).
+
+    aliased_ : list
+        The names of the aliased (linearly dependent) columns.
+
+    deviance_ : float
+        The deviance of the fit model.
+
+    deviance_path_ : list
+        The deviance after each iteration.
+
+    iteration_times_ : list
+        The time (in seconds) taken by each iteration.
+
+    n_iter_ : int
+        The number of iterations.
+
+    converged_ : bool
+        Whether the fit converged.
+    """
+
+    def _get_power(self):
+        return 1.
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import print_function, division, absolute_import
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.utils import check_array
+from sklearn.utils.validation import check_is_fitted
+from skutil.base import SelectiveMixin
+from skutil.odr import QRDecomposition
+from ..utils import validate_is_pd, is_integer
+from ..utils.fixes import _cols_if_none
+
+__all__ = [
+    'QRLinearRegression'
+]
+
+
+def _check_weights(sample_weight, n_samples):
+    """Validate the sample weights and return their square roots"""
+    if sample_weight is None:
+        return None
+
+    sample_weight = check_array(sample_weight, dtype=np.double, ensure_2d=False)
+    if sample_weight.shape != (n_samples,):
+        raise ValueError('sample_weight must have shape (%i,), but got %r' % (n_samples, sample_weight.shape))
+    if (sample_weight < 0).any():
+        raise ValueError('sample_weight must be non-negative')
+    return np.sqrt(sample_weight)
+
+
+def _design_matrix(x, y, sample_weight, fit_intercept):
+    """Build the (weighted) design matrix and response matrix
+    for a chunk of rows. The intercept is the first column.
+    """
+    n_samples = x.shape[0]
+    y = check_array(y, dtype=np.double, ensure_2d=False)
+    if y.shape[0] != n_samples:
+        raise ValueError('X and y must have the same number of rows')
+
+    A = np.empty((n_samples, x.shape[1] + int(fit_intercept)), dtype=np.double, order='F')
+    if fit_intercept:
+        A[:, 0] = 1.
+    A[:, int(fit_intercept):] = x
+
+    sqrt_w = _check_weights(sample_weight, n_samples)
+    if sqrt_w is not None:
+        A *= sqrt_w[:, np.newaxis]
+        y = y * (sqrt_w if y.ndim == 1 else sqrt_w[:, np.newaxis])
+
+    return A, y
+
+
+def _split_coef(decomp, feature_names, fit_intercept):
+    """Get the intercept, coefficients, rank and aliased column
+    names from a decomposition of a design matrix which tracks
+    the response(s), where the intercept is the first column.
+    """
+    coef = decomp.get_response_coef()
+    i = int(fit_intercept)
+
+    intercept = coef[0] if i else (0. if coef.ndim == 1 else np.zeros(coef.shape[1]))
+    rank = decomp.get_rank()
+    aliased = decomp.pivot[rank:] - i
+
+    return intercept, coef[i:].T, rank, np.asarray(feature_names)[aliased[aliased >= 0]].tolist()
+
+
+class QRLinearRegression(BaseEstimator, RegressorMixin, SelectiveMixin):
+    """Ordinary (or weighted) least squares regression, solved with the
+    pivoted QR decomposition of ``skutil.odr``. As in R's ``lm``, columns that
+    are (numerically) linear combinations of the preceding columns are aliased:
+    they are excluded from the fit, and their coefficients are set to 0, so
+    rank deficient frames are handled safely. Multiple targets share a single
+    factorization, and the rows may be fit in chunks (see ``chunk_size``
+    and ``partial_fit``), in which case only the R factor is kept in memory.
+
+    Parameters
+    ----------
+
+    cols : array_like, shape=(n_features,), optional (default=None)
+        The names of the columns to use as features. If no column
+        names are provided, all of the columns are used.
+
+    fit_intercept : bool, optional (default=True)
+        Whether to fit an intercept. The intercept is the first
+        column of the design matrix, so it is never aliased.
+
+    tol : float, optional (default=1e-7)
+        The tolerance for detecting linearly dependent columns
+        (see ``skutil.odr.qr_decomposition``).
+
+    chunk_size : int, optional (default=None)
+        If not None, ``fit`` factors the rows in chunks of this many
+        rows (see ``partial_fit``), which requires O(chunk_size * n_features)
+        memory for the factorization, rather than O(n_samples * n_features).
+
+
+    Examples
+    --------
+
+        >>> from skutil.linear_model import QRLinearRegression
+        >>> from skutil.utils import load_iris_df
+        >>>
+        >>> X = load_iris_df(include_tgt=False)
+        >>> y = X.pop('petal width (cm)')
+        >>> reg = QRLinearRegression().fit(X, y)
+        >>> assert reg.coef_.shape == (3,)
+
+
+    Attributes
+    ----------
+
+    coef_ : np.ndarray, shape=(n_features,) or (n_targets, n_features)
+        The regression coefficients. Aliased columns have a coefficient of 0.
+
+    intercept_ : float or np.ndarray, shape=(n_targets,)
+        The intercept (0 if ``fit_intercept`` is False).
+
+    rank_ : int
+        The rank of the design matrix (including the intercept).
+
+    aliased_ : list
+        The names of the aliased (linearly dependent) columns.
+
+    n_samples_seen_ : int
+        The number of rows the model has been fit on.
+
+    decomposition_ : ``skutil.odr.QRDecomposition``
+        The decomposition of the (weighted) design matrix,
+        which tracks the (weighted) responses.
+    """
+
+    def __init__(self, cols=None, fit_intercept=True, tol=1e-7, chunk_size=None):
+        self.cols = cols
+        self.fit_intercept = fit_intercept
+        self.tol = tol
+        self.chunk_size = chunk_size
+
+    def fit(self, X, y, sample_weight=None):
+        """Fit the linear model.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The Pandas frame to fit. The model will only be fit
+            on the prescribed ``cols`` (see ``__init__``) or all
+            of them if ``cols`` is None.
+
+        y : array_like, shape=(n_samples,) or (n_samples, n_targets)
+            The target(s).
+
+        sample_weight : array_like, shape=(n_samples,), optional (default=None)
+            Non-negative weights for each row.
+
+        Returns
+        -------
+
+        self
+        """
+        chunk_size = self.chunk_size
+        if chunk_size is not None and (not is_integer(chunk_size) or chunk_size < 1):
+            raise ValueError('chunk_size must be a positive int, but got %s' % str(chunk_size))
+
+        # a full fit discards any incremental state
+        if hasattr(self, 'decomposition_'):
+            del self.decomposition_
+
+        if chunk_size is None:
+            return self.partial_fit(X, y, sample_weight)
+
+        y = np.asarray(y)
+        w = None if sample_weight is None else np.asarray(sample_weight)
+        n_samples = X.shape[0]
+        for start in range(0, n_samples, chunk_size):
+            rows = slice(start, min(start + chunk_size, n_samples))
+            chunk = X.iloc[rows] if isinstance(X, pd.DataFrame) else X[rows]
+            self.partial_fit(chunk, y[rows], None if w is None else w[rows])
+
+        return self
+
+    def partial_fit(self, X, y, sample_weight=None):
+        """Incrementally fit the linear model on a chunk of rows. The
+        R factor of the design matrix (and the projection of the targets)
+        is updated with each chunk (see ``skutil.odr.QRDecomposition.update``),
+        so the full frame is never factored at once.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The chunk of rows to fit. Each chunk must have the same columns.
+
+        y : array_like, shape=(n_samples,) or (n_samples, n_targets)
+            The target(s) of the chunk.
+
+        sample_weight : array_like, shape=(n_samples,), optional (default=None)
+            Non-negative weights for each row.
+
+        Returns
+        -------
+
+        self
+        """
+        X, self.cols = validate_is_pd(X, self.cols, assert_all_finite=True)
+        cols = _cols_if_none(X, self.cols)
+        A, y = _design_matrix(X[cols].as_matrix(), y, sample_weight, self.fit_intercept)
+
+        if hasattr(self, 'decomposition_'):
+            if len(cols) != len(self.feature_names_):
+                raise ValueError('expected %i features, but got %i' % (len(self.feature_names_), len(cols)))
+            self.decomposition_.update(A, y)
+            self.n_samples_seen_ += A.shape[0]
+        else:
+            self.decomposition_ = QRDecomposition(A, pivot=1, tol=self.tol, Y=y)
+            self.decomposition_.update(A[:0], y[:0])  # keep only R, rather than the Q factor of the rows
+            self.feature_names_ = list(cols)
+            self.n_samples_seen_ = A.shape[0]
+
+        self._set_coef()
+        return self
+
+    def _set_coef(self):
+        self.intercept_, self.coef_, self.rank_, self.aliased_ = _split_coef(
+            self.decomposition_, self.feature_names_, self.fit_intercept)
+
+    def predict(self, X):
+        """Predict the target(s) of a frame.
+
+        Parameters
+        ----------
+
+        X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+            The Pandas frame to predict.
+
+        Returns
+        -------
+
+        y : np.ndarray, shape=(n_samples,) or (n_samples, n_targets)
+            The predictions
+        """
+        check_is_fitted(self, 'coef_')
+        X, _ = validate_is_pd(X, self.cols)
+        cols = _cols_if_none(X, self.cols)
+        return np.dot(X[cols].as_matrix(), self.coef_.T) + self.intercept_
@@ -0,0 +1,87 @@
+from __future__ import print_function, division
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.testing import (assert_array_almost_equal, assert_almost_equal)
+from skutil.linear_model import *
+from skutil.utils.tests import assert_fails
+
+# Def data for testing
+rs = np.random.RandomState(42)
+X = pd.DataFrame.from_records(data=rs.rand(2000, 3), columns=['a', 'b', 'c'])
+exposure = rs.uniform(0.5, 2., 2000)
+eta = 0.5 + X.a.values - 2 * X.b.values
+
+
+def _score(reg, y, mu, power, w=1.):
+    # at the MLE, the score equations for the log link are zero
+    A = np.hstack((np.ones((X.shape[0], 1)), X.values))
+    return np.dot(A.T, w * (y - mu) * np.power(mu, 1 - power))
+
+
+def test_poisson_regression():
+    y = rs.poisson(exposure * np.exp(eta))
+    offset = np.log(exposure)
+
+    reg = PoissonRegression().fit(X, y, offset=offset)
+    mu = reg.predict(X, offset=offset)
+    assert reg.converged_
+    assert np.abs(_score(reg, y, mu, 1.)).max() < 1e-4
+    assert_array_almost_equal(reg.coef_, [1., -2., 0.], 1)
+    assert len(reg.iteration_times_) == len(reg.deviance_path_) == reg.n_iter_
+    assert_almost_equal(reg.deviance_path_[-1], reg.deviance_)
+
+    # the same fit in chunks
+    chunked = PoissonRegression(chunk_size=300).fit(X, y, offset=offset)
+    assert_array_almost_equal(chunked.coef_, reg.coef_)
+    assert_almost_equal(chunked.intercept_, reg.intercept_)
+
+    # weights, and linearly dependent columns
+    w = rs.rand(2000)
+    Z = X.copy()
+    Z['d'] = Z.a + Z.b
+    reg = PoissonRegression().fit(Z, y, sample_weight=w, offset=offset)
+    assert reg.aliased_ == ['d'] and reg.coef_[-1] == 0.
+    assert np.abs(_score(reg, y, reg.predict(Z, offset=offset), 1., w)).max() < 1e-4
+
+
+def test_tweedie_regression():
+    mu = np.exp(eta)
+    gamma = rs.gamma(2., mu / 2.)
+    tweedie = rs.poisson(mu) * gamma  # a compound poisson-gamma (with zeros)
+
+    for power, y in ((0, mu + rs.normal(scale=0.1, size=2000)), (1.5, tweedie), (2, gamma), (3, gamma)):
+        reg = TweedieRegression(power=power, tol=1e-12).fit(X, y)
+        assert reg.converged_, power
+        assert np.abs(_score(reg, y, reg.predict(X), power)).max() < 1e-4, power
+
+    # bad powers and targets
+    assert_fails(TweedieRegression(power=0.5).fit, ValueError, X, gamma)
+    assert_fails(TweedieRegression(power=2).fit, ValueError, X, tweedie)
+    assert_fails(PoissonRegression().fit, ValueError, X, -gamma)
+    assert_fails(PoissonRegression().fit, ValueError, X, gamma, None, np.ones(3))
+    assert_fails(PoissonRegression(chunk_size=0).fit, ValueError, X, gamma)
+
+    # not converging warns
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter('always')
+        assert not TweedieRegression(max_iter=1).fit(X, gamma).converged_
+    not_converged = [x for x in w if issubclass(x.category, UserWarning) and 'did not converge' in str(x.message)]
+    assert len(not_converged) == 1
+
+    # heavy-tailed features make the first steps diverge, which step halving recovers from
+    rng = np.random.RandomState(2)
+    W = pd.DataFrame.from_records(data=rng.standard_cauchy((200, 1)), columns=['a'])
+    v = rng.poisson(np.exp(np.clip(0.1 * W.a.values, -5, 5))) + 1.
+    reg = TweedieRegression(power=3, max_iter=100).fit(W, v)
+    assert reg.converged_
+    assert np.all(np.diff(reg.deviance_path_) <= 1e-8 * np.abs(reg.deviance_path_[1:]))
+
+    # (at a minimum of the deviance)
+    def deviance(intercept, coef):
+        mu = np.exp(intercept + coef * W.a.values)
+        return 2 * np.sum(np.power(v, -1) / 2. - v * np.power(mu, -2) / -2. + np.power(mu, -1) / -1.)
+
+    assert_almost_equal(deviance(reg.intercept_, reg.coef_[0]), reg.deviance_)
+    for step in ((1e-3, 0), (-1e-3, 0), (0, 1e-3), (0, -1e-3)):
+        assert deviance(reg.intercept_ + step[0], reg.coef_[0] + step[1]) > reg.deviance_
@@ -0,0 +1,75 @@
+from __future__ import print_function, division
+import numpy as np
+from numpy.testing import (assert_array_almost_equal, assert_almost_equal)
+from skutil.linear_model import *
+from skutil.utils import load_iris_df
+from skutil.utils.tests import assert_fails
+
+# Def data for testing
+iris = load_iris_df(include_tgt=False)
+
+
+def _lstsq(X, y, w=None):
+    A = np.hstack((np.ones((X.shape[0], 1)), X))
+    if w is not None:
+        A, y = A * np.sqrt(w)[:, np.newaxis], (y.T * np.sqrt(w)).T
+    return np.linalg.lstsq(A, y, rcond=None)[0]
+
+
+def test_qr_linear_regression():
+    X = iris.copy()
+    y = X.pop('petal width (cm)')
+    x, expected = X.as_matrix(), _lstsq(X.as_matrix(), y.values)
+
+    reg = QRLinearRegression().fit(X, y)
+    assert_almost_equal(reg.intercept_, expected[0])
+    assert_array_almost_equal(reg.coef_, expected[1:])
+    assert_array_almost_equal(reg.predict(X), np.dot(x, expected[1:]) + expected[0])
+    assert reg.rank_ == 4 and not reg.aliased_
+    assert reg.n_samples_seen_ == 150
+    assert reg.score(X, y) > 0.9
+
+    # only the selected columns are used
+    reg = QRLinearRegression(cols=['sepal length (cm)'], fit_intercept=False).fit(X, y)
+    assert reg.coef_.shape == (1,) and reg.intercept_ == 0.
+
+    # multiple targets, with weights, in chunks
+    Y = iris[['petal width (cm)', 'petal length (cm)']].values
+    x = iris[['sepal length (cm)', 'sepal width (cm)']]
+    w = np.random.RandomState(42).rand(150)
+    expected = _lstsq(x.as_matrix(), Y, w)
+    for chunk_size in (None, 1, 40):
+        reg = QRLinearRegression(chunk_size=chunk_size).fit(x, Y, sample_weight=w)
+        assert reg.coef_.shape == (2, 2)
+        assert_array_almost_equal(reg.intercept_, expected[0])
+        assert_array_almost_equal(reg.coef_, expected[1:].T)
+
+    # integer weights are repeated rows
+    w = np.arange(150) % 3
+    reg = QRLinearRegression().fit(x, Y[:, 0], sample_weight=w)
+    rep = QRLinearRegression().fit(x.iloc[np.repeat(np.arange(150), w)], np.repeat(Y[:, 0], w))
+    assert_array_almost_equal(reg.coef_, rep.coef_)
+
+    # incrementally, over chunks
+    reg = QRLinearRegression()
+    for i in range(0, 150, 50):
+        reg.partial_fit(X.iloc[i:i + 50], y.values[i:i + 50])
+    assert reg.n_samples_seen_ == 150
+    assert_array_almost_equal(reg.coef_, QRLinearRegression().fit(X, y).coef_)
+    assert_fails(reg.partial_fit, ValueError, X.iloc[:, :2], y)
+    assert reg.fit(X, y).n_samples_seen_ == 150  # fit resets the incremental state
+
+    # linear combos are aliased, and the fit is unchanged
+    Z = X.copy()
+    Z['combo'] = Z['sepal length (cm)'] + 2 * Z['petal length (cm)']
+    reg = QRLinearRegression().fit(Z, y)
+    assert reg.rank_ == 4
+    assert reg.aliased_ == ['combo']
+    assert reg.coef_[-1] == 0.
+    assert_array_almost_equal(reg.predict(Z), QRLinearRegression().fit(X, y).predict(X))
+
+    # bad weights, bad chunk size, mismatched rows
+    assert_fails(QRLinearRegression().fit, ValueError, X, y, -np.ones(150))
+    assert_fails(QRLinearRegression().fit, ValueError, X, y, np.ones(10))
+    assert_fails(QRLinearRegression(chunk_size=0).fit, ValueError, X, y)
+    assert_fails(QRLinearRegression().fit, ValueError, X, y.values[:10])
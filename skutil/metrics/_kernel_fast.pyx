@@ -3,7 +3,6 @@
 #cython: wraparound=False
 
 from libc.string cimport memset
-from libc.math cimport pow
 import numpy as np
 cimport numpy as np
 
@@ -24,33 +23,69 @@ cdef fused floating_array_2d_t:
 np.import_array()
 
 
-def _hilbert_matrix_fast(floating_array_2d_t X,
-                        floating_array_2d_t Y,
-                        floating_array_2d_t res,
-                        FLOAT scalar):
-    cdef INTP i, j, k
-    cdef double sxy, sx, sy
-    cdef INTP n_samples_X = X.shape[0]
-    cdef INTP n_features_X= X.shape[1]
-    cdef INTP n_features_Y= Y.shape[1]
+def _hilbert_matrix_fast(floating_array_2d_t res,
+                        floating1d x_sq,
+                        floating1d y_sq,
+                        double scalar):
+    # ``res`` holds the cross term (X * Y^T) from the BLAS matrix multiply
+    # and is overwritten in place with ``scalar * (2 * <x,y> - <x,x> - <y,y>)``
+    # using the squared row norms, which are only computed once per row.
+    cdef INTP i, j
+    cdef double d
+    cdef INTP n_samples_X = res.shape[0]
+    cdef INTP n_samples_Y = res.shape[1]
 
     with nogil:
         for i in range(n_samples_X):
-            for j in range(n_features_Y):
-                sx = 0 # reset for every xi
-                sy = 0 # reset for every yi... might be a better way to keep track of this?
-                sxy = 0 # reset for every unique XiYi combo
-                for k in range(n_features_X): # k also equals the number of rows in Y
-                    sx += X[i, k] * X[i, k]
-                    sy += Y[k, j] * Y[k, j]
-                    sxy += X[i, k] * Y[k, j]
+            for j in range(n_samples_Y):
+                d = (2 * res[i, j]) - x_sq[i] - y_sq[j]
+
+                # this is a negative squared distance, but rounding in the
+                # cross term can push it (very slightly) above zero
+                if d > 0:
+                    d = 0
+
+                res[i, j] = d * scalar
+
+
+def _hilbert_matrix_sym_fast(floating_array_2d_t res,
+                            floating1d x_sq,
+                            double scalar):
+    # the symmetric (Y is X) version of ``_hilbert_matrix_fast``. Only the
+    # upper triangle of ``res`` (from the BLAS rank-k update) is read, and
+    # each result is written to both triangles.
+    cdef INTP i, j
+    cdef double d
+    cdef INTP n_samples = res.shape[0]
+
+    with nogil:
+        for i in range(n_samples):
+            # the distance from a row to itself is exactly zero
+            res[i, i] = 0
+
+            for j in range(i + 1, n_samples):
+                d = (2 * res[i, j]) - x_sq[i] - x_sq[j]
+                if d > 0:
+                    d = 0
 
-                res[i, j] = ((2 * sxy) - sx - sy) * scalar
+                res[i, j] = d * scalar
+                res[j, i] = res[i, j]
 
 
-def _hilbert_dot_fast(np.ndarray[np.float_t, ndim=1, mode='c'] x,
-                    np.ndarray[np.float_t, ndim=1, mode='c'] y,
-                    FLOAT scalar):
+def _symmetrize_fast(floating_array_2d_t res):
+    # copy the upper triangle of the square ``res`` into the lower triangle
+    cdef INTP i, j
+    cdef INTP n_samples = res.shape[0]
+
+    with nogil:
+        for i in range(n_samples):
+            for j in range(i + 1, n_samples):
+                res[j, i] = res[i, j]
+
+
+def _hilbert_dot_fast(floating1d x,
+                    floating1d y,
+                    double scalar):
     cdef int i
     cdef double s1 = 0, s2 = 0, s3 = 0 # initialize the sums
     cdef int len_x = x.shape[0]
@@ -64,42 +99,89 @@ def _hilbert_dot_fast(np.ndarray[np.float_t, ndim=1, mode='c'] x,
     return scalar * (2 * s1 - s2 - s3)
 
 
+cdef inline double _spline_term(double a, double b) nogil:
+    # one feature's term of the spline kernel product
+    cdef double min_el
+
+    # get the min between the two
+    if a < b:
+        min_el = a
+    else:
+        min_el = b
+
+    # compute the three parts
+    return ((a * b * (min_el + 1) + 1)
+            - ((a + b) / 2.0) * (min_el * min_el)
+            + (min_el * min_el * min_el) / 3.0)
+
+
 def _spline_kernel_fast(floating_array_2d_t X, 
                         floating_array_2d_t Y,
-                        floating_array_2d_t res):
+                        floating_array_2d_t res,
+                        bint symmetric=False):
+    # if ``symmetric`` (Y is X), only the upper triangle
+    # is computed, and it is mirrored into the lower triangle
     cdef int i, j, k
     cdef int m = X.shape[0]
     cdef int n = X.shape[1]
-    cdef int n_features_Y = Y.shape[1]
-    cdef double prod, front, mid, back, a, b, min_el
+    cdef int n_samples_Y = Y.shape[0]
+    cdef double prod
 
     with nogil:
         for i in range(m):
-            for j in range(n_features_Y):
+            for j in range(i if symmetric else 0, n_samples_Y):
 
                 ## Reinitialize this for each vector dot
                 prod = 1
 
                 for k in range(n):
-                    a = X[i, k] # the element in the X matrix
-                    b = Y[j, k] # the element in the Y matrix
-
-                    # get the min between the two
-                    if a < b:
-                        min_el = a
-                    else:
-                        min_el = b
-
-                    # compute the three parts
-                    front = a * b * (min_el + 1)
-                    mid = ((a + b) / 2.0) * (min_el * min_el)
-                    back = pow(min_el, 3) / 3.0
-                    prod *= (((front + 1) - mid) + back)
+                    prod *= _spline_term(X[i, k], Y[j, k])
 
                 ## assign to output matrix
                 res[i, j] = prod
+                if symmetric:
+                    res[j, i] = prod
+
+
+def _spline_kernel_sparse_fast(floating1d X_data,
+                               INTP[::1] X_indices,
+                               INTP[::1] X_indptr,
+                               floating1d Y_data,
+                               INTP[::1] Y_indices,
+                               INTP[::1] Y_indptr,
+                               floating_array_2d_t res,
+                               bint symmetric=False):
+    # X and Y are CSR matrices with sorted indices. Since the term for
+    # a feature that is zero in both rows is exactly 1, only the union
+    # of each pair of rows' non-zero features contributes to the product.
+    # As in the dense version, ``symmetric`` computes only the upper triangle.
+    cdef INTP i, j, p, q, p_end, q_end
+    cdef INTP m = X_indptr.shape[0] - 1
+    cdef INTP n_samples_Y = Y_indptr.shape[0] - 1
+    cdef double prod, a, b
 
+    with nogil:
+        for i in range(m):
+            for j in range(i if symmetric else 0, n_samples_Y):
+                prod = 1
+                p, p_end = X_indptr[i], X_indptr[i + 1]
+                q, q_end = Y_indptr[j], Y_indptr[j + 1]
+
+                ## merge the two sorted rows
+                while p < p_end or q < q_end:
+                    if q == q_end or (p < p_end and X_indices[p] < Y_indices[q]):
+                        a, b = X_data[p], 0
+                        p += 1
+                    elif p == p_end or Y_indices[q] < X_indices[p]:
+                        a, b = 0, Y_data[q]
+                        q += 1
+                    else:
+                        a, b = X_data[p], Y_data[q]
+                        p += 1
+                        q += 1
 
+                    prod *= _spline_term(a, b)
 
-
-
+                res[i, j] = prod
+                if symmetric:
+                    res[j, i] = prod
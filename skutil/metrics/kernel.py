@@ -1,15 +1,24 @@
 from __future__ import print_function
 import numpy as np
+import scipy.sparse as sp
 import warnings
-from skutil import exp
-from sklearn.metrics.pairwise import (check_pairwise_arrays,
-                                      linear_kernel as lk)
-from ._kernel_fast import (_hilbert_dot_fast, _hilbert_matrix_fast, _spline_kernel_fast)
+from skutil.utils.util import _exp_array, _get_n_jobs
+from sklearn.utils import check_array, gen_batches, gen_even_slices
+from sklearn.externals.joblib import Parallel, delayed
+from sklearn.utils.extmath import row_norms, safe_sparse_dot
+from sklearn.externals import six
+from scipy.linalg.blas import get_blas_funcs
+from skutil.utils import is_integer
+from ._kernel_fast import (_hilbert_dot_fast, _hilbert_matrix_fast, _hilbert_matrix_sym_fast,
+                           _spline_kernel_fast, _spline_kernel_sparse_fast, _symmetrize_fast)
 
 __all__ = [
+    'blocked_kernel',
     'exponential_kernel',
     'gaussian_kernel',
+    'HilbertDistanceCache',
     'inverse_multiquadric_kernel',
+    'KernelReferenceSet',
     'laplace_kernel',
     'linear_kernel',
     'multiquadric_kernel',
@@ -17,39 +26,239 @@ __all__ = [
     'power_kernel',
     'rbf_kernel',
     'spline_kernel',
-    'tanh_kernel'
+    'tanh_kernel',
+    'PAIRWISE_KERNEL_FUNCTIONS'
 ]
 
 
-def _div(num, div):
+def _div(num, div, out=None):
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
 
         # do division operation -- might throw runtimewarning
-        return num / div
+        return np.divide(num, div, out=out)
 
 
-def _prep_X_Y_for_cython(X, Y):
-    X, Y = check_pairwise_arrays(X, Y)
-    X, Y = X.astype(np.double, order='C'), Y.astype(np.double, order='C').T  # transposing Y here!
-    res = np.zeros((X.shape[0], Y.shape[1]), dtype=X.dtype)
+def _float_dtype(X, Y, dtype):
+    """Get the floating point precision in which to compute a kernel.
+    If ``dtype`` is None, single precision is only preserved if both
+    ``X`` and ``Y`` are float32 (``Y`` is ignored if it's None).
+    """
+    if dtype is None:
+        arrays = (X,) if Y is None else (X, Y)
+        single = all(getattr(a, 'dtype', None) == np.float32 for a in arrays)
+        return np.dtype(np.float32 if single else np.float64)
+
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError('dtype must be one of (float32, float64), but got %s' % str(dtype))
+    return dtype
+
+
+def _check_array(X, dtype):
+    # sparse matrices are kept sparse (as CSR), and duplicate
+    # entries are summed so each row's indices are unique and sorted.
+    # The scalar type is passed, as older sklearns compare dtype to "numeric"
+    X = check_array(X, accept_sparse='csr', dtype=np.dtype(dtype).type, order='C')
+    if sp.issparse(X) and not X.has_canonical_format:
+        X = X.copy()
+        X.sum_duplicates()
+    return X
+
+
+def _check_pairwise_arrays(X, Y, dtype=None):
+    """Adapted from sklearn's ``check_pairwise_arrays``, but only casts
+    ``X`` and ``Y`` (without copying, if possible) to the precision
+    given by ``_float_dtype``, rather than always upcasting to float64.
+    Sparse input is converted to CSR, but never densified.
+    """
+    dtype = _float_dtype(X, Y, dtype)
+
+    if Y is None or Y is X:
+        X = Y = _check_array(X, dtype)
+    else:
+        X = _check_array(X, dtype)
+        Y = _check_array(Y, dtype)
+
+    if X.shape[1] != Y.shape[1]:
+        raise ValueError('Incompatible dimension for X and Y matrices: '
+                         'X.shape[1] == %d while Y.shape[1] == %d' % (X.shape[1], Y.shape[1]))
+    return X, Y
+
+
+def _prep_X_Y_for_cython(X, Y, dtype=None):
+    X, Y = _check_pairwise_arrays(X, Y, dtype)
+    res = np.empty((X.shape[0], Y.shape[0]), dtype=X.dtype)
     return X, Y, res
 
 
+def _as_intp(a):
+    # CSR index arrays may be int32 or int64
+    return np.asarray(a, dtype=np.intp)
+
+
 # Cython proxies
 def _hilbert_dot(x, y, scalar=1.0):
     # return ``2 * safe_sparse_dot(x, y) - safe_sparse_dot(x, x.T) - safe_sparse_dot(y, y.T)``
-    x, y = x.astype(np.double, order='C'), y.astype(np.double, order='C')
+    dtype = _float_dtype(x, y, None)
+    x, y = np.asarray(x, dtype=dtype, order='C'), np.asarray(y, dtype=dtype, order='C')
     return _hilbert_dot_fast(x, y, scalar)
 
 
-def _hilbert_matrix(X, Y=None, scalar=1.0):
-    X, Y, res = _prep_X_Y_for_cython(X, Y)
-    _hilbert_matrix_fast(X, Y, res, np.double(scalar))
+def _sq_norms(X):
+    # the squared row norms, in the precision of X (for sparse
+    # X, some versions of sklearn always return float64)
+    return row_norms(X, squared=True).astype(X.dtype, copy=False)
+
+
+def _syrk(X):
+    """Compute the upper triangle of the (C-ordered) ``X * X^T`` with a
+    BLAS rank-k update (syrk), which takes half the flops of a gemm.
+    The lower triangle is left unset.
+    """
+    syrk = get_blas_funcs('syrk', (X,))
+
+    # X^T is the Fortran-ordered view of X, so it is never copied. The
+    # Fortran-ordered lower triangle is the C-ordered upper triangle.
+    return syrk(alpha=1.0, a=X.T, trans=1, lower=1).T
+
+
+def _hilbert_matrix(X, Y=None, scalar=1.0, dtype=None):
+    X, Y = _check_pairwise_arrays(X, Y, dtype)
+
+    # the row norms are computed only once per row, and the
+    # cross term is a single BLAS matrix multiply (gemm), or
+    # a sparse product if either matrix is sparse
+    x_sq = _sq_norms(X)
+    y_sq = x_sq if Y is X else _sq_norms(Y)
+    if Y is X:
+        # the symmetric case only computes the upper triangle
+        if sp.issparse(X):
+            res = np.ascontiguousarray(safe_sparse_dot(X, X.T, dense_output=True), dtype=X.dtype)
+        else:
+            res = _syrk(X)
+        _hilbert_matrix_sym_fast(res, x_sq, np.double(scalar))
+        return res
+    elif sp.issparse(X) or sp.issparse(Y):
+        res = np.ascontiguousarray(safe_sparse_dot(X, Y.T, dense_output=True), dtype=X.dtype)
+    else:
+        res = np.empty((X.shape[0], Y.shape[0]), dtype=X.dtype)
+        np.dot(X, Y.T, out=res)
+
+    # combine the terms in place: scalar * (2 * <x,y> - <x,x> - <y,y>)
+    _hilbert_matrix_fast(res, x_sq, y_sq, np.double(scalar))
     return res
 
 
-def exponential_kernel(X, Y=None, sigma=1.0):
+# Each of the Hilbert-space kernels is an elementwise function of the
+# (negative, squared) distance matrix returned by ``_hilbert_matrix``. These
+# transform the distance matrix, ``c``, in place (which also preserves its dtype).
+def _exponential_from_hilbert(c, sigma=1.0):
+    c *= -0.5 * np.power(sigma, 2)
+    return _exp_array(c, out=c)
+
+
+def _gaussian_from_hilbert(c, sigma=1.0):
+    np.power(c, 2.0, out=c)
+    c *= -0.5 * np.power(sigma, 2)
+    return _exp_array(c, out=c)
+
+
+def _laplace_from_hilbert(c, sigma=1.0):
+    c *= -1.0 / sigma
+    return _exp_array(c, out=c)
+
+
+def _multiquadric_from_hilbert(c, constant=0.0):
+    np.power(c, 2.0, out=c)
+    c += np.power(constant, 2.0)
+    np.sqrt(c, out=c)
+    return c
+
+
+def _inverse_multiquadric_from_hilbert(c, constant=1.0):
+    c = _multiquadric_from_hilbert(c, constant)
+    return _div(1.0, c, out=c)
+
+
+def _power_from_hilbert(c, degree=1.0):
+    np.power(c, degree, out=c)
+    np.negative(c, out=c)
+    return c
+
+
+def _rbf_from_hilbert(c, sigma=1.0):
+    c *= sigma
+    return _exp_array(c, out=c)
+
+
+# Likewise, the dot-product kernels are elementwise functions of
+# the inner product matrix, ``c``, and transform it in place.
+def _linear_from_dot(c, constant=0.0):
+    c += constant
+    return c
+
+
+def _polynomial_from_dot(c, alpha=1.0, degree=1.0, constant=1.0):
+    c *= alpha
+    c += constant
+    np.power(c, degree, out=c)
+    return c
+
+
+def _tanh_from_dot(c, constant=0.0, alpha=1.0):
+    c *= alpha
+    c += constant
+    np.tanh(c, out=c)
+    return c
+
+
+def _fill_tile(res, batch, kernel, X, Y, kwargs):
+    # each thread writes to its own rows of the shared result
+    res[batch] = kernel(X[batch], Y, **kwargs)
+
+
+def _fill_sym_tile(res, batch, kernel, X, kwargs):
+    # each thread writes to its own rows of the upper triangle
+    res[batch, batch.start:] = kernel(X[batch], X[batch.start:], **kwargs)
+
+
+def _triangular_slices(n, n_jobs):
+    """Generate slices of the rows of an ``(n, n)`` matrix such
+    that each covers an even share of its upper triangle.
+    """
+    bounds = [int(round(n * (1.0 - np.sqrt(1.0 - float(k) / n_jobs)))) for k in range(n_jobs + 1)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end > start:
+            yield slice(start, end)
+
+
+def _parallel_kernel(kernel, X, Y, n_jobs, dtype, **kwargs):
+    """Compute a kernel in ``n_jobs`` threads, each of which computes
+    an even block of rows of the kernel matrix. The Cython routines and
+    BLAS both release the GIL, so the blocks are computed concurrently.
+    """
+    n_jobs = _get_n_jobs(n_jobs)
+    X, Y = _check_pairwise_arrays(X, Y, dtype)
+    res = np.empty((X.shape[0], Y.shape[0]), dtype=X.dtype)
+
+    # if the kernel matrix is symmetric, only the upper triangle is computed
+    if Y is X:
+        Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(_fill_sym_tile)(res, batch, kernel, X, kwargs)
+            for batch in _triangular_slices(X.shape[0], n_jobs))
+
+        _symmetrize_fast(res)
+        return res
+
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_fill_tile)(res, batch, kernel, X, Y, kwargs)
+        for batch in gen_even_slices(X.shape[0], n_jobs))
+
+    return res
+
+
+def exponential_kernel(X, Y=None, sigma=1.0, n_jobs=1, dtype=None):
     """The ``exponential_kernel`` is closely related to the ``gaussian_kernel``, 
     with only the square of the norm left out. It is also an ``rbf_kernel``. Note that
     the adjustable parameter, ``sigma``, plays a major role in the performance of the
@@ -65,12 +274,12 @@ def exponential_kernel(X, Y=None, sigma=1.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -78,6 +287,20 @@ def exponential_kernel(X, Y=None, sigma=1.0):
     sigma : float, optional (default=1.0)
         The exponential tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -90,11 +313,13 @@ def exponential_kernel(X, Y=None, sigma=1.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    c = exp(_hilbert_matrix(X, Y, scalar=-1.0) / 2 * np.power(sigma, 2))
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(exponential_kernel, X, Y, n_jobs, dtype, sigma=sigma)
+
+    return _exponential_from_hilbert(_hilbert_matrix(X, Y, dtype=dtype), sigma)
 
 
-def gaussian_kernel(X, Y=None, sigma=1.0):
+def gaussian_kernel(X, Y=None, sigma=1.0, n_jobs=1, dtype=None):
     """The ``gaussian_kernel`` is closely related to the ``exponential_kernel``.
     It is also an ``rbf_kernel``. Note that the adjustable parameter, ``sigma``, 
     plays a major role in the performance of the kernel and should be carefully 
@@ -110,12 +335,12 @@ def gaussian_kernel(X, Y=None, sigma=1.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -123,6 +348,20 @@ def gaussian_kernel(X, Y=None, sigma=1.0):
     sigma : float, optional (default=1.0)
         The exponential tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -135,11 +374,13 @@ def gaussian_kernel(X, Y=None, sigma=1.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    c = exp(-np.power(_hilbert_matrix(X, Y), 2.0) / 2 * np.power(sigma, 2))
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(gaussian_kernel, X, Y, n_jobs, dtype, sigma=sigma)
+
+    return _gaussian_from_hilbert(_hilbert_matrix(X, Y, dtype=dtype), sigma)
 
 
-def inverse_multiquadric_kernel(X, Y=None, constant=1.0):
+def inverse_multiquadric_kernel(X, Y=None, constant=1.0, n_jobs=1, dtype=None):
     """The ``inverse_multiquadric_kernel``, as with the ``gaussian_kernel``, 
     results in a kernel matrix with full rank (Micchelli, 1986) and thus forms 
     an infinite dimension feature space.
@@ -151,12 +392,12 @@ def inverse_multiquadric_kernel(X, Y=None, constant=1.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -164,6 +405,20 @@ def inverse_multiquadric_kernel(X, Y=None, constant=1.0):
     constant : float, optional (default=1.0)
         The linear tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -176,11 +431,13 @@ def inverse_multiquadric_kernel(X, Y=None, constant=1.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    c = _div(1.0, multiquadric_kernel(X, Y, constant))
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(inverse_multiquadric_kernel, X, Y, n_jobs, dtype, constant=constant)
 
+    return _inverse_multiquadric_from_hilbert(_hilbert_matrix(X, Y, dtype=dtype), constant)
 
-def laplace_kernel(X, Y=None, sigma=1.0):
+
+def laplace_kernel(X, Y=None, sigma=1.0, n_jobs=1, dtype=None):
     """The ``laplace_kernel`` is completely equivalent to the ``exponential_kernel``, 
     except for being less sensitive for changes in the ``sigma`` parameter. 
     Being equivalent, it is also an ``rbf_kernel``.
@@ -192,12 +449,12 @@ def laplace_kernel(X, Y=None, sigma=1.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -205,6 +462,20 @@ def laplace_kernel(X, Y=None, sigma=1.0):
     sigma : float, optional (default=1.0)
         The exponential tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -217,11 +488,13 @@ def laplace_kernel(X, Y=None, sigma=1.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    c = exp(_hilbert_matrix(X, Y, scalar=-1.0) / sigma)
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(laplace_kernel, X, Y, n_jobs, dtype, sigma=sigma)
 
+    return _laplace_from_hilbert(_hilbert_matrix(X, Y, dtype=dtype), sigma)
 
-def linear_kernel(X, Y=None, constant=0.0):
+
+def linear_kernel(X, Y=None, constant=0.0, n_jobs=1, dtype=None):
     """The ``linear_kernel`` is the simplest kernel function. It is 
     given by the inner product <x,y> plus an optional ``constant`` parameter. 
     Kernel algorithms using a linear kernel are often equivalent to their non-kernel 
@@ -234,12 +507,12 @@ def linear_kernel(X, Y=None, constant=0.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -247,6 +520,20 @@ def linear_kernel(X, Y=None, constant=0.0):
     constant : float, optional (default=0.0)
         The linear tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -259,11 +546,21 @@ def linear_kernel(X, Y=None, constant=0.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    c = lk(X, Y) + constant
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(linear_kernel, X, Y, n_jobs, dtype, constant=constant)
+
+    X, Y = _check_pairwise_arrays(X, Y, dtype)
+    if Y is X:
+        # the symmetric case only computes the upper triangle
+        # (the sparse product is full, but may not be exactly symmetric)
+        c = np.ascontiguousarray(safe_sparse_dot(X, X.T, dense_output=True)) if sp.issparse(X) else _syrk(X)
+        _symmetrize_fast(c)
+    else:
+        c = safe_sparse_dot(X, Y.T, dense_output=True)
+    return _linear_from_dot(c, constant)
 
 
-def multiquadric_kernel(X, Y=None, constant=0.0):
+def multiquadric_kernel(X, Y=None, constant=0.0, n_jobs=1, dtype=None):
     """The ``multiquadric_kernel`` can be used in the same situations 
     as the Rational Quadratic kernel. As is the case with the Sigmoid kernel, 
     it is also an example of an non-positive definite kernel.
@@ -275,12 +572,12 @@ def multiquadric_kernel(X, Y=None, constant=0.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -288,6 +585,20 @@ def multiquadric_kernel(X, Y=None, constant=0.0):
     constant : float, optional (default=0.0)
         The linear tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -300,13 +611,13 @@ def multiquadric_kernel(X, Y=None, constant=0.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    hs = _hilbert_matrix(X=X, Y=Y, scalar=1.0)
-    hs = np.power(hs, 2.0)
-    c = np.sqrt(hs + np.power(constant, 2.0))
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(multiquadric_kernel, X, Y, n_jobs, dtype, constant=constant)
+
+    return _multiquadric_from_hilbert(_hilbert_matrix(X, Y, dtype=dtype), constant)
 
 
-def polynomial_kernel(X, Y=None, alpha=1.0, degree=1.0, constant=1.0):
+def polynomial_kernel(X, Y=None, alpha=1.0, degree=1.0, constant=1.0, n_jobs=1, dtype=None):
     """The ``polynomial_kernel`` is a non-stationary kernel. Polynomial 
     kernels are well suited for problems where all the training data is normalized.
     Adjustable parameters are the slope (``alpha``), the constant term (``constant``), 
@@ -319,12 +630,12 @@ def polynomial_kernel(X, Y=None, alpha=1.0, degree=1.0, constant=1.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -338,6 +649,20 @@ def polynomial_kernel(X, Y=None, alpha=1.0, degree=1.0, constant=1.0):
     constant : float, optional (default=1.0)
         The linear tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -350,12 +675,15 @@ def polynomial_kernel(X, Y=None, alpha=1.0, degree=1.0, constant=1.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    lc = linear_kernel(X=X, Y=Y, constant=0.0)
-    c = np.power(lc * alpha + constant, degree)
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(polynomial_kernel, X, Y, n_jobs, dtype,
+                                alpha=alpha, degree=degree, constant=constant)
+
+    c = linear_kernel(X=X, Y=Y, constant=0.0, dtype=dtype)
+    return _polynomial_from_dot(c, alpha, degree, constant)
 
 
-def power_kernel(X, Y=None, degree=1.0):
+def power_kernel(X, Y=None, degree=1.0, n_jobs=1, dtype=None):
     """The ``power_kernel`` is also known as the (unrectified) triangular kernel. 
     It is an example of scale-invariant kernel (Sahbi and Fleuret, 2004) and is 
     also only conditionally positive definite.
@@ -367,12 +695,12 @@ def power_kernel(X, Y=None, degree=1.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -380,6 +708,20 @@ def power_kernel(X, Y=None, degree=1.0):
     degree : float, optional (default=1.0)
         The polynomial degree tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -392,11 +734,13 @@ def power_kernel(X, Y=None, degree=1.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    c = -np.power(_hilbert_matrix(X, Y), degree)
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(power_kernel, X, Y, n_jobs, dtype, degree=degree)
+
+    return _power_from_hilbert(_hilbert_matrix(X, Y, dtype=dtype), degree)
 
 
-def rbf_kernel(X, Y=None, sigma=1.0):
+def rbf_kernel(X, Y=None, sigma=1.0, n_jobs=1, dtype=None):
     """The ``rbf_kernel`` is closely related to the ``exponential_kernel`` and
     ``gaussian_kernel``. Note that the adjustable parameter, ``sigma``, 
     plays a major role in the performance of the kernel and should be carefully 
@@ -416,12 +760,12 @@ def rbf_kernel(X, Y=None, sigma=1.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -429,6 +773,20 @@ def rbf_kernel(X, Y=None, sigma=1.0):
     sigma : float, optional (default=1.0)
         The exponential tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -441,11 +799,13 @@ def rbf_kernel(X, Y=None, sigma=1.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    c = exp(_hilbert_matrix(X, Y, scalar=sigma))
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(rbf_kernel, X, Y, n_jobs, dtype, sigma=sigma)
 
+    return _rbf_from_hilbert(_hilbert_matrix(X, Y, dtype=dtype), sigma)
 
-def spline_kernel(X, Y=None):
+
+def spline_kernel(X, Y=None, n_jobs=1, dtype=None):
     """
     The ``spline_kernel`` is given as a piece-wise cubic polynomial,
     as derived in the works by Gunn (1998).
@@ -457,16 +817,30 @@ def spline_kernel(X, Y=None):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -479,12 +853,23 @@ def spline_kernel(X, Y=None):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    X, Y, res = _prep_X_Y_for_cython(X, Y)
-    _spline_kernel_fast(X, Y, res)
+    if n_jobs != 1:
+        return _parallel_kernel(spline_kernel, X, Y, n_jobs, dtype)
+
+    X, Y, res = _prep_X_Y_for_cython(X, Y, dtype)
+
+    # if Y is X, only the upper triangle is computed
+    symmetric = Y is X
+    if sp.issparse(X) or sp.issparse(Y):
+        X, Y = sp.csr_matrix(X), sp.csr_matrix(Y)
+        _spline_kernel_sparse_fast(X.data, _as_intp(X.indices), _as_intp(X.indptr),
+                                   Y.data, _as_intp(Y.indices), _as_intp(Y.indptr), res, symmetric)
+    else:
+        _spline_kernel_fast(X, Y, res, symmetric)
     return res
 
 
-def tanh_kernel(X, Y=None, constant=0.0, alpha=1.0):
+def tanh_kernel(X, Y=None, constant=0.0, alpha=1.0, n_jobs=1, dtype=None):
     """The ``tanh_kernel`` (Hyperbolic Tangent Kernel) is also known as the Sigmoid 
     Kernel and as the Multilayer Perceptron (MLP) kernel. The Sigmoid Kernel comes 
     from the Neural Networks field, where the bipolar sigmoid function is often used 
@@ -506,12 +891,12 @@ def tanh_kernel(X, Y=None, constant=0.0, alpha=1.0):
     Parameters
     ----------
 
-    X : array_like (float), shape=(n_samples, n_features)
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
 
-    Y : array_like (float), shape=(n_samples, n_features), optional (default=None)
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
         The array of pandas DataFrame on which to compute 
         the kernel. If ``Y`` is None, the kernel will be computed
         with ``X``.
@@ -522,6 +907,20 @@ def tanh_kernel(X, Y=None, constant=0.0, alpha=1.0):
     alpha : float, optional (default=1.0)
         The slope tuning parameter.
 
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the computation. This works by
+        computing even blocks of rows of the kernel matrix in parallel.
+
+        If -1 all CPUs are used. If 1 is given, no parallel computing code
+        is used at all, which is useful for debugging. For n_jobs below -1,
+        (n_cpus + 1 + n_jobs) are used. Thus for n_jobs = -2, all CPUs but
+        one are used.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed (and returned) in float32 when
+        both ``X`` and ``Y`` are float32, and in float64 otherwise.
+
     Returns
     -------
 
@@ -534,6 +933,352 @@ def tanh_kernel(X, Y=None, constant=0.0, alpha=1.0):
     Souza, Cesar R., Kernel Functions for Machine Learning Applications
     http://crsouza.blogspot.com/2010/03/kernel-functions-for-machine-learning.html
     """
-    lc = linear_kernel(X=X, Y=Y, constant=0.0)  # don't add it here
-    c = np.tanh(alpha * lc + constant)  # add it here
-    return c
+    if n_jobs != 1:
+        return _parallel_kernel(tanh_kernel, X, Y, n_jobs, dtype, constant=constant, alpha=alpha)
+
+    c = linear_kernel(X=X, Y=Y, constant=0.0, dtype=dtype)  # don't add it here
+    return _tanh_from_dot(c, constant, alpha)
+
+
+# the kernels that can be referenced by name
+PAIRWISE_KERNEL_FUNCTIONS = {
+    'exponential': exponential_kernel,
+    'gaussian': gaussian_kernel,
+    'inverse_multiquadric': inverse_multiquadric_kernel,
+    'laplace': laplace_kernel,
+    'linear': linear_kernel,
+    'multiquadric': multiquadric_kernel,
+    'polynomial': polynomial_kernel,
+    'power': power_kernel,
+    'rbf': rbf_kernel,
+    'spline': spline_kernel,
+    'tanh': tanh_kernel
+}
+
+
+def _get_kernel_function(kernel):
+    """Resolve a kernel name (a key in ``PAIRWISE_KERNEL_FUNCTIONS``)
+    or a callable into the kernel function.
+    """
+    if hasattr(kernel, '__call__'):
+        return kernel
+
+    if not isinstance(kernel, six.string_types) or kernel not in PAIRWISE_KERNEL_FUNCTIONS:
+        raise ValueError('kernel must be a callable or one of (%s), but got %s'
+                         % (', '.join(sorted(PAIRWISE_KERNEL_FUNCTIONS.keys())), str(kernel)))
+    return PAIRWISE_KERNEL_FUNCTIONS[kernel]
+
+
+def _iter_kernel_blocks(kernel, X, Y, block_size, kwargs):
+    """Generate the kernel matrix one tile of ``block_size`` rows at a time"""
+    for batch in gen_batches(X.shape[0], block_size):
+        yield kernel(X[batch], Y, **kwargs)
+
+
+def blocked_kernel(kernel, X, Y=None, block_size=1024, out=None, **kwargs):
+    """Compute a kernel matrix in tiles of ``block_size`` rows of ``X``
+    rather than all at once. Since each row of a kernel matrix only
+    depends on the corresponding row of ``X`` (and on all of ``Y``),
+    peak memory is bounded by the size of a single tile,
+    ``(block_size, n_samples_Y)``, rather than by the full matrix.
+
+    If ``out`` is None, a generator of the row tiles is returned, and
+    nothing is computed until it is consumed. Otherwise, the tiles are
+    written (one at a time) into a disk-backed ``np.memmap``, which is
+    returned.
+
+    Parameters
+    ----------
+
+    kernel : str or callable
+        The kernel to compute. Either one of the keys in
+        ``PAIRWISE_KERNEL_FUNCTIONS`` (i.e., 'gaussian') or a
+        callable with the same signature as the skutil kernels.
+
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
+        The array of pandas DataFrame on which to compute 
+        the kernel. If ``Y`` is None, the kernel will be computed
+        with ``X``.
+
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
+        The array of pandas DataFrame on which to compute 
+        the kernel. If ``Y`` is None, the kernel will be computed
+        with ``X``.
+
+    block_size : int, optional (default=1024)
+        The number of rows of ``X`` to compute in each tile.
+
+    out : str or np.ndarray, optional (default=None)
+        Where to write the kernel matrix. If a str, it is the path
+        to the file that will back the new ``np.memmap``. If an array
+        (i.e., an already-opened ``np.memmap``), it must be of shape
+        ``(n_samples_X, n_samples_Y)``. If None, a generator of the
+        tiles is returned instead.
+
+    **kwargs : keyword args
+        The parameters to pass to the kernel (i.e., ``sigma``).
+
+    Returns
+    -------
+
+    c : generator or np.memmap
+        If ``out`` is None, a generator yielding the tiles of the
+        kernel matrix, in order of the rows of ``X``. Otherwise, the
+        full kernel matrix backed by ``out``.
+    """
+    kernel = _get_kernel_function(kernel)
+    if not (is_integer(block_size) and block_size > 0):
+        raise ValueError('block_size must be a positive int, but got %s' % str(block_size))
+
+    # validate only once; the tiles are views of X
+    X, Y = _check_pairwise_arrays(X, Y, kwargs.get('dtype', None))
+    tiles = _iter_kernel_blocks(kernel, X, Y, block_size, kwargs)
+    if out is None:
+        return tiles
+
+    shape = (X.shape[0], Y.shape[0])
+    if isinstance(out, six.string_types):
+        out = np.memmap(out, dtype=X.dtype, mode='w+', shape=shape)
+    elif not (hasattr(out, 'shape') and out.shape == shape):
+        raise ValueError('out must be a path or an array of shape %s' % str(shape))
+
+    start = 0
+    for tile in tiles:
+        out[start:start + tile.shape[0]] = tile
+        start += tile.shape[0]
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+# the kernels which are elementwise functions of the Hilbert distance matrix
+_HILBERT_KERNEL_TRANSFORMS = {
+    'exponential': _exponential_from_hilbert,
+    'gaussian': _gaussian_from_hilbert,
+    'inverse_multiquadric': _inverse_multiquadric_from_hilbert,
+    'laplace': _laplace_from_hilbert,
+    'multiquadric': _multiquadric_from_hilbert,
+    'power': _power_from_hilbert,
+    'rbf': _rbf_from_hilbert
+}
+
+
+class HilbertDistanceCache(object):
+    """Computes the (negative, squared) pairwise distance matrix between
+    ``X`` and ``Y`` once, and derives any of the distance-based kernels
+    from it with elementwise operations. This is useful when tuning a
+    kernel's hyperparameter, since a sweep over ``n`` values of ``sigma``
+    costs one distance computation rather than ``n``.
+
+    Parameters
+    ----------
+
+    X : array_like (float) or sparse matrix, shape=(n_samples, n_features)
+        The array of pandas DataFrame on which to compute 
+        the distances. If ``Y`` is None, the distances will be computed
+        with ``X``.
+
+    Y : array_like (float) or sparse matrix, shape=(n_samples, n_features), optional (default=None)
+        The array of pandas DataFrame on which to compute 
+        the distances. If ``Y`` is None, the distances will be computed
+        with ``X``.
+
+    n_jobs : int, optional (default=1)
+        The number of threads to use for the distance computation.
+        See the ``n_jobs`` parameter of the kernel functions.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the distances
+        (and kernels). See the ``dtype`` parameter of the kernel functions.
+
+
+    Examples
+    --------
+
+        >>> import numpy as np
+        >>> from skutil.metrics import HilbertDistanceCache, rbf_kernel
+        >>>
+        >>> X = np.random.RandomState(42).rand(10, 3)
+        >>> cache = HilbertDistanceCache(X)
+        >>> kernels = [cache.kernel('rbf', sigma=s) for s in (0.1, 0.5, 1.0)]
+        >>> assert np.allclose(kernels[-1], rbf_kernel(X, sigma=1.0))
+
+
+    Attributes
+    ----------
+
+    hilbert_ : np.ndarray, shape=(n_samples_X, n_samples_Y)
+        The cached distance matrix, ``2 <x,y> - <x,x> - <y,y>``. It
+        is never modified by ``kernel``.
+    """
+
+    def __init__(self, X, Y=None, n_jobs=1, dtype=None):
+        if n_jobs != 1:
+            self.hilbert_ = _parallel_kernel(_hilbert_matrix, X, Y, n_jobs, dtype)
+        else:
+            self.hilbert_ = _hilbert_matrix(X, Y, dtype=dtype)
+
+    def kernel(self, kernel, **kwargs):
+        """Compute a kernel matrix from the cached distances.
+
+        Parameters
+        ----------
+
+        kernel : str
+            The name of the kernel to compute. One of ('exponential',
+            'gaussian', 'inverse_multiquadric', 'laplace', 'multiquadric',
+            'power', 'rbf').
+
+        **kwargs : keyword args
+            The parameter to pass to the kernel (i.e., ``sigma``, or
+            ``constant`` for the multiquadric kernels, or ``degree``
+            for the ``power_kernel``). If not provided, the same defaults
+            as the kernel functions are used.
+
+        Returns
+        -------
+
+        c : np.ndarray, shape=(n_samples_X, n_samples_Y)
+            The kernel matrix.
+        """
+        if kernel not in _HILBERT_KERNEL_TRANSFORMS:
+            raise ValueError('kernel must be one of (%s), but got %s'
+                             % (', '.join(sorted(_HILBERT_KERNEL_TRANSFORMS.keys())), str(kernel)))
+
+        # the transforms are in place, so operate on a copy
+        return _HILBERT_KERNEL_TRANSFORMS[kernel](self.hilbert_.copy(), **kwargs)
+
+
+# the kernels which are elementwise functions of the inner product matrix
+_DOT_KERNEL_TRANSFORMS = {
+    'linear': _linear_from_dot,
+    'polynomial': _polynomial_from_dot,
+    'tanh': _tanh_from_dot
+}
+
+
+class KernelReferenceSet(object):
+    """A fixed reference set (i.e., the support vectors of a fit model)
+    against which new rows are repeatedly scored. The reference matrix
+    is validated and cast once, and its squared row norms are computed
+    once, so each call to ``score`` only validates the incoming row(s)
+    and computes the kernel between them and the reference set. This is
+    intended for low-latency (single-row or micro-batch) scoring.
+
+    Parameters
+    ----------
+
+    reference : array_like (float) or sparse matrix, shape=(n_references, n_features)
+        The reference set.
+
+    kernel : str or callable, optional (default='rbf')
+        The kernel to compute. Either one of the keys in
+        ``PAIRWISE_KERNEL_FUNCTIONS`` (i.e., 'gaussian') or a
+        callable with the same signature as the skutil kernels.
+        The 'spline' kernel and callables are computed by the
+        kernel function itself, without the precomputation.
+
+    dtype : np.float32, np.float64 or None, optional (default=None)
+        The floating point precision in which to compute the kernel.
+        If None, the kernel is computed in float32 if ``reference``
+        is float32, and in float64 otherwise. Incoming rows are cast
+        to this precision.
+
+    **kwargs : keyword args
+        The parameters to pass to the kernel (i.e., ``sigma``).
+
+
+    Examples
+    --------
+
+        >>> import numpy as np
+        >>> from skutil.metrics import KernelReferenceSet, rbf_kernel
+        >>>
+        >>> rs = np.random.RandomState(42)
+        >>> support, x = rs.rand(50, 4), rs.rand(4)
+        >>> ref = KernelReferenceSet(support, kernel='rbf', sigma=0.5)
+        >>> assert np.allclose(ref.score(x), rbf_kernel(x.reshape(1, -1), support, sigma=0.5))
+
+
+    Attributes
+    ----------
+
+    reference_ : np.ndarray or sparse matrix, shape=(n_references, n_features)
+        The validated and cast reference set.
+
+    sq_norms_ : np.ndarray, shape=(n_references,)
+        The squared row norms of ``reference_``. Only computed for
+        the Hilbert-space kernels; None otherwise.
+    """
+
+    def __init__(self, reference, kernel='rbf', dtype=None, **kwargs):
+        self.kernel = kernel
+        self.kernel_params = kwargs
+
+        # fails thru if the kernel doesn't exist
+        self._kernel_function = _get_kernel_function(kernel)
+        self.reference_ = _check_array(reference, _float_dtype(reference, None, dtype))
+        self.sq_norms_ = _sq_norms(self.reference_) if kernel in _HILBERT_KERNEL_TRANSFORMS else None
+
+    def _check_rows(self, X):
+        # a lighter-weight validation than ``_check_pairwise_arrays``
+        dtype = self.reference_.dtype
+        if sp.issparse(X):
+            X = _check_array(X, dtype)
+        else:
+            X = np.asarray(X, dtype=dtype)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+
+        if X.ndim != 2 or X.shape[1] != self.reference_.shape[1]:
+            raise ValueError('X must have %i features, but got shape %s'
+                             % (self.reference_.shape[1], str(X.shape)))
+        return X
+
+    def score(self, X, out=None):
+        """Compute the kernel between the row(s) of ``X`` and the reference set.
+
+        Parameters
+        ----------
+
+        X : array_like (float) or sparse matrix, shape=(n_samples, n_features) or (n_features,)
+            The row(s) to score. A 1d array is treated as a single row.
+
+        out : np.ndarray, shape=(n_samples, n_references), optional (default=None)
+            A C-contiguous array (in the precision of ``reference_``) in
+            which to store the result, so it may be reused across calls.
+            If None, a new array is allocated.
+
+        Returns
+        -------
+
+        c : np.ndarray, shape=(n_samples, n_references)
+            The kernel matrix between ``X`` and the reference set.
+        """
+        X = self._check_rows(X)
+        reference = self.reference_
+        shape = (X.shape[0], reference.shape[0])
+
+        if out is None:
+            out = np.empty(shape, dtype=reference.dtype)
+        elif not (isinstance(out, np.ndarray) and out.shape == shape and out.dtype == reference.dtype
+                  and out.flags['C_CONTIGUOUS']):
+            raise ValueError('out must be a C-contiguous %s array of shape %s' % (str(reference.dtype), str(shape)))
+
+        kernel = self.kernel
+        if kernel not in _HILBERT_KERNEL_TRANSFORMS and kernel not in _DOT_KERNEL_TRANSFORMS:
+            out[:] = self._kernel_function(X, reference, **self.kernel_params)
+            return out
+
+        # the cross term is written directly into the output
+        if sp.issparse(X) or sp.issparse(reference):
+            out[:] = safe_sparse_dot(X, reference.T, dense_output=True)
+        else:
+            np.dot(X, reference.T, out=out)
+
+        if kernel in _DOT_KERNEL_TRANSFORMS:
+            return _DOT_KERNEL_TRANSFORMS[kernel](out, **self.kernel_params)
+
+        _hilbert_matrix_fast(out, _sq_norms(X), self.sq_norms_, 1.0)
+        return _HILBERT_KERNEL_TRANSFORMS[kernel](out, **self.kernel_params)
@@ -1,7 +1,12 @@
 from skutil.metrics import *
 import numpy as np
+import scipy.sparse as sp
+import os
+import shutil
+import tempfile
 from skutil.metrics.kernel import (_hilbert_dot,
-                                   _hilbert_matrix)
+                                   _hilbert_matrix,
+                                   _triangular_slices)
 from skutil.metrics import GainsStatisticalReport
 from skutil.utils.tests.utils import assert_fails
 from numpy.testing import (assert_array_equal, assert_array_almost_equal)
@@ -63,6 +68,19 @@ def test_hilbert():
     ]))
 
 
+def test_hilbert_matrix_non_square():
+    rs = np.random.RandomState(42)
+    X, Y = rs.rand(7, 4), rs.rand(5, 4)
+
+    # the negative squared euclidean distance
+    expected = -np.array([[np.sum((x - y) ** 2) for y in Y] for x in X])
+    assert_array_almost_equal(_hilbert_matrix(X, Y), expected)
+    assert_array_almost_equal(_hilbert_matrix(X, Y, scalar=-2.0), -2.0 * expected)
+
+    # the diagonal of the symmetric matrix should never be positive
+    assert (np.diag(_hilbert_matrix(X)) <= 0).all()
+
+
 def test_exp():
     X = _get_train_array()
     answ = exponential_kernel(X)
@@ -123,9 +141,12 @@ def test_spline_kernel():
     X = _get_train_array()
     answ = spline_kernel(X)
     assert_array_almost_equal(answ, np.array([
-        [3.83333333, 5.33333333, 3.83333333],
-        [11.66666667, 72.83333333, 89.44444444],
-        [15.66666667, 101.58333333, 120.11111111]]))
+        [2.33333333, 5.33333333, 6.83333333],
+        [5.33333333, 145.66666667, 203.16666667],
+        [6.83333333, 203.16666667, 293.88888889]]))
+
+    # the kernel is symmetric in x and y
+    assert_array_almost_equal(answ, answ.T)
 
 
 def test_tanh():
@@ -137,6 +158,207 @@ def test_tanh():
         [0.9993293, 1., 1.]]))
 
 
+def test_blocked_kernel():
+    rs = np.random.RandomState(42)
+    X, Y = rs.rand(11, 3), rs.rand(7, 3)
+    expected = gaussian_kernel(X, Y, sigma=0.5)
+
+    # the tiles should stack into the full kernel matrix
+    tiles = list(blocked_kernel('gaussian', X, Y, block_size=4, sigma=0.5))
+    assert [t.shape[0] for t in tiles] == [4, 4, 3]
+    assert_array_almost_equal(np.vstack(tiles), expected)
+
+    # test with a callable and Y=None
+    assert_array_almost_equal(np.vstack(list(blocked_kernel(spline_kernel, X, block_size=5))),
+                              spline_kernel(X))
+
+    # write it to a disk-backed memmap
+    tmp = tempfile.mkdtemp()
+    try:
+        res = blocked_kernel('gaussian', X, Y, block_size=4, out=os.path.join(tmp, 'k.dat'), sigma=0.5)
+        assert isinstance(res, np.memmap)
+        assert_array_almost_equal(res, expected)
+        del res
+    finally:
+        shutil.rmtree(tmp)
+
+    # bad args
+    assert_fails(blocked_kernel, ValueError, 'not_a_kernel', X)
+    assert_fails(blocked_kernel, ValueError, 'gaussian', X, block_size=0)
+    assert_fails(blocked_kernel, ValueError, 'gaussian', X, out=np.zeros((2, 2)))
+
+
+def test_kernel_n_jobs():
+    rs = np.random.RandomState(42)
+    X, Y = rs.rand(13, 3), rs.rand(6, 3)
+
+    for kernel in PAIRWISE_KERNEL_FUNCTIONS.values():
+        expected = kernel(X, Y)
+        assert_array_almost_equal(kernel(X, Y, n_jobs=2), expected)
+        assert_array_almost_equal(kernel(X, Y, n_jobs=-1), expected)
+
+        # more jobs than rows
+        assert_array_almost_equal(kernel(X[:2], Y, n_jobs=4), expected[:2])
+
+    assert_fails(gaussian_kernel, ValueError, X, Y, n_jobs=0)
+
+
+def test_kernel_dtype():
+    rs = np.random.RandomState(42)
+    X, Y = rs.rand(6, 3), rs.rand(4, 3)
+    X32, Y32 = X.astype(np.float32), Y.astype(np.float32)
+
+    for kernel in PAIRWISE_KERNEL_FUNCTIONS.values():
+        expected = kernel(X, Y)
+        assert expected.dtype == np.float64
+
+        # float32 in, float32 out (also when parallel)
+        for n_jobs in (1, 2):
+            c = kernel(X32, Y32, n_jobs=n_jobs)
+            assert c.dtype == np.float32, '%s returned %s' % (kernel.__name__, c.dtype)
+            assert_array_almost_equal(c, expected, 4)
+
+        # explicit precision
+        assert kernel(X, Y, dtype=np.float32).dtype == np.float32
+        assert kernel(X32, Y32, dtype=np.float64).dtype == np.float64
+
+        # mixed precision is upcast
+        assert kernel(X32, Y).dtype == np.float64
+
+    assert next(blocked_kernel('rbf', X32, block_size=2)).dtype == np.float32
+    assert_fails(gaussian_kernel, ValueError, X, Y, dtype=np.int64)
+
+
+def test_kernel_sparse():
+    rs = np.random.RandomState(42)
+    X, Y = rs.rand(6, 8), rs.rand(4, 8)
+    X[X < 0.7] = 0.
+    Y[Y < 0.7] = 0.
+    X_csr, Y_csr = sp.csr_matrix(X), sp.csr_matrix(Y)
+
+    # unsorted indices and duplicate entries are handled
+    data, indices, indptr = [], [], [0]
+    for row in X_csr:
+        data.extend(np.repeat(row.data / 2., 2)[::-1])
+        indices.extend(np.repeat(row.indices, 2)[::-1])
+        indptr.append(len(data))
+    X_dup = sp.csr_matrix((data, indices, indptr), shape=X.shape)
+
+    for kernel in PAIRWISE_KERNEL_FUNCTIONS.values():
+        expected = kernel(X, Y)
+        assert_array_almost_equal(kernel(X_csr, Y_csr), expected)
+        assert_array_almost_equal(kernel(X_csr, Y), expected)
+        assert_array_almost_equal(kernel(X, Y_csr), expected)
+        assert_array_almost_equal(kernel(X_csr, Y_csr, n_jobs=2), expected)
+        assert_array_almost_equal(kernel(X_dup, Y_csr), expected)
+        assert_array_almost_equal(kernel(X_csr), kernel(X))
+
+    # the input is not modified
+    assert not X_dup.has_canonical_format
+    assert_array_almost_equal(np.vstack(list(blocked_kernel('spline', X_csr, Y_csr, block_size=4))),
+                              spline_kernel(X, Y))
+
+
+def test_hilbert_distance_cache():
+    rs = np.random.RandomState(42)
+    X, Y = rs.rand(6, 3), rs.rand(4, 3)
+
+    for args in ((X,), (X, Y)):
+        cache = HilbertDistanceCache(*args)
+        hilbert = cache.hilbert_.copy()
+
+        for sigma in (0.05, 0.5, 1.0, 2.0):
+            for name in ('exponential', 'gaussian', 'laplace', 'rbf'):
+                assert_array_almost_equal(cache.kernel(name, sigma=sigma),
+                                          PAIRWISE_KERNEL_FUNCTIONS[name](*args, sigma=sigma))
+
+        for constant in (0.5, 1.0, 2.0):
+            for name in ('inverse_multiquadric', 'multiquadric'):
+                assert_array_almost_equal(cache.kernel(name, constant=constant),
+                                          PAIRWISE_KERNEL_FUNCTIONS[name](*args, constant=constant))
+
+        # the defaults are the kernels' defaults
+        assert_array_almost_equal(cache.kernel('power'), power_kernel(*args))
+        assert_array_almost_equal(cache.kernel('inverse_multiquadric'), inverse_multiquadric_kernel(*args))
+
+        # the cache is never modified
+        assert_array_equal(cache.hilbert_, hilbert)
+
+    # parallel, float32
+    cache = HilbertDistanceCache(X.astype(np.float32), n_jobs=2)
+    assert cache.kernel('rbf').dtype == np.float32
+    assert_array_almost_equal(cache.kernel('rbf'), rbf_kernel(X), 4)
+
+    # not a distance-based kernel
+    assert_fails(cache.kernel, ValueError, 'linear')
+
+
+def test_kernel_symmetric():
+    rs = np.random.RandomState(42)
+    X = rs.rand(7, 3)
+    X[X < 0.3] = 0.
+
+    for data in (X, X.astype(np.float32), sp.csr_matrix(X)):
+        for kernel in PAIRWISE_KERNEL_FUNCTIONS.values():
+            # a copy of X for Y takes the non-symmetric path
+            expected = kernel(data, data.copy())
+
+            for n_jobs in (1, 3):
+                c = kernel(data, n_jobs=n_jobs)
+                assert_array_equal(c, c.T)
+                assert_array_almost_equal(c, expected, 5)
+
+    # the triangular tiles cover every row
+    for n in (1, 2, 7, 100):
+        for n_jobs in (1, 2, 3, 8):
+            rows = [i for batch in _triangular_slices(n, n_jobs) for i in range(n)[batch]]
+            assert rows == list(range(n))
+
+
+def test_kernel_reference_set():
+    rs = np.random.RandomState(42)
+    support, X = rs.rand(8, 3), rs.rand(5, 3)
+    params = {
+        'exponential': {'sigma': 0.5},
+        'gaussian': {'sigma': 0.5},
+        'inverse_multiquadric': {'constant': 2.0},
+        'laplace': {'sigma': 0.5},
+        'linear': {'constant': 1.0},
+        'multiquadric': {'constant': 2.0},
+        'polynomial': {'alpha': 0.5, 'degree': 2.0, 'constant': 1.0},
+        'power': {'degree': 2.0},
+        'rbf': {'sigma': 0.5},
+        'spline': {},
+        'tanh': {'alpha': 0.5, 'constant': 1.0}
+    }
+
+    for name, kernel in PAIRWISE_KERNEL_FUNCTIONS.items():
+        expected = kernel(X, support, **params[name])
+
+        for reference in (support, sp.csr_matrix(support)):
+            ref = KernelReferenceSet(reference, kernel=name, **params[name])
+
+            # micro-batches, single rows and reused output buffers
+            assert_array_almost_equal(ref.score(X), expected)
+            assert_array_almost_equal(ref.score(X[2]), expected[2:3])
+            assert_array_almost_equal(ref.score(sp.csr_matrix(X)), expected)
+
+            out = np.empty((1, 8))
+            assert ref.score(X[0], out=out) is out
+            assert_array_almost_equal(out, expected[:1])
+
+    # callables and float32
+    ref = KernelReferenceSet(support.astype(np.float32), kernel=rbf_kernel, sigma=0.5)
+    assert ref.score(X).dtype == np.float32
+    assert_array_almost_equal(ref.score(X), rbf_kernel(X, support, sigma=0.5), 4)
+
+    # bad shapes, bad buffers, bad kernels
+    ref = KernelReferenceSet(support)
+    assert_fails(ref.score, ValueError, rs.rand(4))
+    assert_fails(ref.score, ValueError, X, out=np.empty((5, 8), dtype=np.float32))
+    assert_fails(KernelReferenceSet, ValueError, support, 'bad')
+
+
 def test_act_stats():
     pred = [0.0, 1.0, 1.5]
     loss = [0.5, 0.5, 1.0]
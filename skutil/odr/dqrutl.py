@@ -3,19 +3,30 @@ import numpy as np
 from skutil.odr import dqrsl # what happens if we make this absolute?
 from sklearn.utils import check_array
 from sklearn.base import BaseEstimator
+from sklearn.externals.joblib import Parallel, delayed
+from scipy.linalg import solve_triangular
+from scipy.linalg.lapack import get_lapack_funcs
 from numpy.linalg import matrix_rank
+from skutil.utils.util import _get_n_jobs, is_integer
 
 # WARNING: there is little-to-no validation of input in these functions,
 # and crashes may be caused by inappropriate usage. Use with care...
 
 __all__ = [
     'qr_decomposition',
-    'QRDecomposition'
+    'QRDecomposition',
+    'tsqr_decomposition'
 ]
 
+# the LINPACK routines index with 32-bit ints
+_MAX_LINPACK_ELEMENTS = 2147483647
+
+# the default maximum number of elements in each TSQR row block (128MB of doubles)
+_MAX_BLOCK_ELEMENTS = 2 ** 24
+
 
 def _validate_matrix_size(n, p):
-    if n * p > 2147483647:
+    if n * p > _MAX_LINPACK_ELEMENTS:
         raise ValueError('too many elements for Fortran LINPACK routine')
 
 
@@ -24,9 +35,52 @@ def _safecall(fun, *args, **kwargs):
     fun(*args, **kwargs)
 
 
-def qr_decomposition(X, job=1):
-    """Performs the QR decomposition using LINPACK, BLAS and LAPACK
-    Fortran subroutines.
+def _lapack_call(fun, *args, **kwargs):
+    """Call a scipy LAPACK wrapper, which returns ``info`` as its
+    last output, and raise a ValueError if the routine failed.
+    """
+    ret = fun(*args, **kwargs)
+    info = ret[-1]
+    if info < 0:
+        raise ValueError('illegal value in argument %i of internal LAPACK routine' % -info)
+    return ret[:-1]
+
+
+def _householder_qr(X):
+    """Compute the QR decomposition of the (Fortran-ordered, float) ``X``
+    in place, using LAPACK's blocked Householder routine (dgeqrf), and
+    convert it to the LINPACK (dqrdc) layout expected by ``dqrsl``.
+    """
+    n, p = X.shape
+    geqrf, = get_lapack_funcs(('geqrf',), (X,))
+
+    # lwork is generous so that dgeqrf uses its blocked (level-3 BLAS) code
+    qr, tau = _lapack_call(geqrf, X, lwork=max(1, 64 * p), overwrite_a=1)[:2]
+
+    # LAPACK stores each reflector as I - tau * v * v^T with v[0] == 1, while
+    # LINPACK stores u = tau * v below the diagonal, and qraux = u[0] = tau
+    for l in range(min(n - 1, p)):
+        qr[l + 1:, l] *= tau[l]
+
+    qraux = np.zeros(p, dtype=np.double)
+    qraux[:tau.shape[0]] = tau
+    return qr, qraux
+
+
+def _independent_columns(qr, norms, tol):
+    """Determine which of the first ``min(n, p)`` columns of a QR decomposition
+    are (numerically) linearly independent of the preceding columns. Like R's
+    ``dqrdc2``, a column is deficient if its reduced norm (the magnitude of its
+    diagonal element in R) is less than ``tol`` times its original norm.
+    """
+    k = min(qr.shape)
+    return np.abs(np.diag(qr[:k, :k])) > tol * norms[:k]
+
+
+def qr_decomposition(X, job=1, tol=1e-7):
+    """Performs the QR decomposition using LAPACK's blocked Householder
+    routine, with limited column pivoting. The rank is read from the
+    diagonal of R, rather than from a separate SVD.
 
     Parameters
     ----------
@@ -36,7 +90,15 @@ def qr_decomposition(X, job=1):
 
     job : int, optional (default=1)
         Whether to perform pivoting. 0 is False, any other value
-        will be coerced to 1 (True).
+        will be coerced to 1 (True). As in R's ``dqrdc2``, pivoting
+        moves each column that is (numerically) a linear combination
+        of the preceding columns to the end of the matrix, and leaves
+        the order of the other columns unchanged.
+
+    tol : float, optional (default=1e-7)
+        The tolerance for detecting linear dependence. A column is
+        dependent if the magnitude of its diagonal element in R is
+        less than ``tol`` times the column's norm.
 
     Returns
     -------
@@ -55,44 +117,66 @@ def qr_decomposition(X, job=1):
         The pivot array, or None if not ``job``
     """
 
-    X = check_array(X, dtype='numeric', order='F', copy=True)
+    X_in = X
+    X = check_array(X, dtype=np.double, order='F', copy=True)
     n, p = X.shape
+    k = min(n, p)
 
     # check on size
     _validate_matrix_size(n, p)
-    rank = matrix_rank(X)
 
     # validate job:
     job_ = 0 if not job else 1
 
-    qraux, pivot, work = (np.zeros(p, dtype=np.double, order='F'),
-                          # can't use arange, because need fortran order ('order' not kw in arange)
-                          np.array([i for i in range(1, p + 1)], dtype=np.int, order='F'),
-                          np.zeros(p, dtype=np.double, order='F'))
-
-    # sanity checks
-    assert qraux.shape[0] == p, 'expected qraux to be of length %i' % p
-    assert pivot.shape[0] == p, 'expected pivot to be of length %i' % p
-    assert work.shape[0] == p, 'expected work to be of length %i' % p
-
-    # call the fortran module IN PLACE
-    _safecall(dqrsl.dqrdc, X, n, n, p, qraux, pivot, work, job_)
+    norms = np.sqrt(np.einsum('ij,ij->j', X, X))
+    qr, qraux = _householder_qr(X)
+    unpivoted = qr, qraux
+    pivot = np.arange(p)
+    n_dependent = 0
+
+    # R only tests the first min(n, p) columns, so (as in dqrdc2) each dependent
+    # column is moved to the end, and the matrix is factored again while that
+    # brings untested columns into the first min(n, p). Columns that were found
+    # independent remain so, as the dependent ones add nothing to their span.
+    while True:
+        n_active = p - n_dependent
+        dependent = ~_independent_columns(qr, norms[pivot], tol)[:min(k, n_active)]
+        n_tested = dependent.shape[0]
+        if not dependent.any():
+            break
+
+        active = pivot[:n_active]
+        pivot = np.concatenate([active[:n_tested][~dependent], active[n_tested:],
+                                pivot[n_active:], active[:n_tested][dependent]])
+        n_dependent += int(dependent.sum())
+
+        # without pivoting, the factorization is only repeated to find the rank
+        if job_ or n_active > k:
+            qr, qraux = _householder_qr(np.asfortranarray(check_array(X_in, dtype=np.double)[:, pivot]))
+        if n_active <= k:
+            break
+
+    rank = min(k, p - n_dependent)
+    if not job_:
+        qr, qraux = unpivoted
 
     # do returns
-    return (X,
+    return (qr,
             rank,
             qraux,
-            (pivot - 1) if job_ else None)  # subtract one because pivot started at 1 for the fortran
+            pivot if job_ else None)
 
 
 def _qr_R(qr):
-    """Extract the R matrix from a QR decomposition"""
+    """Extract the R matrix from a QR decomposition. The
+    Householder vectors below the diagonal are zeroed.
+    """
     min_dim = min(qr.shape)
-    return qr[:min_dim + 1, :]
+    return np.triu(qr[:min_dim, :])
 
 
 class QRDecomposition(BaseEstimator):
-    """Performs the QR decomposition using LINPACK, BLAS and LAPACK
+    """Performs the QR decomposition using LAPACK, BLAS and LINPACK
     Fortran subroutines, and provides an interface for other useful
     QR utility methods.
 
@@ -106,6 +190,16 @@ class QRDecomposition(BaseEstimator):
         Whether to perform pivoting. 0 is False, any other value
         will be coerced to 1 (True).
 
+    tol : float, optional (default=1e-7)
+        The tolerance for detecting linearly dependent columns
+        (see ``qr_decomposition``).
+
+    Y : array_like, shape (n_samples,) or (n_samples, n_targets), optional (default=None)
+        Responses to track through ``update`` and ``downdate``. If
+        provided, their coefficients are available from ``get_response_coef``,
+        and the rows passed to ``update`` and ``downdate`` must include
+        the corresponding responses.
+
     Attributes
     ----------
 
@@ -123,14 +217,20 @@ class QRDecomposition(BaseEstimator):
         The rank of the input matrix
     """
 
-    def __init__(self, X, pivot=1):
+    def __init__(self, X, pivot=1, tol=1e-7, Y=None):
         self.job_ = 0 if not pivot else 1
+        self.tol = tol
         self._decompose(X)
 
+        self._r_state_ = None
+        if Y is not None:
+            self._track_responses(Y)
+
     def _decompose(self, X):
         """Decomposes the matrix"""
         # perform the decomposition
-        self.qr, self.rank, self.qraux, self.pivot = qr_decomposition(X, self.job_)
+        self.qr, self.rank, self.qraux, self.pivot = qr_decomposition(X, self.job_, self.tol)
+        self._lapack_qr_ = None
 
     def get_coef(self, X):
         qr, qraux = self.qr, self.qraux
@@ -205,3 +305,473 @@ class QRDecomposition(BaseEstimator):
             The rank of the R matrix
         """
         return matrix_rank(self.get_R())
+
+    def _lapack_qr(self):
+        """Get the decomposition in LAPACK's layout (the reflectors
+        scaled to have a unit first element), as required by ``ormqr``.
+        It is computed from the LINPACK layout once, and cached.
+        """
+        if getattr(self, '_lapack_qr_', None) is None:
+            n, p = self.qr.shape
+            k = min(n, p)
+            qr, tau = np.array(self.qr[:, :k], order='F'), self.qraux[:k]
+
+            for l in range(min(n - 1, k)):
+                if tau[l] != 0:
+                    qr[l + 1:, l] /= tau[l]
+            self._lapack_qr_ = (qr, tau)
+
+        return self._lapack_qr_
+
+    def _apply_q(self, Y, trans, overwrite=True):
+        """Compute ``Q * Y`` (trans='N') or ``Q^T * Y`` (trans='T')
+        for a 2d, Fortran-ordered ``Y`` using LAPACK's blocked ormqr
+        routine, which applies the reflectors without forming Q.
+        """
+        qr, tau = self._lapack_qr()
+        ormqr, = get_lapack_funcs(('ormqr',), (qr,))
+        return _lapack_call(ormqr, 'L', trans, qr, tau, Y, max(1, 64 * Y.shape[1]), overwrite_c=overwrite)[0]
+
+    def _check_y(self, Y):
+        """Validate ``Y`` (a copy, as a 2d Fortran-ordered array),
+        and note whether it was 1d.
+        """
+        Y = check_array(Y, dtype=np.double, order='F', copy=True, ensure_2d=False)
+        is_1d = Y.ndim == 1
+        if is_1d:
+            Y = Y.reshape((-1, 1), order='F')
+
+        if Y.shape[0] != self.qr.shape[0]:
+            raise ValueError('qr and Y must have same number of rows')
+        return Y, is_1d
+
+    def get_qy(self, Y):
+        """Compute ``Q * Y``, where Q is the (full, square) orthogonal
+        factor of the decomposition.
+
+        Parameters
+        ----------
+
+        Y : array_like, shape=(n_samples,) or (n_samples, n_targets)
+            The vector or matrix to multiply.
+
+        Returns
+        -------
+
+        qy : np.ndarray, shape=(n_samples,) or (n_samples, n_targets)
+            The product ``Q * Y``
+        """
+        Y, is_1d = self._check_y(Y)
+        qy = self._apply_q(Y, 'N')
+        return qy.ravel() if is_1d else qy
+
+    def get_qty(self, Y):
+        """Compute ``Q^T * Y``, where Q is the (full, square) orthogonal
+        factor of the decomposition.
+
+        Parameters
+        ----------
+
+        Y : array_like, shape=(n_samples,) or (n_samples, n_targets)
+            The vector or matrix to multiply.
+
+        Returns
+        -------
+
+        qty : np.ndarray, shape=(n_samples,) or (n_samples, n_targets)
+            The product ``Q^T * Y``
+        """
+        Y, is_1d = self._check_y(Y)
+        qty = self._apply_q(Y, 'T')
+        return qty.ravel() if is_1d else qty
+
+    def lstsq(self, Y):
+        """Solve the least squares problem for every column of ``Y``
+        (each a separate response) against the decomposed matrix, reusing
+        the one factorization. The coefficients, residuals and fitted
+        values are all computed from a single pass of ``Q^T * Y``.
+
+        As in R, if the decomposed matrix is rank deficient, the (pivoted)
+        dependent columns are aliased: they are excluded from the fit,
+        and their coefficients are set to 0. Without pivoting, the leading
+        ``rank`` columns are used, so rank deficient matrices should be
+        decomposed with ``pivot=1``.
+
+        Parameters
+        ----------
+
+        Y : array_like, shape=(n_samples,) or (n_samples, n_targets)
+            The response(s).
+
+        Returns
+        -------
+
+        coef : np.ndarray, shape=(n_features,) or (n_features, n_targets)
+            The regression coefficients, in the order of the
+            original (un-pivoted) columns.
+
+        residuals : np.ndarray, shape=(n_samples,) or (n_samples, n_targets)
+            The residuals, ``Y - fitted``
+
+        fitted : np.ndarray, shape=(n_samples,) or (n_samples, n_targets)
+            The fitted values
+        """
+        Y, is_1d = self._check_y(Y)
+        p = self.qr.shape[1]
+        k = self.rank
+
+        # the first k rows of Q^T * Y are the projection onto the (pivoted)
+        # independent columns, so solve R11 * b = (Q^T * Y)[:k] for the coefs
+        qty = self._apply_q(Y, 'T', overwrite=False)
+        b = solve_triangular(self.qr[:k, :k], qty[:k], lower=False)
+
+        coef = np.zeros((p, Y.shape[1]), dtype=np.double)
+        coef[self.pivot[:k] if self.pivot is not None else np.arange(k)] = b
+
+        # the fitted values are Q * [(Q^T * Y)[:k], 0]
+        qty[k:] = 0.
+        fitted = self._apply_q(qty, 'N')
+        residuals = Y - fitted
+
+        if is_1d:
+            return coef.ravel(), residuals.ravel(), fitted.ravel()
+        return coef, residuals, fitted
+
+    def get_fitted(self, Y):
+        """Get the least squares fitted values of ``Y`` (see ``lstsq``).
+
+        Parameters
+        ----------
+
+        Y : array_like, shape=(n_samples,) or (n_samples, n_targets)
+            The response(s).
+
+        Returns
+        -------
+
+        fitted : np.ndarray, shape=(n_samples,) or (n_samples, n_targets)
+            The fitted values
+        """
+        return self.lstsq(Y)[2]
+
+    def get_residuals(self, Y):
+        """Get the least squares residuals of ``Y`` (see ``lstsq``).
+
+        Parameters
+        ----------
+
+        Y : array_like, shape=(n_samples,) or (n_samples, n_targets)
+            The response(s).
+
+        Returns
+        -------
+
+        residuals : np.ndarray, shape=(n_samples,) or (n_samples, n_targets)
+            The residuals, ``Y - fitted``
+        """
+        return self.lstsq(Y)[1]
+
+    def _order(self):
+        """The column order of R (the pivot, or the identity)"""
+        return self.pivot if self.pivot is not None else np.arange(self.qr.shape[1])
+
+    def _padded_R(self, R):
+        """Truncate or zero-pad ``R`` to ``n_features`` rows"""
+        p = self.qr.shape[1]
+        padded = np.zeros((p, R.shape[1]), dtype=np.double)
+        padded[:min(p, R.shape[0])] = R[:p]
+        return padded
+
+    def _track_responses(self, Y):
+        """Initialize the updatable state with ``Q^T * Y`` and the residual norms"""
+        Y, self._y_1d_ = self._check_y(Y)
+        qty = self._apply_q(Y, 'T')
+        d = min(self.qr.shape)
+        self._r_state_ = (self._padded_R(self.get_R()), self._padded_R(qty),
+                          np.sqrt(np.einsum('ij,ij->j', qty[d:], qty[d:])))
+
+    def _r_state(self):
+        """Get the updatable state (lazily, if no responses are tracked):
+        R (in the pivoted column order), the first ``n_features`` rows
+        of ``Q^T * Y`` and the norms of the residuals of ``Y``.
+        """
+        if self._r_state_ is None:
+            p = self.qr.shape[1]
+            self._r_state_ = (self._padded_R(self.get_R()), np.zeros((p, 0)), np.zeros(0))
+        return self._r_state_
+
+    def _check_rows(self, X, Y, n_targets):
+        """Validate the rows (and responses) for ``update`` or ``downdate``"""
+        X = check_array(X, dtype=np.double, ensure_min_samples=0)
+        if X.shape[1] != self.qr.shape[1]:
+            raise ValueError('expected %i features, but got %i' % (self.qr.shape[1], X.shape[1]))
+
+        if not n_targets:
+            if Y is not None:
+                raise ValueError('Y was provided, but no responses are tracked '
+                                 '(Y must be passed to the constructor)')
+            return X, np.zeros((X.shape[0], 0))
+
+        if Y is None:
+            raise ValueError('the responses are tracked, so Y must be provided')
+        Y = check_array(Y, dtype=np.double, ensure_2d=False, ensure_min_samples=0)
+        Y = Y.reshape((-1, 1)) if Y.ndim == 1 else Y
+        if Y.shape != (X.shape[0], n_targets):
+            raise ValueError('expected Y to have shape (%i, %i), but got %r'
+                             % (X.shape[0], n_targets, Y.shape))
+        return X, Y
+
+    def _refactor(self, R, z, rho):
+        """Re-decompose from an updated R (in the current pivoted order),
+        so the rank and pivots are those of the updated matrix. Since ``X = QR``,
+        this is O(n_features ** 3), no matter how many rows have been seen.
+        """
+        A = np.empty_like(R)
+        A[:, self._order()] = R  # the original column order
+        self._decompose(A)
+
+        # if A = Q_A * R_A, then the new Q^T * Y is Q_A^T * (Q^T * Y)
+        z = self._apply_q(np.asfortranarray(z), 'T') if z.shape[1] else z
+        self._r_state_ = (self._padded_R(self.get_R()), z, rho)
+
+    def update(self, X, Y=None):
+        """Add rows to the decomposition. Rather than re-factoring all
+        of the rows, R is stacked on top of the new rows and re-factored
+        with Householder reflections, in O(n_new * n_features ** 2) time.
+        The rank, pivots and (if tracked) response coefficients reflect
+        the new rows. Note that, as in ``tsqr_decomposition``, the Q factor
+        of the rows is not kept: after an update, ``qr`` and ``qraux`` (and
+        the solver methods) are those of the decomposition of R.
+
+        Parameters
+        ----------
+
+        X : array_like, shape (n_new, n_features)
+            The rows to add
+
+        Y : array_like, shape (n_new,) or (n_new, n_targets), optional (default=None)
+            The responses of the rows to add. Required
+            if ``Y`` was passed to the constructor.
+
+        Returns
+        -------
+
+        self
+        """
+        R, z, rho = self._r_state()
+        p, m = R.shape[1], z.shape[1]
+        X, Y = self._check_rows(X, Y, m)
+        order = self._order()
+
+        # the residual norms are a row below R, so they are
+        # included in the new residual norms (by orthogonality)
+        stacked = [np.hstack((R, z))]
+        if m:
+            stacked.append(np.concatenate((np.zeros(p), rho)).reshape(1, -1))
+        stacked.append(np.hstack((X[:, order], Y)))
+
+        T = _block_r(np.vstack(stacked))
+        rho = np.sqrt(np.einsum('ij,ij->j', T[p:, p:], T[p:, p:]))
+
+        T = self._padded_R(T)
+        self._refactor(T[:, :p], T[:, p:], rho)
+        return self
+
+    def downdate(self, X, Y=None):
+        """Remove rows from the decomposition, using the LINPACK (dchdd)
+        algorithm, which updates R with a sequence of Givens rotations in
+        O(n_old * n_features ** 2) time. The rank, pivots and (if tracked)
+        response coefficients reflect the removal. As with ``update``, the Q
+        factor of the rows is not kept. The rows must have been in the
+        decomposition, and the decomposition must be of full rank.
+
+        Parameters
+        ----------
+
+        X : array_like, shape (n_old, n_features)
+            The rows to remove
+
+        Y : array_like, shape (n_old,) or (n_old, n_targets), optional (default=None)
+            The responses of the rows to remove. Required
+            if ``Y`` was passed to the constructor.
+
+        Returns
+        -------
+
+        self
+        """
+        R, z, rho = self._r_state()
+        p, m = R.shape[1], z.shape[1]
+        X, Y = self._check_rows(X, Y, m)
+
+        if self.rank < p:
+            raise ValueError('cannot downdate a rank deficient decomposition')
+
+        R, z, rho = R.copy(), z.copy(), rho.copy()
+        c, s = np.empty(p), np.empty(p)
+        for x, y in zip(X[:, self._order()], Y):
+            # solve R^T * a = x. If ||a|| >= 1, R^T * R - x * x^T is not positive definite
+            a = solve_triangular(R, x, trans='T')
+            norm_sq = np.dot(a, a)
+            if not norm_sq < 1.:
+                raise ValueError('cannot remove rows that are not in the decomposition')
+
+            # determine the rotations
+            alpha = np.sqrt(1. - norm_sq)
+            for i in range(p - 1, -1, -1):
+                scale = alpha + np.abs(a[i])
+                a_i, b_i = alpha / scale, a[i] / scale
+                norm = np.sqrt(a_i * a_i + b_i * b_i)
+                c[i], s[i] = a_i / norm, b_i / norm
+                alpha = scale * norm
+
+            # apply them to the rows of R
+            xx = np.zeros(p)
+            for i in range(p - 1, -1, -1):
+                r_i = R[i, i:].copy()
+                t = c[i] * xx[i:] + s[i] * r_i
+                R[i, i:] = c[i] * r_i - s[i] * xx[i:]
+                xx[i:] = t
+
+            # and to Q^T * Y and the residual norms
+            if m:
+                zeta = y.copy()
+                for i in range(p):
+                    z[i] = (z[i] - s[i] * zeta) / c[i]
+                    zeta = c[i] * zeta - s[i] * z[i]
+
+                zeta = np.abs(zeta)
+                if (zeta > rho * (1. + 1e-10)).any():
+                    raise ValueError('cannot remove rows that are not in the decomposition')
+                rho = np.sqrt(np.maximum(rho * rho - zeta * zeta, 0.))
+
+        self._refactor(R, z, rho)
+        return self
+
+    def get_response_coef(self):
+        """Get the least squares coefficients of the responses, ``Y``,
+        tracked through ``update`` and ``downdate``. As in ``lstsq``, the
+        aliased (pivoted, dependent) columns have coefficients of 0.
+
+        Returns
+        -------
+
+        coef : np.ndarray, shape=(n_features,) or (n_features, n_targets)
+            The regression coefficients, in the order of the
+            original (un-pivoted) columns.
+        """
+        R, z, _ = self._r_state()
+        if not z.shape[1]:
+            raise ValueError('no responses are tracked (Y must be passed to the constructor)')
+
+        k = self.rank
+        coef = np.zeros(z.shape, dtype=np.double)
+        coef[self._order()[:k]] = solve_triangular(R[:k, :k], z[:k], lower=False)
+        return coef.ravel() if self._y_1d_ else coef
+
+
+def _block_r(X, rows=None):
+    """Compute the R factor of the QR decomposition of ``X[rows]`` (or of
+    ``X``), which has ``min(n_rows, n_features)`` rows. The block is copied
+    (as a Fortran-ordered double array), so ``X`` may be a memmap.
+    """
+    X = X if rows is None else X[rows]
+    X = check_array(X, dtype=np.double, order='F', copy=True)
+    geqrf, = get_lapack_funcs(('geqrf',), (X,))
+    qr = _lapack_call(geqrf, X, lwork=max(1, 64 * X.shape[1]), overwrite_a=1)[0]
+    return _qr_R(qr)
+
+
+def _stacked_r(R1, R2):
+    """Compute the R factor of two stacked R factors"""
+    return _block_r(np.vstack((R1, R2)))
+
+
+def _tsqr_r(X, block_size, n_jobs):
+    """Compute the R factor of ``X`` by factoring row blocks independently,
+    and then combining the R factors pairwise in a binary reduction tree.
+    """
+    n, p = X.shape
+    n_jobs = _get_n_jobs(n_jobs)
+
+    # default: one block per worker, but bounded in size
+    if block_size is None:
+        block_size = max(p, min(-(-n // n_jobs), _MAX_BLOCK_ELEMENTS // max(p, 1)))
+    elif not is_integer(block_size) or block_size < 1:
+        raise ValueError('block_size must be a positive int, but got %s' % str(block_size))
+
+    blocks = [slice(i, min(i + block_size, n)) for i in range(0, n, block_size)]
+    if n_jobs == 1:
+        Rs = [_block_r(X, rows) for rows in blocks]
+    else:
+        # LAPACK releases the GIL, so threads factor the blocks in parallel, and
+        # each reads only its own rows of X (rather than X being sent to each process)
+        Rs = Parallel(n_jobs=n_jobs, backend='threading')(delayed(_block_r)(X, rows) for rows in blocks)
+
+    # each level of the tree halves the number of R factors
+    while len(Rs) > 1:
+        pairs = [(Rs[i], Rs[i + 1]) for i in range(0, len(Rs) - 1, 2)]
+        if n_jobs == 1 or len(pairs) == 1:
+            reduced = [_stacked_r(R1, R2) for R1, R2 in pairs]
+        else:
+            reduced = Parallel(n_jobs=n_jobs, backend='threading')(
+                delayed(_stacked_r)(R1, R2) for R1, R2 in pairs)
+
+        Rs = reduced + Rs[len(pairs) * 2:]  # an odd one out moves up a level
+
+    return Rs[0]
+
+
+def tsqr_decomposition(X, pivot=1, tol=1e-7, block_size=None, n_jobs=1):
+    """Performs a tall-skinny QR (TSQR) decomposition [1]. The rows of ``X``
+    are split into blocks which are factored independently (in parallel
+    threads, if ``n_jobs`` is not 1), and the R factors of the blocks are combined pairwise
+    in a binary reduction tree. Since no block is larger than ``block_size``
+    rows, this is not subject to the LINPACK limit of 2^31 - 1 elements, and
+    ``X`` may be a memory-mapped array.
+
+    The Q factor of ``X`` is never formed. Rather, since ``X = QR``, the R
+    factor has the same rank, linear dependencies and column norms as ``X``,
+    and it is decomposed in place of ``X``. The result's ``get_R``, ``get_rank``
+    and ``pivot`` therefore describe ``X`` (up to the signs of the rows of R),
+    but its ``qr`` and ``qraux`` (and the solver methods) are those of R.
+
+    Parameters
+    ----------
+
+    X : array_like, shape (n_samples, n_features)
+        The matrix to decompose
+
+    pivot : int, optional (default=1)
+        Whether to perform pivoting. 0 is False, any other value
+        will be coerced to 1 (True).
+
+    tol : float, optional (default=1e-7)
+        The tolerance for detecting linearly dependent columns
+        (see ``qr_decomposition``).
+
+    block_size : int, optional (default=None)
+        The number of rows in each block. If None, the rows are split
+        evenly among the workers, with no block larger than 2^24 elements.
+
+    n_jobs : int, optional (default=1)
+        The number of threads to use for factoring the blocks.
+        If -1 all CPUs are used. For n_jobs below -1, (n_cpus + 1 + n_jobs)
+        are used. Thus for n_jobs = -2, all CPUs but one are used.
+
+    Returns
+    -------
+
+    decomp : ``QRDecomposition``
+        The decomposition of the R factor of ``X``
+
+    References
+    ----------
+
+    .. [1] Demmel, J., Grigori, L., Hoemmen, M. and Langou, J. "Communication-optimal
+           parallel and sequential QR and LU factorizations", SIAM Journal on
+           Scientific Computing 2012
+    """
+    if not hasattr(X, 'shape') or len(X.shape) != 2:
+        X = check_array(X, dtype=np.double)
+    return QRDecomposition(_tsqr_r(X, block_size, n_jobs), pivot=pivot, tol=tol)
@@ -31,3 +31,143 @@ def test_qr():
 
     # ensure dimension error
     assert_fails(q.get_coef, ValueError, X[:140, :])
+
+
+def test_qr_rank_deficient():
+    rs = np.random.RandomState(42)
+    Z = rs.rand(50, 5)
+    Z[:, 1] = 2 * Z[:, 0]  # dependent column in the middle
+
+    # the dependent column is pivoted to the end, the rest keep their order
+    q = QRDecomposition(Z)
+    assert q.get_rank() == 4
+    assert_array_equal(q.pivot, [0, 2, 3, 4, 1])
+
+    # the R diagonal reveals the rank, and the factorization is of the pivoted matrix
+    R = np.triu(q.qr[:5, :])
+    assert np.abs(R[4, 4]) < 1e-7 * np.linalg.norm(Z[:, 1])
+    assert_array_almost_equal(np.abs(R), np.abs(np.linalg.qr(Z[:, q.pivot])[1]))
+
+    # without pivoting, the rank is still read from R
+    q = QRDecomposition(Z, pivot=0)
+    assert q.get_rank() == 4
+    assert q.pivot is None
+
+    # a zero column is dependent
+    Z[:, 3] = 0.
+    assert QRDecomposition(Z).get_rank() == 3
+
+    # more columns than rows
+    assert QRDecomposition(rs.rand(3, 5)).get_rank() == 3
+
+    # a dependent column among the first n brings a later column into R
+    a, b, c, d = rs.rand(4, 3)
+    W = np.column_stack([a, a, b, c, d])
+    q = QRDecomposition(W)
+    assert q.get_rank() == 3
+    assert_array_equal(q.pivot, [0, 2, 3, 4, 1])
+    assert_array_almost_equal(np.abs(np.triu(q.qr[:3, :])), np.abs(np.linalg.qr(W[:, q.pivot])[1]))
+    assert QRDecomposition(W, pivot=0).get_rank() == 3
+
+
+def test_qr_lstsq():
+    rs = np.random.RandomState(42)
+    Z = rs.rand(60, 5)
+    Y = rs.rand(60, 3)
+
+    # multiple targets from one factorization match numpy's solver
+    q = QRDecomposition(Z)
+    coef, residuals, fitted = q.lstsq(Y)
+    assert coef.shape == (5, 3)
+    assert_array_almost_equal(coef, np.linalg.lstsq(Z, Y, rcond=None)[0])
+    assert_array_almost_equal(fitted, np.dot(Z, coef))
+    assert_array_almost_equal(fitted + residuals, Y)
+    assert_array_almost_equal(q.get_fitted(Y), fitted)
+    assert_array_almost_equal(q.get_residuals(Y), residuals)
+
+    # 1d targets give 1d output
+    c1, r1, f1 = q.lstsq(Y[:, 0])
+    assert c1.shape == (5,) and r1.shape == (60,) and f1.shape == (60,)
+    assert_array_almost_equal(c1, coef[:, 0])
+
+    # Q is orthogonal
+    assert_array_almost_equal(q.get_qy(q.get_qty(Y)), Y)
+    assert_array_almost_equal(np.linalg.norm(q.get_qty(Y), axis=0), np.linalg.norm(Y, axis=0))
+
+    # the aliased column gets a zero coefficient, and the fit is unchanged
+    Z[:, 1] = 2 * Z[:, 0]
+    coef, residuals, fitted = QRDecomposition(Z).lstsq(Y)
+    assert_array_equal(coef[1], np.zeros(3))
+    assert_array_almost_equal(fitted, np.dot(Z, np.linalg.lstsq(Z, Y, rcond=None)[0]))
+
+    # dimension error
+    assert_fails(q.lstsq, ValueError, Y[:50])
+
+
+def test_tsqr():
+    rs = np.random.RandomState(42)
+    Z = rs.rand(103, 6)
+    R = np.linalg.qr(Z)[1]
+
+    # R is unique up to the signs of its rows, for any blocking
+    for block_size, n_jobs in ((10, 1), (1, 1), (200, 1), (None, 2), (7, 2)):
+        q = tsqr_decomposition(Z, block_size=block_size, n_jobs=n_jobs)
+        assert q.get_rank() == 6
+        assert_array_almost_equal(np.abs(q.get_R()), np.abs(R))
+
+    # dependent columns are pivoted to the end, as in the full decomposition
+    Z[:, 2] = Z[:, 0] - Z[:, 1]
+    q = tsqr_decomposition(Z, block_size=10)
+    assert q.get_rank() == 5
+    assert_array_equal(q.pivot, QRDecomposition(Z).pivot)
+
+    # bad block size
+    assert_fails(tsqr_decomposition, ValueError, Z, 1, 1e-7, 0)
+
+
+def test_qr_update():
+    rs = np.random.RandomState(42)
+    Z = rs.rand(200, 5)
+    Y = rs.rand(200, 2)
+
+    def ls(A, B):
+        return np.linalg.lstsq(A, B, rcond=None)[0]
+
+    # adding rows gives the decomposition of all of the rows
+    q = QRDecomposition(Z[:120], Y=Y[:120])
+    assert_array_almost_equal(q.get_response_coef(), ls(Z[:120], Y[:120]))
+    q.update(Z[120:150], Y[120:150]).update(Z[150:], Y[150:])
+    assert q.get_rank() == 5
+    assert_array_almost_equal(np.abs(q.get_R()), np.abs(np.linalg.qr(Z)[1]))
+    assert_array_almost_equal(q.get_response_coef(), ls(Z, Y))
+
+    # removing rows
+    q.downdate(Z[:50], Y[:50])
+    assert_array_almost_equal(np.abs(q.get_R()), np.abs(np.linalg.qr(Z[50:])[1]))
+    assert_array_almost_equal(q.get_response_coef(), ls(Z[50:], Y[50:]))
+
+    # 1d responses, and an untracked response
+    q = QRDecomposition(Z[:100], Y=Y[:100, 0]).update(Z[100:], Y[100:, 0])
+    assert_array_almost_equal(q.get_response_coef(), ls(Z, Y[:, 0]))
+    assert_fails(QRDecomposition(Z).get_response_coef, ValueError)
+    assert_fails(QRDecomposition(Z).update, ValueError, Z, Y)
+    assert_fails(q.update, ValueError, Z)
+
+    # the rank is refreshed as rows arrive
+    W = Z.copy()
+    W[:20, 3] = 2 * W[:20, 0]
+    q = QRDecomposition(W[:20], Y=Y[:20])
+    assert q.get_rank() == 4
+    assert_array_equal(q.pivot, [0, 1, 2, 4, 3])
+    coef = q.get_response_coef()
+    assert_array_equal(coef[3], np.zeros(2))
+    assert_array_almost_equal(np.dot(W[:20], coef), np.dot(W[:20], ls(W[:20], Y[:20])))
+
+    assert_fails(q.downdate, ValueError, W[:5], Y[:5])  # rank deficient
+    q.update(W[20:], Y[20:])
+    assert q.get_rank() == 5
+    assert_array_equal(q.pivot, np.arange(5))
+    assert_array_almost_equal(q.get_response_coef(), ls(W, Y))
+
+    # cannot remove rows that were never added
+    assert_fails(QRDecomposition(Z[:10]).downdate, ValueError, 10 * Z[10:12])
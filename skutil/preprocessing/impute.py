@@ -10,6 +10,7 @@ from sklearn.utils.validation import check_is_fitted
 from abc import ABCMeta
 from skutil.base import SelectiveMixin, BaseSkutil
 from ..utils import is_entirely_numeric, get_numeric, validate_is_pd, is_numeric
+from ..utils.util import _resolve_profile
 from ..utils.fixes import is_iterable
 
 __all__ = [
@@ -148,6 +149,13 @@ class SelectiveImputer(_BaseImputer):
         the fill to use for missing values in the training matrix
         when fitting a ``SelectiveImputer``. If None, will default to 'mean'
 
+    profile : None, 'auto' or ``ColumnProfile``, optional (default=None)
+        If provided, the means, medians and modes are read from the
+        ``ColumnProfile`` of ``X`` rather than computed in ``fit``, so
+        several transformers fit on the same frame only scan it once.
+        If 'auto', the profile is looked up (or computed) with
+        ``skutil.utils.profile_frame``.
+
 
     Examples
     --------
@@ -177,8 +185,9 @@ class SelectiveImputer(_BaseImputer):
         The imputer fill-values
     """
 
-    def __init__(self, cols=None, as_df=True, fill='mean'):
+    def __init__(self, cols=None, as_df=True, fill='mean', profile=None):
         super(SelectiveImputer, self).__init__(cols, as_df, fill)
+        self.profile = profile
 
     def fit(self, X, y=None):
         """Fit the imputer and return the
@@ -203,7 +212,7 @@ class SelectiveImputer(_BaseImputer):
         """
 
         # check on state of X and cols
-        X, self.cols = validate_is_pd(X, self.cols)
+        X, self.cols = validate_is_pd(X, self.cols, copy=False)  # fit does not alter X
         cols = self.cols if self.cols is not None else X.columns.values
 
         # validate the fill, do fit
@@ -214,7 +223,11 @@ class SelectiveImputer(_BaseImputer):
                 raise TypeError('self.fill must be either "mode", "mean", "median", None, '
                                 'a number, or an iterable. Got %s' % fill)
 
-            if fill == 'mode':
+            profile = _resolve_profile(self.profile, X, cols)
+            if profile is not None:
+                self.fills_ = dict(zip(cols, getattr(profile, fill)[cols]))
+
+            elif fill == 'mode':
                 # for each column to impute, we go through and get the value counts
                 # of each, sorting by the max...
                 self.fills_ = dict(zip(cols, X[cols].apply(lambda x: _col_mode(x))))
@@ -241,12 +254,15 @@ class SelectiveImputer(_BaseImputer):
 
             # make sure they're all ints
             _val_values(fill)
+            profile = _resolve_profile(self.profile, X, cols)
             d = {}
             for ind, c in enumerate(cols):
                 f = fill[ind]
 
                 if is_numeric(f):
                     d[c] = f
+                elif profile is not None:
+                    d[c] = getattr(profile, f)[c]
                 else:
                     the_col = X[c]
                     if f == 'mode':
@@ -114,6 +114,15 @@ def test_selective_imputer():
     assert y.isnull().sum().sum() == 0, ('expected no nulls but got:\n', y)
     assert all([y.iloc[1, 0] == 1.5, y.iloc[2, 1] == 2, y.iloc[2, 2] == 2.5])
 
+    # the fills can be read from a profile of the frame
+    for fill in ('mean', 'median', ['mean', 'median', -1]):
+        expected = SelectiveImputer(fill=fill).fit(a).fills_
+        assert SelectiveImputer(fill=fill, profile='auto').fit(a).fills_ == expected
+
+    # (either of the tied values is the mode of 'a' and 'c')
+    fills = SelectiveImputer(fill='mode', profile='auto').fit(a).fills_
+    assert all([fills['a'] in (1, 2), fills['b'] == 2, fills['c'] in (3, 2)])
+
     # now test with an iterable
     imputer = SelectiveImputer(fill=[5, 6, 7])
     y = imputer.fit_transform(a)
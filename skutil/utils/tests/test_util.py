@@ -280,10 +280,49 @@ def test_pd_stats():
     assert stats['constant']['dtype'].startswith('int')  # we assert it's considered an int
     assert stats.loc['min_max_class_ratio']['constant'] == '--'
 
+    # the profile gives the same stats
+    assert pd_stats(Y, profile='auto').equals(pd_stats(Y))
+
     # test with bad col_type
     assert_fails(pd_stats, ValueError, Y, 'bad_type')
 
 
+def test_column_profile():
+    Y = load_iris_df()
+    Y.iloc[::10, 0] = np.nan
+    Y['factor'] = ['a' if i == 0 else 'b' for i in Y.Species]
+
+    profile = ColumnProfile(Y)
+    assert profile.n_samples == 150
+    assert_array_almost_equal(profile.null_count.values, Y.isnull().sum().values)
+    assert_array_almost_equal(profile.n_unique.values, [Y[c].nunique() for c in Y.columns])
+
+    numeric = Y.columns[:-1]
+    assert_array_almost_equal(profile.mean[numeric].values, Y[numeric].mean().values)
+    assert_array_almost_equal(profile.variance[numeric].values, Y[numeric].var().values)
+    assert_array_almost_equal(profile.median[numeric].values, Y[numeric].median().values)
+    assert np.isnan(profile.mean['factor'])
+
+    counts = Y['factor'].value_counts()
+    assert profile.mode['factor'] == 'b'
+    assert (profile.top_count['factor'], profile.second_count['factor']) == (counts['b'], counts['a'])
+    assert profile.min_count['factor'] == counts['a']
+
+    # profiles are memoized against the frame itself, while it keeps its structure
+    assert profile_frame(Y) is profile_frame(Y)
+    assert profile_frame(Y.copy()) is not profile_frame(Y)
+    cached = profile_frame(Y)
+    Y['extra'] = 1.
+    assert profile_frame(Y) is not cached
+
+    # only the structure of a frame is checked against the profile
+    profile.check_frame(Y, cols=numeric)
+    assert_fails(profile.check_frame, ValueError, Y)
+    assert_fails(profile.check_frame, ValueError, Y.iloc[:10], numeric)
+    Y['factor'] = 1
+    assert_fails(profile.check_frame, ValueError, Y, ['factor'])
+
+
 if CAN_CHART_MPL:
     @cleanup
     def test_corr():
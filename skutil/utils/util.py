@@ -4,12 +4,15 @@ from __future__ import print_function, division, absolute_import
 import warnings
 import sys
 import traceback
+import weakref
 import numpy as np
 import pandas as pd
 import numbers
+from collections import OrderedDict
 import scipy.stats as st
 from sklearn.datasets import load_iris, load_breast_cancer, load_boston
 from sklearn.externals import six
+from sklearn.externals.joblib import cpu_count
 from sklearn.metrics import confusion_matrix as cm
 from ..base import suppress_warnings
 from .fixes import (_grid_detail, _is_integer, is_iterable, 
@@ -41,6 +44,7 @@ except ImportError:
 __max_exp__ = 1e19
 __min_log__ = -19
 __all__ = [
+    'ColumnProfile',
     'corr_plot',
     'df_memory_estimate',
     'exp',
@@ -58,6 +62,7 @@ __all__ = [
     'load_iris_df',
     'log',
     'pd_stats',
+    'profile_frame',
     'report_confusion_matrix',
     'report_grid_score_detail',
     'shuffle_dataframe',
@@ -119,6 +124,45 @@ def _exp_single(x):
     return val
 
 
+@suppress_warnings
+def _exp_array(x, out=None):
+    """Sanitized exponential function for numeric
+    numpy arrays. This is the vectorized analogue of
+    ``_exp_single``, and avoids computing the exp
+    one element at a time.
+
+    Parameters
+    ----------
+
+    x : np.ndarray
+        The numeric array to exp
+
+    out : np.ndarray, optional (default=None)
+        The (float) array in which to store the result.
+        May be ``x`` itself. If None, a new array is allocated.
+
+
+    Returns
+    -------
+
+    val : np.ndarray
+        the exp of x
+    """
+    val = np.exp(x, out=out)
+    return np.minimum(val, __max_exp__, out=val)
+
+
+def _get_n_jobs(n_jobs):
+    """Get the number of workers to use, with the
+    same semantics as joblib's ``n_jobs``.
+    """
+    if not is_integer(n_jobs) or n_jobs == 0:
+        raise ValueError('n_jobs must be a non-zero int, but got %s' % str(n_jobs))
+    if n_jobs < 0:
+        return max(cpu_count() + 1 + n_jobs, 1)
+    return n_jobs
+
+
 def _vectorize(fun, x):
     if is_iterable(x):
         return np.array([fun(p) for p in x])
@@ -144,6 +188,9 @@ def exp(x):
     # check on single exp
     if is_numeric(x):
         return _exp_single(x)
+    # numeric arrays can be handled by numpy directly
+    if isinstance(x, np.ndarray) and x.dtype.kind in 'biuf':
+        return _exp_array(x)
     # try vectorized
     try:
         return _vectorize(exp, x)
@@ -399,7 +446,7 @@ def shuffle_dataframe(X):
     return X.iloc[np.random.permutation(np.arange(X.shape[0]))]
 
 
-def validate_is_pd(X, cols, assert_all_finite=False):
+def validate_is_pd(X, cols, assert_all_finite=False, copy=True):
     """Used within each SelectiveMixin fit method to determine whether
     the passed ``X`` is a dataframe, and whether the cols is appropriate.
     There are four scenarios (in the order in which they're checked):
@@ -439,12 +486,17 @@ def validate_is_pd(X, cols, assert_all_finite=False):
         If True, will raise an AssertionError if any np.nan or np.inf
         values reside in ``X``.
 
+    copy : bool, optional (default=True)
+        Whether to copy ``X`` if it is already a DataFrame. If False,
+        ``X`` itself is returned in scenarios 2) and 3).
+
 
     Returns
     -------
 
     X : pd.DataFrame, shape=(n_samples, n_features)
-        A copy of the original input ``X``
+        A copy of the original input ``X`` (or ``X`` itself,
+        if it is a DataFrame and ``copy`` is False)
 
     cols : list or None, shape=(n_features,)
         If ``cols`` was not None and did not raise a TypeError,
@@ -483,11 +535,11 @@ def validate_is_pd(X, cols, assert_all_finite=False):
 
         # case 2, we have a DF but no cols, def behavior: use all
         elif is_df and cols is None:
-            return X.copy(), None
+            return X.copy() if copy else X, None
 
         # case 3, we have a DF AND cols
         elif is_df and cols is not None:
-            return X.copy(), cols
+            return X.copy() if copy else X, cols
 
         # case 4, we have neither a frame nor cols (maybe JUST a np.array?)
         else:
@@ -505,10 +557,11 @@ def validate_is_pd(X, cols, assert_all_finite=False):
     if assert_all_finite:
         # if cols, we only need to ensure the specified columns are finite
         cols_tmp = _cols_if_none(X, cols)
-        X_prime = X[get_numeric(X[cols_tmp])]  # subset the subset... only numerics
 
-        # also apply only to the non-object columns
-        if X_prime.apply(lambda x: (~np.isfinite(x)).sum()).sum() > 0:
+        # check only the float columns (ints are always finite), each
+        # in place, rather than copying the numeric columns into a new frame
+        floats = [c for c in cols_tmp if str(X[c].dtype).startswith('float')]
+        if not all(np.isfinite(X[c].values).all() for c in floats):
             raise ValueError('Expected all entries to be finite')
 
     return X, cols
@@ -556,7 +609,210 @@ def _is_int(x, tp):
         return False
 
 
-def pd_stats(X, col_type='all', na_str='--', hi_skew_thresh=1.0, mod_skew_thresh=0.5):
+class ColumnProfile(object):
+    """A profile of the per-column statistics that the skutil feature
+    selectors, imputers and ``pd_stats`` compute over a frame: null counts,
+    means, variances, medians, and the frequencies of the most (and least)
+    common values. Each column is factorized once and its codes are counted
+    with a ``bincount``, and the moments of the numeric columns are computed
+    from their distinct values and counts, so the frame is scanned once,
+    however many transformers use the profile. Use ``profile_frame`` to
+    memoize the profile against the frame.
+
+    Parameters
+    ----------
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        The frame to profile.
+
+
+    Examples
+    --------
+
+        >>> from skutil.utils import load_iris_df
+        >>> from skutil.feature_selection import NearZeroVarianceFilterer, SparseFeatureDropper
+        >>>
+        >>> X = load_iris_df(include_tgt=False)
+        >>> profile = ColumnProfile(X)
+        >>> dropper = SparseFeatureDropper(profile=profile).fit(X)
+        >>> nzv = NearZeroVarianceFilterer(profile=profile).fit(X)
+
+
+    Attributes
+    ----------
+
+    n_samples : int
+        The number of rows in the frame
+
+    dtypes : Pandas ``Series``, shape=(n_features,)
+        The dtype of each column, against which ``check_frame``
+        validates the frames the profile is used on
+
+    null_count : Pandas ``Series``, shape=(n_features,)
+        The number of NaNs in each column
+
+    n_unique : Pandas ``Series``, shape=(n_features,)
+        The number of distinct non-NaN values in each column
+
+    top_count : Pandas ``Series``, shape=(n_features,)
+        The frequency of the most common value of each column (0 if empty)
+
+    second_count : Pandas ``Series``, shape=(n_features,)
+        The frequency of the second-most common value of each
+        column (0 if there are fewer than two values)
+
+    min_count : Pandas ``Series``, shape=(n_features,)
+        The frequency of the least common value of each column (0 if empty)
+
+    mode : Pandas ``Series``, shape=(n_features,)
+        The most common non-NaN value of each column
+
+    mean : Pandas ``Series``, shape=(n_features,)
+        The mean of each numeric column, ignoring NaNs (NaN if not numeric)
+
+    variance : Pandas ``Series``, shape=(n_features,)
+        The sample variance of each numeric column, ignoring NaNs
+
+    median : Pandas ``Series``, shape=(n_features,)
+        The median of each numeric column, ignoring NaNs
+    """
+
+    def __init__(self, X):
+        if not isinstance(X, pd.DataFrame):
+            X, _ = validate_is_pd(X, None)
+
+        n_samples, n_features = X.shape
+        self.n_samples = n_samples
+        self.dtypes = X.dtypes.copy()
+
+        stats = np.full((n_features, 8), np.nan)
+        modes = [None] * n_features
+
+        for i in range(n_features):
+            series = X.iloc[:, i]
+            codes, uniques = pd.factorize(series)
+            present = codes >= 0
+            counts = np.bincount(codes[present], minlength=1)
+
+            n_unique = uniques.shape[0]
+            n_present = int(counts.sum())
+            top = np.partition(counts, counts.shape[0] - 2)[-2:] if n_unique > 1 else (0, counts[0])
+            stats[i, :5] = (n_samples - n_present, n_unique, top[1], top[0], counts.min() if n_unique else 0)
+
+            if not n_unique:
+                continue
+            modes[i] = uniques[np.argmax(counts)]
+
+            if str(series.dtype).startswith(('int', 'float')):
+                # the mean and variance are (two-pass) weighted sums over the distinct
+                # values, so only the median needs the column itself (a partition)
+                values, weights = np.asarray(uniques, dtype=np.double), counts.astype(np.double)
+                mean = weights.dot(values) / n_present
+                variance = weights.dot((values - mean) ** 2) / (n_present - 1) if n_present > 1 else np.nan
+                column = series.values if n_present == n_samples else series.values[present]
+                stats[i, 5:] = (mean, variance, np.median(column))
+
+        index = X.columns
+        self.null_count = pd.Series(stats[:, 0].astype(np.int64), index=index)
+        self.n_unique = pd.Series(stats[:, 1].astype(np.int64), index=index)
+        self.top_count = pd.Series(stats[:, 2].astype(np.int64), index=index)
+        self.second_count = pd.Series(stats[:, 3].astype(np.int64), index=index)
+        self.min_count = pd.Series(stats[:, 4].astype(np.int64), index=index)
+        self.mode = pd.Series(modes, index=index)
+        self.mean = pd.Series(stats[:, 5], index=index)
+        self.variance = pd.Series(stats[:, 6], index=index)
+        self.median = pd.Series(stats[:, 7], index=index)
+
+    @property
+    def sparsity(self):
+        """The proportion of NaNs in each column"""
+        return self.null_count / float(self.n_samples)
+
+    def check_frame(self, X, cols=None):
+        """Validate that the profile describes the ``cols`` of ``X``
+        (all of them if ``cols`` is None), raising a ``ValueError`` if
+        the number of rows differs, or any of the columns is not in the
+        profile or has a different dtype. Only the structure of ``X`` is
+        checked; its contents are trusted to be those that were profiled.
+        """
+        cols = X.columns if cols is None else cols
+        missing = [c for c in cols if c not in self.dtypes.index]
+        if X.shape[0] != self.n_samples or missing:
+            raise ValueError('the profile does not describe the frame '
+                             '(missing columns: %s)' % ', '.join(str(c) for c in missing))
+
+        changed = [c for c in cols if X[c].dtype != self.dtypes[c]]
+        if changed:
+            raise ValueError('the profile does not describe the frame '
+                             '(columns with different dtypes: %s)' % ', '.join(str(c) for c in changed))
+
+
+# the most recently used profiles, keyed on the ids of their frames
+_PROFILE_CACHE = OrderedDict()
+_PROFILE_CACHE_SIZE = 8
+
+
+def profile_frame(X):
+    """Get the ``ColumnProfile`` of a frame, memoized against the
+    identity of the frame, so the transformers that are fit on the
+    same frame only profile it once. The cached profile is only reused
+    while the frame has the same shape, column names and dtypes, so if
+    the values of a frame are changed in place, profile it again with
+    ``ColumnProfile`` (and pass the profile explicitly).
+
+    Parameters
+    ----------
+
+    X : Pandas ``DataFrame``, shape=(n_samples, n_features)
+        The frame to profile.
+
+
+    Returns
+    -------
+
+    profile : ``ColumnProfile``
+        The (possibly cached) profile of ``X``
+    """
+    if not isinstance(X, pd.DataFrame):
+        X, _ = validate_is_pd(X, None)
+
+    # the weak reference tells a cached frame from a new one that reuses its id
+    ref, profile = _PROFILE_CACHE.pop(id(X), (None, None))
+    if ref is None or ref() is not X or not _describes(profile, X):
+        ref, profile = weakref.ref(X), ColumnProfile(X)
+
+    # re-insert as the most recently used, and evict the least
+    _PROFILE_CACHE[id(X)] = (ref, profile)
+    while len(_PROFILE_CACHE) > _PROFILE_CACHE_SIZE:
+        _PROFILE_CACHE.popitem(last=False)
+
+    return profile
+
+
+def _describes(profile, X):
+    """Whether ``profile`` has the shape, names and dtypes of ``X``"""
+    return (X.shape[0] == profile.n_samples and
+            X.columns.equals(profile.dtypes.index) and
+            X.dtypes.equals(profile.dtypes))
+
+
+def _resolve_profile(profile, X, cols=None):
+    """Resolve the ``profile`` argument of a transformer: None (don't
+    use a profile), 'auto' (look up the memoized profile of ``X``),
+    or a ``ColumnProfile``, which must describe ``X``.
+    """
+    if profile is None:
+        return None
+    if isinstance(profile, six.string_types) and profile == 'auto':
+        return profile_frame(X)
+    if not isinstance(profile, ColumnProfile):
+        raise ValueError('profile must be None, "auto" or a ColumnProfile, but got %s' % type(profile))
+
+    profile.check_frame(X, cols)
+    return profile
+
+
+def pd_stats(X, col_type='all', na_str='--', hi_skew_thresh=1.0, mod_skew_thresh=0.5, profile=None):
     """Get a descriptive report of the elements in the data frame.
     Builds on existing pandas ``describe`` method by adding counts of
     factor-level features, a skewness rating and several other helpful
@@ -586,6 +842,12 @@ def pd_stats(X, col_type='all', na_str='--', hi_skew_thresh=1.0, mod_skew_thresh
         be deemed "moderate," so long as it does not exceed
         ``hi_skew_thresh``
 
+    profile : None, 'auto' or ``ColumnProfile``, optional (default=None)
+        If provided, the unique counts and class frequencies are read
+        from the ``ColumnProfile`` of ``X`` rather than computed for
+        each column. If 'auto', the profile is looked up (or computed)
+        with ``profile_frame``.
+
 
     Returns
     -------
@@ -594,6 +856,7 @@ def pd_stats(X, col_type='all', na_str='--', hi_skew_thresh=1.0, mod_skew_thresh
         The resulting stats dataframe
     """
     X, _ = validate_is_pd(X, None, False)
+    profile = _resolve_profile(profile, X)
     raw_stats = X.describe()
     stats = raw_stats.to_dict()
     dtypes = X.dtypes
@@ -635,16 +898,27 @@ def pd_stats(X, col_type='all', na_str='--', hi_skew_thresh=1.0, mod_skew_thresh
         # ratio of majority : minority
         _isint = _is_int(X[col], _dtype)
         if _isint or _dtype == 'object':
-            _unique = len(X[col].unique())
-            _val_cts = X[col].value_counts().sort_values(ascending=True)
-            _min_cls, _max_cls = _val_cts.index[0], _val_cts.index[-1]
-
-            # if there's only one class...
-            if _min_cls == _max_cls:
-                _min_cls = _nastr
-                _min_max_ratio = _nastr
+            if profile is not None:
+                # unique() counts NaN as a value, but value_counts() does not
+                _unique = profile.n_unique[col] + int(profile.null_count[col] > 0)
+
+                # if there's only one class...
+                if profile.n_unique[col] < 2:
+                    _min_max_ratio = _nastr
+                else:
+                    _min_max_ratio = profile.min_count[col] / profile.top_count[col]
+
             else:
-                _min_max_ratio = _val_cts.values[0] / _val_cts.values[-1]
+                _unique = len(X[col].unique())
+                _val_cts = X[col].value_counts().sort_values(ascending=True)
+                _min_cls, _max_cls = _val_cts.index[0], _val_cts.index[-1]
+
+                # if there's only one class...
+                if _min_cls == _max_cls:
+                    _min_cls = _nastr
+                    _min_max_ratio = _nastr
+                else:
+                    _min_max_ratio = _val_cts.values[0] / _val_cts.values[-1]
 
             # chance we didn't recognize it as an int before...
             if 'float' in dct['dtype']:
@@ -700,7 +974,7 @@ def get_numeric(X):
     list, int
         The list of indices which are numeric.
     """
-    validate_is_pd(X, cols=None, assert_all_finite=False)  # don't want to assert finite or maybe endless recursion
+    validate_is_pd(X, cols=None, assert_all_finite=False, copy=False)  # don't want to assert finite or maybe endless recursion
     return X.dtypes[X.dtypes.apply(lambda x: str(x).startswith(("float", "int")))].index.tolist()
 
 